@@ -0,0 +1,107 @@
+"""
+Benchmark del ranking: agregado SQL (JOIN + GROUP BY + ORDER BY SUM) contra el
+leaderboard en memoria (skip list indexable).
+
+Se genera una base SQLite temporal con jugadores y videos procesados, y se mide la
+latencia media de top-N, de una página con offset y de "mi posición", además del
+costo de aplicar un voto al leaderboard.
+
+Uso:
+    python -m benchmarks.leaderboard --players 1000 10000 50000 --videos-per-player 3
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, desc
+from sqlalchemy.orm import sessionmaker
+
+from src.db.database import Base
+from src.models.db_models import Usuario, Video
+from src.utils.leaderboard import Leaderboard, player_totals_query
+
+
+def seed(db, players: int, videos_per_player: int, seed: int = 42):
+    rng = random.Random(seed)
+    db.bulk_insert_mappings(Usuario, [
+        {"id": i, "first_name": f"j{i}", "last_name": "x", "email": f"j{i}@anb.co",
+         "password": "x", "city": "Bogotá", "country": "Colombia"}
+        for i in range(1, players + 1)
+    ])
+    db.bulk_insert_mappings(Video, [
+        {"title": "v", "filename": "v.mp4", "status": "processed",
+         "owner_id": i, "votes_count": int(rng.paretovariate(1.2))}
+        for i in range(1, players + 1)
+        for _ in range(videos_per_player)
+    ])
+    db.commit()
+
+
+def _mean_ms(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(players: int, videos_per_player: int, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        seed(db, players, videos_per_player)
+
+        query, total = player_totals_query(db)
+        ordered = query.order_by(desc(total), Usuario.id)
+        middle = players // 2
+
+        def sql_my_rank():
+            rows = ordered.all()
+            return next(i for i, r in enumerate(rows) if r.id == middle)
+
+        board = Leaderboard()
+        rebuild_start = time.perf_counter()
+        board.rebuild(query.all())
+        rebuild_ms = (time.perf_counter() - rebuild_start) * 1000
+
+        rng = random.Random(1)
+        result = {
+            "players": players,
+            "sql_top10_ms": _mean_ms(lambda: ordered.limit(10).all(), repeat),
+            "sql_page_ms": _mean_ms(lambda: ordered.offset(middle).limit(10).all(), repeat),
+            "sql_my_rank_ms": _mean_ms(sql_my_rank, max(1, repeat // 10)),
+            "board_top10_ms": _mean_ms(lambda: board.top(0, 10), repeat * 100),
+            "board_page_ms": _mean_ms(lambda: board.top(middle, 10), repeat * 100),
+            "board_my_rank_ms": _mean_ms(lambda: board.rank(middle), repeat * 100),
+            "board_vote_ms": _mean_ms(lambda: board.add_votes(rng.randint(1, players), 1), repeat * 100),
+            "rebuild_ms": rebuild_ms,
+        }
+        db.close()
+        engine.dispose()
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--videos-per-player", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(
+        f"{'jugadores':>9} | {'sql top10':>9} {'sql pág.':>9} {'sql mía':>9} | "
+        f"{'mem top10':>9} {'mem pág.':>9} {'mem mía':>9} {'mem voto':>9} | {'rebuild':>9}"
+    )
+    for players in args.players:
+        r = run(players, args.videos_per_player, args.repeat)
+        print(
+            f"{r['players']:>9} | {r['sql_top10_ms']:>7.2f}ms {r['sql_page_ms']:>7.2f}ms "
+            f"{r['sql_my_rank_ms']:>7.2f}ms | {r['board_top10_ms']:>7.3f}ms {r['board_page_ms']:>7.3f}ms "
+            f"{r['board_my_rank_ms']:>7.3f}ms {r['board_vote_ms']:>7.3f}ms | {r['rebuild_ms']:>7.0f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Prueba de difusión del stream SSE (/api/public/live) dentro de un proceso, sin BD.
+
+Un hilo emite eventos de voto a la tasa indicada (por defecto 10k votos/s) sobre un
+conjunto de videos mientras miles de suscriptores consumen el mismo LiveBroadcaster
+que usa la API. Reporta mensajes por suscriptor y segundo (deberían ser ~1/tick sin
+importar la tasa de votos), la latencia de difusión de cada tick (desde que se publica
+hasta que lo recibe el último suscriptor) y la memoria por suscriptor conectado.
+
+Uso:
+    python -m benchmarks.live_fanout --subscribers 5000 --votes-per-second 10000 --seconds 5
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+from src.utils.events import VOTE
+from src.utils.live_updates import LiveBroadcaster
+
+
+def _voter(broadcaster: LiveBroadcaster, totals: dict, videos: int, rate: int, stop: threading.Event):
+    """Emite `rate` votos por segundo en ráfagas de 10 ms."""
+    rng = random.Random(1)
+    burst = max(1, rate // 100)
+    while not stop.is_set():
+        started = time.perf_counter()
+        for _ in range(burst):
+            video_id = rng.randrange(videos)
+            totals[video_id] += 1
+            broadcaster.on_event({"type": VOTE, "video_id": video_id, "owner_id": video_id})
+        stop.wait(max(0.0, 0.01 - (time.perf_counter() - started)))
+
+
+async def run(subscribers: int, rate: int, seconds: float, videos: int, tick: float) -> dict:
+    totals = defaultdict(int)
+    broadcaster = LiveBroadcaster(
+        load_totals=lambda ids: {i: totals[i] for i in ids},
+        load_top=lambda n: None,
+        max_subscribers=subscribers,
+    )
+    received = defaultdict(list)
+    counts = [0] * subscribers
+
+    async def subscriber(index: int, stream):
+        async for message in stream:
+            if message.startswith(b"id: "):
+                seq = int(message[4:message.index(b"\n")])
+                received[seq].append(time.perf_counter())
+                counts[index] += 1
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    streams = [broadcaster.stream() for _ in range(subscribers)]
+    tasks = [asyncio.create_task(subscriber(i, s)) for i, s in enumerate(streams)]
+    await asyncio.sleep(0.2)
+    per_subscriber = (tracemalloc.get_traced_memory()[0] - baseline) / subscribers
+    tracemalloc.stop()
+
+    stop = threading.Event()
+    voter = threading.Thread(target=_voter, args=(broadcaster, totals, videos, rate, stop))
+    published = {}
+    voter.start()
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        await broadcaster.tick()
+        published[broadcaster.seq] = time.perf_counter()
+        await asyncio.sleep(tick)
+    stop.set()
+    voter.join()
+    await asyncio.sleep(0.2)
+    elapsed = time.perf_counter() - started
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies = [max(received[seq]) - at for seq, at in published.items() if received.get(seq)]
+    return {
+        "votes": sum(totals.values()),
+        "messages": broadcaster.seq,
+        "msgs_per_sub_per_s": statistics.mean(counts) / elapsed,
+        "fanout_p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "fanout_max_ms": max(latencies) * 1000 if latencies else 0.0,
+        "bytes_per_subscriber": per_subscriber,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--votes-per-second", type=int, default=10_000)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--videos", type=int, default=500)
+    parser.add_argument("--tick", type=float, default=0.5)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.subscribers, args.votes_per_second, args.seconds, args.videos, args.tick))
+    print(
+        f"suscriptores={args.subscribers} votos={result['votes']} mensajes={result['messages']} "
+        f"msgs/suscriptor/s={result['msgs_per_sub_per_s']:.2f} "
+        f"difusión p50={result['fanout_p50_ms']:.1f}ms max={result['fanout_max_ms']:.1f}ms "
+        f"memoria/suscriptor={result['bytes_per_subscriber']:.0f}B"
+    )
+
+
+if __name__ == "__main__":
+    main()
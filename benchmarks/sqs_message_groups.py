@@ -0,0 +1,156 @@
+"""
+Benchmark de la estrategia de MessageGroupId sobre una cola FIFO simulada en memoria.
+
+Reproduce la semántica relevante de SQS FIFO: dentro de un grupo los mensajes se
+entregan en orden y no se entrega el siguiente hasta que el anterior se elimina.
+La simulación es de eventos discretos (tiempo simulado), así que es determinista
+y no depende de la carga de la máquina.
+
+Uso:
+    python -m benchmarks.sqs_message_groups --owners 20 --videos 200 --workers 1 2 4 8 10
+"""
+import argparse
+import heapq
+import random
+from collections import deque
+
+from src.utils.sqs_utils import message_group_id
+
+
+class InMemoryFifoQueue:
+    """Cola FIFO con grupos de mensajes al estilo SQS."""
+
+    def __init__(self):
+        self._groups: dict[str, deque] = {}
+        self._in_flight: set[str] = set()
+        self._seq = 0
+
+    def send(self, message: dict, group_id: str):
+        self._groups.setdefault(group_id, deque()).append((self._seq, message))
+        self._seq += 1
+
+    def receive(self):
+        """Retorna (grupo, mensaje) con el mensaje más antiguo entre los grupos desbloqueados, o None."""
+        candidates = [
+            (messages[0][0], group_id)
+            for group_id, messages in self._groups.items()
+            if group_id not in self._in_flight and messages
+        ]
+        if not candidates:
+            return None
+        _, group_id = min(candidates)
+        self._in_flight.add(group_id)
+        return group_id, self._groups[group_id].popleft()[1]
+
+    def delete(self, group_id: str):
+        self._in_flight.discard(group_id)
+        if not self._groups[group_id]:
+            del self._groups[group_id]
+
+    def __len__(self):
+        return sum(len(m) for m in self._groups.values())
+
+
+def generate_uploads(owners: int, videos: int, heavy_share: float = 0.5, seed: int = 42) -> list[dict]:
+    """Genera cargas donde un jugador concentra `heavy_share` de los videos y el resto se reparte."""
+    rng = random.Random(seed)
+    uploads = []
+    for video_id in range(1, videos + 1):
+        owner_id = 1 if rng.random() < heavy_share else rng.randint(2, owners)
+        uploads.append({"id": video_id, "owner_id": owner_id})
+    return uploads
+
+
+def jain_index(values: list[float]) -> float:
+    """Índice de equidad de Jain: 1.0 = perfectamente equitativo, 1/n = totalmente injusto."""
+    if not values:
+        return 1.0
+    total = sum(values)
+    squares = sum(v * v for v in values)
+    return (total * total) / (len(values) * squares) if squares else 1.0
+
+
+def simulate(uploads: list[dict], workers: int, strategy: str, shards: int = 8, service_time: float = 1.0) -> dict:
+    """
+    Simula `workers` consumidores procesando la cola con tiempo de servicio fijo.
+    Retorna throughput (videos por unidad de tiempo), makespan, la equidad entre jugadores
+    y cuántos videos de un mismo jugador terminaron fuera de orden.
+    """
+    queue = InMemoryFifoQueue()
+    for message in uploads:
+        queue.send(message, message_group_id(message, strategy=strategy, shards=shards))
+
+    now = 0.0
+    idle = workers
+    running = []  # heap de (fin, secuencia, grupo, mensaje)
+    seq = 0
+    completions: dict[int, list[float]] = {}
+    order_violations = 0
+    last_done: dict[int, int] = {}
+
+    while len(queue) or running:
+        while idle:
+            received = queue.receive()
+            if received is None:
+                break
+            group_id, message = received
+            heapq.heappush(running, (now + service_time, seq, group_id, message))
+            seq += 1
+            idle -= 1
+
+        now, _, group_id, message = heapq.heappop(running)
+        queue.delete(group_id)
+        idle += 1
+
+        owner_id = message["owner_id"]
+        completions.setdefault(owner_id, []).append(now)
+        if last_done.get(owner_id, 0) > message["id"]:
+            order_violations += 1
+        last_done[owner_id] = max(last_done.get(owner_id, 0), message["id"])
+
+    # Stretch por jugador: tiempo medio de finalización de sus videos dividido entre el
+    # que tendría si fuera el único jugador en la cola (procesados uno tras otro).
+    # La equidad es el índice de Jain sobre esos stretch.
+    stretch = []
+    for times in completions.values():
+        k = len(times)
+        ideal = service_time * (k + 1) / 2
+        stretch.append((sum(times) / k) / ideal)
+    return {
+        "strategy": strategy,
+        "workers": workers,
+        "makespan": now,
+        "throughput": len(uploads) / now if now else 0.0,
+        "fairness": jain_index(stretch),
+        "max_stretch": max(stretch),
+        "order_violations": order_violations,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--owners", type=int, default=20)
+    parser.add_argument("--videos", type=int, default=200)
+    parser.add_argument("--heavy-share", type=float, default=0.3)
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 10])
+    parser.add_argument("--strategies", nargs="+", default=["global", "owner", "sharded", "video"])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    uploads = generate_uploads(args.owners, args.videos, heavy_share=args.heavy_share, seed=args.seed)
+    print(
+        f"{'estrategia':<10} {'workers':>7} {'throughput':>10} {'makespan':>9} "
+        f"{'equidad':>8} {'stretch':>8} {'desorden':>8}"
+    )
+    for strategy in args.strategies:
+        for workers in args.workers:
+            r = simulate(uploads, workers, strategy, shards=args.shards)
+            print(
+                f"{r['strategy']:<10} {r['workers']:>7} {r['throughput']:>10.2f} "
+                f"{r['makespan']:>9.0f} {r['fairness']:>8.3f} {r['max_stretch']:>8.1f} {r['order_violations']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
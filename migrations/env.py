@@ -0,0 +1,40 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from src.db.database import URL_DATABASE, Base
+from src.models import db_models  # noqa: F401  (registra las tablas en Base.metadata)
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def _url() -> str:
+    # Las pruebas fijan sqlalchemy.url; en despliegue se usa DATABASE_URL
+    return config.get_main_option("sqlalchemy.url") or URL_DATABASE
+
+
+def run_migrations_online():
+    connectable = create_engine(_url())
+    with connectable.connect() as connection:
+        # Una transacción por revisión: los índices CONCURRENTLY usan autocommit_block()
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            transaction_per_migration=True,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+    connectable.dispose()
+
+
+if context.is_offline_mode():
+    # Las revisiones inspeccionan el esquema existente (bases creadas con create_all)
+    raise SystemExit("Las migraciones necesitan conexión a la base: --sql no está soportado.")
+run_migrations_online()
@@ -0,0 +1,68 @@
+"""Esquema inicial: usuarios, videos y votes
+
+Las bases creadas antes de las migraciones (create_all al importar src.main) ya tienen
+estas tablas; la revisión solo crea las que faltan, así que `alembic upgrade head`
+funciona igual sobre una base vacía y sobre una existente.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2025-11-20
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _missing(table: str) -> bool:
+    return not sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade():
+    if _missing("usuarios"):
+        op.create_table(
+            "usuarios",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("first_name", sa.String(), nullable=False),
+            sa.Column("last_name", sa.String(), nullable=False),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("password", sa.String(), nullable=False),
+            sa.Column("city", sa.String(), nullable=False),
+            sa.Column("country", sa.String(), nullable=False),
+        )
+        op.create_index("ix_usuarios_id", "usuarios", ["id"])
+        op.create_index("ix_usuarios_email", "usuarios", ["email"], unique=True)
+
+    if _missing("videos"):
+        op.create_table(
+            "videos",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("title", sa.String(), nullable=False),
+            sa.Column("filename", sa.String(), nullable=False),
+            sa.Column("status", sa.String(), nullable=True),
+            sa.Column("uploaded_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("owner_id", sa.Integer(), sa.ForeignKey("usuarios.id"), nullable=True),
+            sa.Column("votes_count", sa.Integer(), nullable=True),
+        )
+        op.create_index("ix_videos_id", "videos", ["id"])
+
+    if _missing("votes"):
+        op.create_table(
+            "votes",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("video_id", sa.Integer(), sa.ForeignKey("videos.id"), nullable=False),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("usuarios.id"), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index("ix_votes_id", "votes", ["id"])
+
+
+def downgrade():
+    op.drop_table("votes")
+    op.drop_table("videos")
+    op.drop_table("usuarios")
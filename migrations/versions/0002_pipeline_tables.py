@@ -0,0 +1,72 @@
+"""Deduplicación por contenido, outbox de SQS y buckets de votos por hora/día
+
+Como en el baseline, se omite lo que create_all ya haya creado en bases existentes.
+
+Revision ID: 0002_pipeline_tables
+Revises: 0001_baseline
+Create Date: 2025-11-20
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002_pipeline_tables"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def _missing(table: str) -> bool:
+    return not sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade():
+    video_columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("videos")}
+    if "content_sha256" not in video_columns:
+        op.add_column("videos", sa.Column("content_sha256", sa.String(length=64), nullable=True))
+        op.create_index("ix_videos_content_sha256", "videos", ["content_sha256"])
+
+    if _missing("outbox"):
+        op.create_table(
+            "outbox",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("video_id", sa.Integer(), sa.ForeignKey("videos.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("last_error", sa.String(), nullable=True),
+        )
+        op.create_index("ix_outbox_id", "outbox", ["id"])
+
+    if _missing("processed_artifacts"):
+        op.create_table(
+            "processed_artifacts",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("content_sha256", sa.String(length=64), nullable=False),
+            sa.Column("pipeline_fingerprint", sa.String(length=16), nullable=False),
+            sa.Column("processed_key", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.UniqueConstraint("content_sha256", "pipeline_fingerprint"),
+        )
+        op.create_index("ix_processed_artifacts_id", "processed_artifacts", ["id"])
+
+    if _missing("vote_buckets"):
+        op.create_table(
+            "vote_buckets",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("granularity", sa.String(length=4), nullable=False),
+            sa.Column("bucket_start", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("video_id", sa.Integer(), sa.ForeignKey("videos.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("owner_id", sa.Integer(), sa.ForeignKey("usuarios.id"), nullable=False),
+            sa.Column("votes", sa.Integer(), nullable=False),
+            # El prefijo (granularity, bucket_start) sirve el rango de las ventanas de trending
+            sa.UniqueConstraint("granularity", "bucket_start", "video_id", name="uq_vote_buckets_bucket_video"),
+        )
+
+
+def downgrade():
+    op.drop_table("vote_buckets")
+    op.drop_table("processed_artifacts")
+    op.drop_table("outbox")
+    op.drop_index("ix_videos_content_sha256", table_name="videos")
+    with op.batch_alter_table("videos") as batch:
+        batch.drop_column("content_sha256")
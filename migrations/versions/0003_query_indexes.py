@@ -0,0 +1,72 @@
+"""Índices de las consultas calientes y un voto por usuario y video
+
+- ix_videos_status_votes (status, votes_count, id): listado público por cursor
+  (WHERE status = 'processed' ORDER BY votes_count DESC, id DESC) y agregados del ranking.
+- ix_videos_owner_uploaded (owner_id, uploaded_at, id): "mis videos" por cursor.
+- ix_videos_status_processed (status, processed_at): sincronización del leaderboard con los
+  videos recién procesados. Reemplaza a ix_videos_processed_at (solo processed_at), que el
+  planificador descartaba a favor del prefijo status de ix_videos_status_votes.
+- uq_votes_video_user (video_id, user_id): ON CONFLICT del voto y búsqueda de votos por
+  video. Antes se eliminan los votos duplicados (la verificación previa al INSERT no
+  era atómica) y se recalcula votes_count de los videos afectados.
+
+En PostgreSQL los índices se crean CONCURRENTLY para no bloquear las escrituras.
+
+Revision ID: 0003_query_indexes
+Revises: 0002_pipeline_tables
+Create Date: 2025-11-20
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_query_indexes"
+down_revision = "0002_pipeline_tables"
+branch_labels = None
+depends_on = None
+
+VIDEO_INDEXES = {
+    "ix_videos_status_votes": ["status", "votes_count", "id"],
+    "ix_videos_owner_uploaded": ["owner_id", "uploaded_at", "id"],
+    "ix_videos_status_processed": ["status", "processed_at"],
+}
+
+
+def _unique_constraints(table: str) -> set[str]:
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_unique_constraints(table)}
+
+
+def upgrade():
+    if "uq_votes_video_user" not in _unique_constraints("votes"):
+        duplicated = [
+            row.video_id
+            for row in op.get_bind().execute(
+                sa.text("SELECT DISTINCT video_id FROM votes GROUP BY video_id, user_id HAVING count(*) > 1")
+            )
+        ]
+        if duplicated:
+            op.execute("DELETE FROM votes WHERE id NOT IN (SELECT min(id) FROM votes GROUP BY video_id, user_id)")
+            op.get_bind().execute(
+                sa.text(
+                    "UPDATE videos SET votes_count = "
+                    "(SELECT count(*) FROM votes WHERE votes.video_id = videos.id) "
+                    "WHERE id IN :ids"
+                ).bindparams(sa.bindparam("ids", expanding=True)),
+                {"ids": duplicated},
+            )
+        with op.batch_alter_table("votes") as batch:
+            batch.create_unique_constraint("uq_votes_video_user", ["video_id", "user_id"])
+
+    with op.get_context().autocommit_block():
+        for name, columns in VIDEO_INDEXES.items():
+            op.create_index(name, "videos", columns, if_not_exists=True, postgresql_concurrently=True)
+        # Creado por create_all en bases de desarrollo previas a las migraciones
+        op.drop_index("ix_videos_processed_at", table_name="videos", if_exists=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name in VIDEO_INDEXES:
+            op.drop_index(name, table_name="videos", if_exists=True, postgresql_concurrently=True)
+    with op.batch_alter_table("votes") as batch:
+        batch.drop_constraint("uq_votes_video_user", type_="unique")
@@ -0,0 +1,33 @@
+"""Contador de versión de los datos públicos
+
+Reemplaza las marcas de agua max(votes.id)/max(videos.id)/max(videos.processed_at),
+que no veían los incrementos de votes_count del buffer de escritura diferida ni los
+commits fuera de orden. Las filas se crean con el primer incremento de cada slot.
+Como en el baseline, se omite si create_all ya creó la tabla.
+
+Revision ID: 0004_data_versions
+Revises: 0003_query_indexes
+Create Date: 2025-11-24
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004_data_versions"
+down_revision = "0003_query_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("data_versions"):
+        return
+    op.create_table(
+        "data_versions",
+        sa.Column("slot", sa.Integer(), autoincrement=False, primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("data_versions")
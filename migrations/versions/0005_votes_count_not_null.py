@@ -0,0 +1,32 @@
+"""videos.votes_count NOT NULL DEFAULT 0
+
+El listado público pagina por (votes_count, id) con un cursor; una fila con
+votes_count NULL no cumple la comparación de tuplas y desaparecía de las páginas
+siguientes. Se rellenan los NULL con 0 en lugar de paginar sobre coalesce(), que
+dejaría sin uso a ix_videos_status_votes.
+
+Revision ID: 0005_votes_count_not_null
+Revises: 0004_data_versions
+Create Date: 2025-11-26
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_votes_count_not_null"
+down_revision = "0004_data_versions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("UPDATE videos SET votes_count = 0 WHERE votes_count IS NULL")
+    with op.batch_alter_table("videos") as batch:
+        batch.alter_column(
+            "votes_count", existing_type=sa.Integer(), nullable=False, server_default=sa.text("0")
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("videos") as batch:
+        batch.alter_column("votes_count", existing_type=sa.Integer(), nullable=True, server_default=None)
@@ -0,0 +1,29 @@
+"""Mensajes muertos del outbox
+
+Un mensaje que SQS rechaza siempre quedaba al frente de cada lote del relay. Tras
+OUTBOX_MAX_ATTEMPTS intentos se marca con dead_at y el relay deja de leerlo; la fila
+se conserva para revisarla y reenviarla a mano (UPDATE outbox SET dead_at = NULL).
+
+Revision ID: 0006_outbox_dead_letter
+Revises: 0005_votes_count_not_null
+Create Date: 2025-11-27
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006_outbox_dead_letter"
+down_revision = "0005_votes_count_not_null"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("outbox")}
+    if "dead_at" not in columns:
+        op.add_column("outbox", sa.Column("dead_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("outbox") as batch:
+        batch.drop_column("dead_at")
@@ -0,0 +1,125 @@
+import logging
+import os
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Cada instancia de la API abre hasta (DB_POOL_SIZE + DB_MAX_OVERFLOW) conexiones POR motor
+# (síncrono, async y réplica). Con N instancias el total debe quedar bajo max_connections
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+# Segundos tras los que una conexión se descarta (evita cortes de proxies / balanceadores)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+# Espera máxima por una conexión libre antes de fallar con TimeoutError
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+# Tras un fallo de la réplica, las lecturas van al primario durante este tiempo
+DB_REPLICA_RETRY_INTERVAL = float(os.getenv("DB_REPLICA_RETRY_INTERVAL", 30))
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Espera para obtener una conexión del pool (incluye abrir una nueva)",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Esperas por conexión que superaron DB_POOL_TIMEOUT", ["engine"])
+DB_POOL_IN_USE = Gauge("db_pool_in_use_connections", "Conexiones prestadas por el pool", ["engine"])
+DB_POOL_IDLE = Gauge("db_pool_idle_connections", "Conexiones abiertas y libres en el pool", ["engine"])
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow_connections", "Conexiones abiertas por encima de DB_POOL_SIZE", ["engine"])
+DB_REPLICA_FALLBACKS = Counter("db_replica_fallbacks_total", "Lecturas enviadas al primario por réplica caída")
+
+
+def instrumented_pool(pool_class: type[QueuePool], name: str) -> type[QueuePool]:
+    """Subclase del pool que mide la espera de cada checkout. El nombre queda en la
+    clase porque SQLAlchemy recrea el pool (dispose) a partir de ella."""
+
+    class InstrumentedPool(pool_class):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            except exc.TimeoutError:
+                DB_POOL_TIMEOUTS.labels(name).inc()
+                raise
+            finally:
+                DB_POOL_CHECKOUT_SECONDS.labels(name).observe(time.perf_counter() - started)
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    return InstrumentedPool
+
+
+def pool_options(url: str, name: str) -> dict:
+    """Argumentos de create_engine / create_async_engine según la configuración del pool."""
+    options = {"pool_pre_ping": True}
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # SQLite en memoria usa un pool de una conexión: tamaño y reciclaje no aplican
+        return options
+    pool_class = AsyncAdaptedQueuePool if parsed.get_dialect().is_async else QueuePool
+    return {
+        **options,
+        "poolclass": instrumented_pool(pool_class, name),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+
+
+def observe_pool(engine, name: str):
+    """Publica el uso del pool del motor (se lee al consultar /metrics)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    def stat(attr: str):
+        # engine.pool cambia tras dispose(): se resuelve en cada lectura
+        return lambda: getattr(sync_engine.pool, attr)() if isinstance(sync_engine.pool, QueuePool) else 0
+
+    DB_POOL_IN_USE.labels(name).set_function(stat("checkedout"))
+    DB_POOL_IDLE.labels(name).set_function(stat("checkedin"))
+    # overflow() es negativo mientras el pool no ha abierto pool_size conexiones
+    overflow = stat("overflow")
+    DB_POOL_OVERFLOW.labels(name).set_function(lambda: max(0, overflow()))
+
+
+class ReadReplica:
+    """
+    Sesiones de solo lectura sobre la réplica. Si no hay réplica configurada o no
+    responde, session() retorna None y la lectura va al primario; tras un fallo no se
+    vuelve a intentar durante `retry_interval` segundos para no sumar latencia a cada
+    petición. La réplica puede ir algunos segundos atrasada respecto al primario.
+    """
+
+    def __init__(self, sessions=None, retry_interval: float = DB_REPLICA_RETRY_INTERVAL):
+        self._sessions = sessions
+        self.retry_interval = retry_interval
+        self._down_until = 0.0
+
+    @property
+    def configured(self) -> bool:
+        return self._sessions is not None
+
+    @property
+    def available(self) -> bool:
+        return self.configured and time.monotonic() >= self._down_until
+
+    async def session(self):
+        if not self.configured:
+            return None
+        if not self.available:
+            DB_REPLICA_FALLBACKS.inc()
+            return None
+        session = self._sessions()
+        try:
+            # Toma la conexión ya (con pre_ping) para detectar la caída antes de la consulta
+            await session.connection()
+        except (exc.DBAPIError, exc.TimeoutError, OSError) as e:
+            await session.close()
+            self._down_until = time.monotonic() + self.retry_interval
+            DB_REPLICA_FALLBACKS.inc()
+            logger.warning(f"Réplica de lectura no disponible, se usa el primario: {e}")
+            return None
+        return session
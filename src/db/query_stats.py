@@ -0,0 +1,145 @@
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter as ShapeCounter
+from contextvars import ContextVar
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+# Cabeceras X-DB-* en las respuestas (solo para depurar: revelan detalles internos)
+SQL_DEBUG_HEADERS = os.getenv("SQL_DEBUG_HEADERS", "false").lower() == "true"
+# Sentencias más lentas que esto se registran con sus parámetros
+SQL_SLOW_QUERY_SECONDS = float(os.getenv("SQL_SLOW_QUERY_SECONDS", 0.2))
+# Veces que la misma sentencia (con otros parámetros) puede repetirse en una petición
+# antes de marcarla como N+1
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 5))
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "Sentencias SQL por petición", ["route"], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+)
+DB_SECONDS_PER_REQUEST = Histogram(
+    "db_seconds_per_request",
+    "Tiempo total en la BD por petición",
+    ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+DB_SLOW_QUERIES = Counter("db_slow_queries_total", "Sentencias más lentas que SQL_SLOW_QUERY_SECONDS")
+DB_N_PLUS_ONE = Counter("db_n_plus_one_requests_total", "Peticiones con una sentencia repetida (N+1)", ["route"])
+
+# Listas de marcadores (IN (?, ?, ?)) de distinto largo cuentan como la misma sentencia
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(\?|%\(\w+\)s|\$\d+)(\s*,\s*(\?|%\(\w+\)s|\$\d+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    return _PLACEHOLDER_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class RequestQueryStats:
+    """Sentencias ejecutadas durante una petición (desde el event loop o desde hilos del io_pool)."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = ShapeCounter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float):
+        shape = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.shapes[shape] += 1
+
+    def repeated(self) -> tuple[str, int] | None:
+        """La sentencia más repetida si alcanza SQL_N_PLUS_ONE_THRESHOLD."""
+        if not self.shapes:
+            return None
+        shape, times = self.shapes.most_common(1)[0]
+        return (shape, times) if times >= SQL_N_PLUS_ONE_THRESHOLD else None
+
+
+# Las sesiones async ejecutan en un greenlet que hereda el contexto de la petición
+_current: ContextVar[RequestQueryStats | None] = ContextVar("request_query_stats", default=None)
+
+
+def current_stats() -> RequestQueryStats | None:
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if elapsed >= SQL_SLOW_QUERY_SECONDS:
+        DB_SLOW_QUERIES.inc()
+        logger.warning(f"Sentencia lenta ({elapsed * 1000:.0f} ms): {statement} parámetros={parameters!r:.500}")
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    # La sentencia falló: after_cursor_execute no se ejecutará
+    started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if started:
+        started.pop()
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "sin_ruta"
+
+
+class QueryStatsMiddleware:
+    """
+    Middleware ASGI: cuenta las sentencias y el tiempo en la BD de cada petición, los
+    publica por ruta en Prometheus (y en cabeceras X-DB-* si SQL_DEBUG_HEADERS) y
+    advierte cuando una misma sentencia se repite SQL_N_PLUS_ONE_THRESHOLD veces.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and SQL_DEBUG_HEADERS:
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Queries"] = str(stats.count)
+                headers["X-DB-Time-Ms"] = f"{stats.seconds * 1000:.1f}"
+                repeated = stats.repeated()
+                if repeated:
+                    headers["X-DB-N-Plus-One"] = str(repeated[1])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            route = _route_label(scope)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.count)
+            DB_SECONDS_PER_REQUEST.labels(route).observe(stats.seconds)
+            repeated = stats.repeated()
+            if repeated:
+                DB_N_PLUS_ONE.labels(route).inc()
+                shape, times = repeated
+                logger.warning(f"Posible N+1 en {scope['method']} {route}: {times} veces {shape:.300}")
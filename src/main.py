@@ -1,14 +1,75 @@
-from fastapi import FastAPI
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from prometheus_client import make_asgi_app
 from src.routers.auth_router import auth_router
-from src.db.database import engine
-from src.models import db_models
+from src.db.database import async_engine, replica_async_engine
+from src.db.query_stats import QueryStatsMiddleware
 from src.routers import videos_router, public_router
+from src.utils.executors import PoolSaturatedError
+from src.utils.singleflight import SingleFlightTimeoutError
+from src.utils.outbox_relay import run_outbox_relay
+from src.utils.leaderboard import run_leaderboard_sync
+from src.utils.vote_buffer import VOTE_WRITE_BEHIND, run_vote_flusher
+from src.utils.trending import run_trending_compaction
+from src.utils.live_updates import run_live_updates
+from src.utils.events import event_bus
 
+# El relay del outbox puede correr dentro de la API o como proceso aparte
+OUTBOX_RELAY_IN_APP = os.getenv("OUTBOX_RELAY_IN_APP", "true").lower() == "true"
+# Sin el leaderboard en memoria, /rankings usa el agregado SQL en cada petición
+LEADERBOARD_IN_APP = os.getenv("LEADERBOARD_IN_APP", "true").lower() == "true"
+# Compactación de los buckets de votos (también: python -m src.utils.trending desde un cron)
+TRENDING_COMPACTION_IN_APP = os.getenv("TRENDING_COMPACTION_IN_APP", "true").lower() == "true"
+# Ticks del stream SSE /api/public/live
+LIVE_UPDATES_IN_APP = os.getenv("LIVE_UPDATES_IN_APP", "true").lower() == "true"
 
-# import models to create tables
-db_models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background_tasks = []
+    # Eventos de voto/procesamiento de otras instancias y del worker (invalida cachés)
+    event_bus.start()
+    if OUTBOX_RELAY_IN_APP:
+        background_tasks.append(asyncio.create_task(run_outbox_relay()))
+    if LEADERBOARD_IN_APP:
+        background_tasks.append(asyncio.create_task(run_leaderboard_sync()))
+    if VOTE_WRITE_BEHIND:
+        background_tasks.append(asyncio.create_task(run_vote_flusher()))
+    if TRENDING_COMPACTION_IN_APP:
+        background_tasks.append(asyncio.create_task(run_trending_compaction()))
+    if LIVE_UPDATES_IN_APP:
+        background_tasks.append(asyncio.create_task(run_live_updates()))
+    yield
+    for task in background_tasks:
+        task.cancel()
+    # Esperar la cancelación: el flusher de votos aplica lo pendiente al terminar
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    event_bus.stop()
+    await async_engine.dispose()
+    if replica_async_engine is not None:
+        await replica_async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Métricas Prometheus (pools, latencias, etc.)
+app.mount("/metrics", make_asgi_app())
+
+# Sentencias SQL y tiempo en la BD por petición (histogramas por ruta, detección de N+1)
+app.add_middleware(QueryStatsMiddleware)
+
+
+@app.exception_handler(PoolSaturatedError)
+@app.exception_handler(SingleFlightTimeoutError)
+async def pool_saturated_handler(request: Request, exc: Exception):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servidor ocupado, intente de nuevo en unos segundos."},
+        headers={"Retry-After": "5"},
+    )
 
 @app.get("/")
 async def root():
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Boolean, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from src.db.database import Base
 from sqlalchemy.orm import relationship
@@ -20,6 +20,14 @@ class Usuario(Base):
 
 class Video(Base):
     __tablename__ = "videos"
+    # Índices compuestos para la paginación por cursor (keyset) de los listados
+    __table_args__ = (
+        Index("ix_videos_status_votes", "status", "votes_count", "id"),
+        Index("ix_videos_owner_uploaded", "owner_id", "uploaded_at", "id"),
+        # Sincronización del leaderboard con las transiciones a "processed"
+        # (WHERE status = 'processed' AND processed_at >= :desde)
+        Index("ix_videos_status_processed", "status", "processed_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -28,10 +36,14 @@ class Video(Base):
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
     processed_at = Column(DateTime(timezone=True), nullable=True)
     owner_id = Column(Integer, ForeignKey("usuarios.id"))
-    votes_count = Column(Integer, default=0)
+    votes_count = Column(Integer, default=0, server_default="0", nullable=False)
+    content_sha256 = Column(String(64), nullable=True, index=True)
 
     owner = relationship("Usuario", back_populates="videos")
     votes = relationship("Vote", back_populates="video")
+    outbox_messages = relationship(
+        "OutboxMessage", back_populates="video", cascade="all, delete-orphan"
+    )
 
     def to_dict(self):
         return {
@@ -45,11 +57,14 @@ class Video(Base):
             else None,
             "owner_id": self.owner_id,
             "votes_count": self.votes_count,
+            "content_sha256": self.content_sha256,
         }
 
 
 class Vote(Base):
     __tablename__ = "votes"
+    # Un voto por usuario y video; el INSERT ... ON CONFLICT del voto depende de ella
+    __table_args__ = (UniqueConstraint("video_id", "user_id", name="uq_votes_video_user"),)
 
     id = Column(Integer, primary_key=True, index=True)
     video_id = Column(Integer, ForeignKey("videos.id"), nullable=False)
@@ -59,3 +74,66 @@ class Vote(Base):
 
     video = relationship("Video", back_populates="votes")
     user = relationship("Usuario", back_populates="votes")
+
+
+class OutboxMessage(Base):
+    """
+    Mensaje pendiente de encolar en SQS. Se inserta en la misma transacción que el
+    Video y lo envía el relay del outbox (src/utils/outbox_relay.py). Tras
+    OUTBOX_MAX_ATTEMPTS envíos rechazados queda con dead_at y el relay lo ignora.
+    """
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String, nullable=True)
+    dead_at = Column(DateTime(timezone=True), nullable=True)
+
+    video = relationship("Video", back_populates="outbox_messages")
+
+
+class ProcessedArtifact(Base):
+    """Índice de deduplicación: contenido original + parámetros del pipeline -> video procesado en S3."""
+    __tablename__ = "processed_artifacts"
+    __table_args__ = (UniqueConstraint("content_sha256", "pipeline_fingerprint"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_sha256 = Column(String(64), nullable=False)
+    pipeline_fingerprint = Column(String(16), nullable=False)
+    processed_key = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class VoteBucket(Base):
+    """
+    Votos por video en una hora ("hour") o un día ("day"). Los rankings por ventana de
+    tiempo suman unos pocos buckets en vez de recorrer la tabla votes; los buckets por
+    hora antiguos se compactan en buckets diarios (src/utils/trending.py).
+    """
+    __tablename__ = "vote_buckets"
+    # Clave del upsert por voto; su prefijo (granularity, bucket_start) sirve el rango de la ventana
+    __table_args__ = (
+        UniqueConstraint("granularity", "bucket_start", "video_id", name="uq_vote_buckets_bucket_video"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    granularity = Column(String(4), nullable=False)
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
+    # Desnormalizado desde videos.owner_id para agrupar por jugador sin join
+    owner_id = Column(Integer, ForeignKey("usuarios.id"), nullable=False)
+    votes = Column(Integer, nullable=False, default=0)
+
+
+class DataVersionSlot(Base):
+    """
+    Contador de cambios de los datos públicos, repartido en varias filas para no
+    serializar todas las escrituras en una sola. Cada transacción que cambia videos
+    públicos o sus votos incrementa una fila; la versión es la suma (src/utils/versioning.py).
+    """
+    __tablename__ = "data_versions"
+
+    slot = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(BigInteger, nullable=False, default=0)
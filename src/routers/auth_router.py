@@ -4,71 +4,93 @@ from src.db.database import get_db
 from src.models.db_models import Usuario
 from src.schemas.pydantic_schemas import UsuarioCreateSchema, UsuarioLoginSchema, UsuarioSchema, TokenData
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
-from passlib.context import CryptContext
+from src.utils.user_cache import CachedUser, user_cache, invalidate_user, recently_changed
+from src.utils.password_utils import hash_password, verify_password
+import os
 
 
 SECRET_KEY = "secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Si es true, get_current_user confía en el claim "uid" del token firmado
+# y no consulta la BD aunque el usuario no esté en la caché
+AUTH_TRUST_TOKEN_CLAIMS = os.getenv("AUTH_TRUST_TOKEN_CLAIMS", "false").lower() == "true"
+
 auth_router = APIRouter(tags=['Auth'])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='login')
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _find_user(db: Session, email: str):
+    return db.query(Usuario).filter(Usuario.email == email).first()
+
+
+def _save(db: Session, obj):
+    db.add(obj)
+    db.commit()
+    db.refresh(obj)
+    return obj
 
 
 @auth_router.post('/signup', response_model = UsuarioSchema, status_code=status.HTTP_201_CREATED)
-async def create_user(user: UsuarioCreateSchema, db: Session = Depends(get_db)):
+async def create_user(user: UsuarioCreateSchema, db: AsyncSession = Depends(get_db)):
 
     #Validate passwords
     if user.password1 != user.password2:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Las contraseñas no coinciden.')
     
-    #Validate unique email
-    db_user_username = db.query(Usuario).filter(Usuario.email == user.email).first()
+    #Validate unique email (sesión async: la espera de la BD no bloquea el event loop)
+    db_user_username = await db.run_sync(_find_user, user.email)
     if db_user_username:
         raise HTTPException(
             status_code = status.HTTP_400_BAD_REQUEST,
             detail = 'El correo electrónico ya se encuentra registrado.',
         )
     
-    #Hash password
-    #hashed_password = pwd_context.hash(user.password1)
+    #Hash password (bcrypt en el pool de hashing, fuera del event loop)
+    hashed_password = await hash_password(user.password1)
 
     #Create user    
     db_user = Usuario(
         first_name=user.first_name,
         last_name=user.last_name,
         email=user.email,
-        password=user.password1,
+        password=hashed_password,
         city=user.city,
         country=user.country
     )
 
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    return await db.run_sync(_save, db_user)
 
 
 @auth_router.post('/login', response_model = TokenData)
-async def login_for_access_token(user: UsuarioLoginSchema, db: Session = Depends(get_db)):
-    user_db = db.query(Usuario).filter(Usuario.email == user.email).first()
+async def login_for_access_token(user: UsuarioLoginSchema, db: AsyncSession = Depends(get_db)):
+    user_db = await db.run_sync(_find_user, user.email)
     if not user_db:
         raise HTTPException(
             status_code = status.HTTP_400_BAD_REQUEST, detail = 'El usuario no es correcto.')
 
-    if user.password != user_db.password:
+    valid, new_hash = await verify_password(user.password, user_db.password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail = 'La contraseña no es correcta.')
 
+    # Rehash transparente si cambió el costo de bcrypt o la contraseña era legada
+    if new_hash:
+        user_db.password = new_hash
+        await db.commit()
+        invalidate_user(user_db.email)
+
     # registrar_log.delay(user.nombre, datetime.now(timezone.utc))
     expires_delta = timedelta(minutes = ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token_data={'sub': user_db.email,
+                       'uid': user_db.id,
                        'exp': datetime.now(timezone.utc) + expires_delta}
     return {'access_token': jwt.encode(access_token_data, SECRET_KEY, algorithm = ALGORITHM), 'token_type': 'bearer'}
 
@@ -91,11 +113,15 @@ def verify_token(token: str = Depends(oauth2_scheme)):
             detail = 'Credenciales de autenticación inválidas.',
             headers = {'WWW-Authenticate': 'Bearer'})
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Decodifica el token JWT y devuelve el usuario autenticado."""
+    """
+    Decodifica el token JWT y devuelve el usuario autenticado.
+    El usuario se resuelve desde la caché en memoria (user_cache) y solo
+    se consulta la BD cuando no está en caché o la entrada expiró.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Credenciales de autenticación inválidas.",
@@ -110,8 +136,18 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(Usuario).filter(Usuario.email == username).first()
+    cached = user_cache.get(username)
+    if cached is not None:
+        return cached
+
+    # Tras un cambio del usuario los claims de sus tokens pueden estar desactualizados
+    if AUTH_TRUST_TOKEN_CLAIMS and payload.get("uid") is not None and not recently_changed(username):
+        return CachedUser(id=payload["uid"], email=username)
+
+    user = await db.run_sync(_find_user, username)
     if user is None:
         raise credentials_exception
 
-    return user
\ No newline at end of file
+    cached = CachedUser.from_user(user)
+    user_cache.set(username, cached)
+    return cached
\ No newline at end of file
@@ -1,35 +1,80 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timezone
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
-from src.db.database import get_db
-from src.models.db_models import Video, Usuario, Vote
+from src.db.database import get_db, get_read_db
+from src.models.db_models import Video, Usuario
 from src.routers.auth_router import get_current_user
 import src.schemas.pydantic_schemas as schemas
+from src.utils.vote_utils import cast_vote, vote_rejection_reason
+from src.utils.vote_buffer import VOTE_WRITE_BEHIND, vote_buffer
+from src.utils.leaderboard import leaderboard, player_totals_query, region_key
+from src.utils.versioning import PUBLIC_CACHE_CONTROL, conditional_response, data_version, make_etag
+from src.utils.pagination import NEXT_CURSOR_HEADER, PAGE_SIZE_DEFAULT, clamp_page_size, keyset_page
+from src.utils.events import VOTE, publish_event
+from src.utils.response_cache import cached_json
+from src.utils.trending import hour_start, trending_page
+from src.utils.live_updates import live_broadcaster
 
 router = APIRouter(prefix="/api/public", tags=["Public"])
 
+# Serialización de los listados cacheados (mismo esquema que response_model)
+_public_videos_adapter = TypeAdapter(list[schemas.VideoPublicOut])
+_rankings_adapter = TypeAdapter(list[schemas.RankingOut])
+_trending_adapter = TypeAdapter(list[schemas.TrendingOut])
+
 # Endpoint 7: Listar videos públicos disponibles
 @router.get(
     "/videos",
     response_model=list[schemas.VideoPublicOut],
     summary="Lista de videos públicos disponibles para votación",
 )
-def list_public_videos(db: Session = Depends(get_db)):
+async def list_public_videos(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    cursor: str | None = None,
+    limit: int = PAGE_SIZE_DEFAULT,
+):
 
-    videos = (
-        db.query(Video)
-        .filter(Video.status == "processed")
-        .order_by(desc(Video.votes_count))
-        .all()
+    # Si el cliente ya tiene esta versión se responde 304 sin ejecutar la consulta
+    limit = clamp_page_size(limit)
+    etag = make_etag("public-videos", await db.run_sync(data_version.current), cursor, limit)
+    not_modified = conditional_response(request, response, "public_videos", etag, PUBLIC_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+
+    return await cached_json(
+        "public_videos", etag, dict(response.headers), lambda: db.run_sync(_public_videos_page, cursor, limit)
     )
 
-    if not videos:
+
+def _public_videos_page(db: Session, cursor: str | None, limit: int):
+    """Consulta y serializa una página del listado público; retorna (cuerpo, cabeceras)."""
+    # Paginación por cursor sobre (votes_count, id); ver ix_videos_status_votes
+    videos, next_cursor = keyset_page(
+        db.query(Video).filter(Video.status == "processed"),
+        Video.votes_count,
+        Video.id,
+        cursor,
+        limit,
+    )
+
+    if not videos and not cursor:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No hay videos públicos disponibles.",
         )
 
-    return videos
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    return _public_videos_adapter.dump_json(
+        _public_videos_adapter.validate_python(videos, from_attributes=True)
+    ), headers
 
 
 # Endpoint 8: Emitir un voto por un video público
@@ -38,46 +83,52 @@ def list_public_videos(db: Session = Depends(get_db)):
     status_code=status.HTTP_200_OK,
     summary="Emite un voto por un video público (1 voto por usuario)",
 )
-def vote_public_video(
+async def vote_public_video(
     video_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Usuario = Depends(get_current_user),
 ):
 
-    video = db.query(Video).filter(Video.id == video_id, Video.status == "processed").first()
-    if not video:
+    video, owner = await db.run_sync(_register_vote, video_id, current_user.id)
+    publish_event(VOTE, video_id=video.id, owner_id=video.owner_id, owner=owner)
+    pending = vote_buffer.add(video.id) if VOTE_WRITE_BEHIND else 0
+
+    return {
+        "message": "Voto registrado correctamente.",
+        "video_id": video.id,
+        "total_votos": (video.votes_count or 0) + pending,
+        "votos_pendientes": pending,
+    }
+
+
+def _register_vote(db: Session, video_id: int, user_id: int):
+    """Registra el voto; retorna la fila (id, votes_count, owner_id) y los datos del dueño para el evento."""
+    # Voto + incrementos (votes_count y bucket de la hora) en una sola sentencia; la
+    # restricción única evita votos dobles. Con escritura diferida solo se inserta el voto
+    # y los incrementos los aplica el flush del buffer.
+    video = cast_vote(db, video_id, user_id, increment=not VOTE_WRITE_BEHIND)
+    if video is None:
+        db.rollback()
+        if vote_rejection_reason(db, video_id) == "already_voted":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Ya has votado por este video.",
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"El video con id={video_id} no existe o no es público.",
         )
-
-    # Validar si el usuario ya votó este video
-    existing_vote = (
-        db.query(Vote)
-        .filter(Vote.video_id == video_id, Vote.user_id == current_user.id)
-        .first()
-    )
-    if existing_vote:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Ya has votado por este video.",
-        )
-
-    # Registrar el voto
-    vote = Vote(video_id=video_id, user_id=current_user.id)
-    db.add(vote)
-
-    # Incrementar contador de votos
-    video.votes_count = (video.votes_count or 0) + 1
-
     db.commit()
-    db.refresh(video)
 
-    return {
-        "message": "Voto registrado correctamente.",
-        "video_id": video.id,
-        "total_votos": video.votes_count,
-    }
+    # El leaderboard (global y regional) se actualiza al recibir el evento, aquí y en las
+    # demás instancias; si el dueño aún no figura, el evento lleva su nombre y región
+    owner = None
+    if leaderboard.ready and video.owner_id not in leaderboard:
+        name, country, city = (
+            db.query(Usuario.first_name, Usuario.country, Usuario.city).filter(Usuario.id == video.owner_id).one()
+        )
+        owner = {"name": name, "country": country, "city": city}
+    return video, owner
 
 
 # Endpoint 9: Mostrar ranking de jugadores por votos acumulados
@@ -86,33 +137,160 @@ def vote_public_video(
     response_model=list[schemas.RankingOut],
     summary="Muestra el ranking actual de los jugadores por votos acumulados",
 )
-def get_rankings(
-    db: Session = Depends(get_db),
+async def get_rankings(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
     limit: int = 10,
+    country: str | None = None,
+    city: str | None = None,
 ):
 
-    rankings = (
-        db.query(
-            Usuario.first_name.label("jugador"),
-            func.coalesce(func.sum(Video.votes_count), 0).label("votos_acumulados"),
+    if city is not None and country is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Para filtrar por ciudad debes indicar también el país.",
         )
-        .join(Video, Video.owner_id == Usuario.id)
-        .filter(Video.status == "processed")
-        .group_by(Usuario.id) 
-        .order_by(desc(func.coalesce(func.sum(Video.votes_count), 0)))
-        .offset(skip)
-        .limit(limit)
-        .all()
+
+    # Servido desde el leaderboard en memoria, el ETag sigue su versión y no la de la BD
+    from_leaderboard = leaderboard.ready
+    version = leaderboard.etag_version() if from_leaderboard else await db.run_sync(data_version.current)
+    etag = make_etag("rankings", version, skip, limit, region_key(country, city) if country else "")
+    not_modified = conditional_response(request, response, "rankings", etag, PUBLIC_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+
+    return await cached_json(
+        "rankings",
+        etag,
+        dict(response.headers),
+        lambda: db.run_sync(_rankings_page, skip, limit, country, city, from_leaderboard),
     )
 
+
+def _rankings_page(
+    db: Session,
+    skip: int,
+    limit: int,
+    country: str | None = None,
+    city: str | None = None,
+    from_leaderboard: bool = False,
+):
+    """Calcula y serializa una página del ranking (global o regional); retorna (cuerpo, cabeceras)."""
+    # Los leaderboards en memoria (global, por país y por ciudad) responden en O(log n);
+    # el agregado SQL queda como respaldo mientras se construyen (arranque) o si la
+    # sincronización está deshabilitada
+    if from_leaderboard:
+        rankings = leaderboard.top(skip, limit, country, city)
+    else:
+        query, total = player_totals_query(db, country, city)
+        rankings = [
+            {"jugador": r.jugador, "votos_acumulados": r.votos_acumulados}
+            for r in query.order_by(desc(total), Usuario.id).offset(skip).limit(limit).all()
+        ]
+
     if not rankings:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No hay datos de ranking disponibles.",
         )
 
-    return [
-        {"jugador": r.jugador, "votos_acumulados": r.votos_acumulados}
-        for r in rankings
-    ]
\ No newline at end of file
+    return _rankings_adapter.dump_json(_rankings_adapter.validate_python(rankings)), {}
+
+
+@router.get(
+    "/rankings/trending",
+    response_model=list[schemas.TrendingOut],
+    summary="Muestra los jugadores con más votos en las últimas 24 horas o 7 días",
+)
+async def get_trending_rankings(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    window: Literal["day", "week"] = "day",
+    skip: int = 0,
+    limit: int = 10,
+):
+
+    # La ventana se desliza cada hora aunque no haya votos nuevos
+    now = datetime.now(timezone.utc)
+    etag = make_etag("trending", await db.run_sync(data_version.current), hour_start(now), window, skip, limit)
+    not_modified = conditional_response(request, response, "trending", etag, PUBLIC_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+
+    async def build():
+        # Solo se leen los buckets de la ventana, nunca la tabla votes
+        rankings = await db.run_sync(trending_page, window, skip, limit, now)
+        return _trending_adapter.dump_json(_trending_adapter.validate_python(rankings)), {}
+
+    return await cached_json("trending", etag, dict(response.headers), build)
+
+
+@router.get(
+    "/rankings/me",
+    response_model=schemas.RankingPositionOut,
+    summary="Muestra la posición del usuario autenticado en el ranking",
+)
+async def get_my_ranking(
+    db: AsyncSession = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user),
+):
+
+    if leaderboard.ready:
+        position = leaderboard.rank(current_user.id)
+    else:
+        position = await db.run_sync(_sql_rank, current_user.id)
+
+    if position is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Aún no tienes videos procesados en el ranking.",
+        )
+
+    return position
+
+
+def _sql_rank(db: Session, player_id: int):
+    """Posición del jugador con el agregado SQL (mismo desempate que el leaderboard)."""
+    query, _ = player_totals_query(db)
+    totals = query.subquery()
+    mine = db.query(totals).filter(totals.c.id == player_id).first()
+    if mine is None:
+        return None
+    ahead = (
+        db.query(func.count())
+        .select_from(totals)
+        .filter(
+            (totals.c.votos_acumulados > mine.votos_acumulados)
+            | ((totals.c.votos_acumulados == mine.votos_acumulados) & (totals.c.id < player_id))
+        )
+        .scalar()
+    )
+    return {
+        "jugador": mine.jugador,
+        "votos_acumulados": mine.votos_acumulados,
+        "posicion": ahead + 1,
+    }
+
+
+@router.get(
+    "/live",
+    summary="Cambios en vivo (SSE): votos de los videos y posiciones del ranking",
+)
+async def live_updates(request: Request):
+
+    # En vez de sondear /videos y /rankings: un mensaje por tick con los totales de los
+    # videos votados y las posiciones del top que cambiaron
+    if not live_broadcaster.has_capacity():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Demasiadas conexiones en vivo, intente de nuevo en unos segundos.",
+            headers={"Retry-After": "5"},
+        )
+    return StreamingResponse(
+        live_broadcaster.stream(request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,20 +1,42 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status, Form
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status, Form, Header, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import logging
-from src.db.database import get_db
+from src.db.database import get_db, get_read_db
 from src.routers.auth_router import get_current_user
-from src.models.db_models import Video, Usuario
-from src.utils.sqs_utils import send_to_sqs
+from src.models.db_models import Video, Usuario, OutboxMessage
+from src.utils.executors import probe_pool, io_pool
+from src.utils.mp4_utils import Mp4HeaderParser, probe_mp4_bytes, MAX_MOOV_BYTES
+from src.utils import upload_sessions
+from src.utils.dedup_utils import file_sha256, find_processed_artifact
+from src.utils.versioning import PRIVATE_CACHE_CONTROL, bump_data_version, conditional_response, make_etag
+from src.utils.events import PROCESSED, publish_event
+from src.utils.pagination import PAGE_SIZE_DEFAULT, clamp_page_size, keyset_page, set_next_cursor
+from datetime import datetime, timezone
 import src.schemas.pydantic_schemas as schemas
 from uuid import uuid4
 import aiofiles
 from pymediainfo import MediaInfo
 from pathlib import Path
+import base64
+import hashlib
+import math
 import sys
 import os
 
 # 🔹 Import utilidades centralizadas para S3
-from src.utils.s3_utils import upload_to_s3, delete_from_s3, BUCKET_NAME
+from src.utils.s3_utils import (
+    upload_to_s3,
+    download_from_s3,
+    delete_from_s3,
+    create_multipart_upload,
+    presign_upload_part,
+    complete_multipart_upload,
+    abort_multipart_upload,
+    head_object,
+    download_range_from_s3,
+    BUCKET_NAME,
+)
 
 router = APIRouter(prefix="/api/videos", tags=["Videos"])
 
@@ -28,6 +50,14 @@ logger.addHandler(console_handler)
 MAX_BYTES = 100 * 1024 * 1024
 MIN_T, MAX_T = 20, 60
 
+# Tamaño de bloque para leer el archivo subido (limita la memoria por petición)
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+
+# Carga multiparte directa a S3 (el mínimo de S3 por parte es 5 MB, salvo la última)
+MULTIPART_PART_SIZE = int(os.getenv("MULTIPART_PART_SIZE", 10 * 1024 * 1024))
+PRESIGNED_URL_EXPIRATION = int(os.getenv("PRESIGNED_URL_EXPIRATION", 3600))
+S3_PROBE_BYTES = int(os.getenv("S3_PROBE_BYTES", 2 * 1024 * 1024))
+
 # Región y URL base para construir los links públicos
 S3_REGION = os.getenv("AWS_DEFAULT_REGION", "us-east-1")
 S3_BASE_URL = f"https://{BUCKET_NAME}.s3.{S3_REGION}.amazonaws.com"
@@ -48,6 +78,126 @@ def _video_info(p: Path):
     return 0.0, 0, 0
 
 
+def _check_video_metadata(dur: float, width: int, height: int):
+    """Valida duración y resolución del video; lanza HTTPException 400 si no cumple."""
+    if dur <= 0.0:
+        raise HTTPException(status_code=400, detail="No se pudo determinar la duración del video.")
+    if not (MIN_T <= dur <= MAX_T):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Duración inválida: {dur:.1f}s (debe estar entre {MIN_T}-{MAX_T}s).",
+        )
+    if height < 1080 and width < 1920:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Resolución demasiado baja: {width}x{height} (mínimo 1920x1080).",
+        )
+
+
+def _validate_video_file(p: Path):
+    """Valida un archivo completo en disco usando MediaInfo."""
+    _check_video_metadata(*_video_info(p))
+
+
+async def _probe_video_file(p: Path):
+    """
+    Valida un archivo completo en disco usando MediaInfo en el pool de inspección.
+    Del pool solo vuelven los metadatos: con PROBE_POOL_KIND=process una HTTPException
+    lanzada en el proceso hijo no se puede deserializar y deja el pool inutilizable.
+    """
+    _check_video_metadata(*await probe_pool.run(_video_info, p))
+
+
+def _register_video(db: Session, title: str, s3_key: str, owner_id: int, content_sha256: str | None = None):
+    """
+    Registra el video en BD con estado inicial junto con su mensaje de outbox,
+    en la misma transacción. El relay del outbox lo encola en SQS después,
+    así que la petición no depende de la disponibilidad de SQS.
+    """
+    new_video = Video(title=title, filename=s3_key, owner_id=owner_id, content_sha256=content_sha256)
+    new_video.outbox_messages.append(OutboxMessage())
+    db.add(new_video)
+    db.commit()
+    db.refresh(new_video)
+
+    logger.info(f"Video {new_video.id} registrado; procesamiento pendiente en el outbox.")
+    return {
+        "message": "Video subido correctamente. Procesamiento en curso.",
+        "task_id": new_video.id,
+    }
+
+
+def _register_duplicate_video(db: Session, title: str, processed_key: str, owner_id: int, content_sha256: str):
+    """Registra un video cuyo contenido ya fue procesado: apunta al resultado existente sin encolar nada."""
+    new_video = Video(
+        title=title,
+        filename=processed_key,
+        owner_id=owner_id,
+        content_sha256=content_sha256,
+        status="processed",
+        processed_at=datetime.now(timezone.utc),
+    )
+    db.add(new_video)
+    db.flush()
+    # Aparece en el listado público en la misma transacción
+    bump_data_version(db, new_video.id)
+    db.commit()
+    db.refresh(new_video)
+    publish_event(PROCESSED, video_id=new_video.id, owner_id=owner_id)
+
+    logger.info(f"Video {new_video.id} duplicado de {content_sha256[:12]}; se reutiliza {processed_key}.")
+    return {
+        "message": "Video subido correctamente. El contenido ya estaba procesado.",
+        "task_id": new_video.id,
+    }
+
+
+async def _register_upload(db: AsyncSession, title: str, local_path: Path, s3_key: str, owner_id: int, content_sha256: str):
+    """
+    Registra un archivo ya validado: si su contenido ya se procesó reutiliza el resultado;
+    si no, lo sube a S3 y lo deja en el outbox para procesarlo.
+    """
+    processed_key = await db.run_sync(find_processed_artifact, content_sha256)
+    if processed_key:
+        return await db.run_sync(_register_duplicate_video, title, processed_key, owner_id, content_sha256)
+
+    if not await io_pool.run(upload_to_s3, local_path, s3_key):
+        raise HTTPException(status_code=500, detail="Error subiendo archivo a S3")
+    return await db.run_sync(_register_video, title, s3_key, owner_id, content_sha256)
+
+
+def _get_video(db: Session, video_id: int):
+    return db.query(Video).filter(Video.id == video_id).first()
+
+
+def _delete_video(db: Session, video: Video):
+    db.delete(video)
+    db.commit()
+
+
+async def _stream_to_disk(video_file: UploadFile, dest: Path, header_parser: Mp4HeaderParser | None = None):
+    """
+    Copia el archivo subido a disco por bloques de UPLOAD_CHUNK_SIZE.
+    Aborta en cuanto se supera MAX_BYTES y calcula el SHA-256 sobre la marcha.
+    Si se recibe un header_parser, valida duración y resolución apenas aparece
+    la caja moov, sin esperar al resto del archivo.
+    Retorna (tamaño en bytes, sha256 en hexadecimal).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    async with aiofiles.open(dest, "wb") as out_f:
+        while chunk := await video_file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_BYTES:
+                raise HTTPException(status_code=400, detail="El archivo excede el límite de 100 MB")
+            if header_parser is not None and not header_parser.done:
+                if header_parser.feed(chunk) is not None:
+                    _check_video_metadata(*header_parser.info)
+            digest.update(chunk)
+            await out_f.write(chunk)
+    return size, digest.hexdigest()
+
+
 # =======================================================
 # ENDPOINTS
 # =======================================================
@@ -60,7 +210,7 @@ def _video_info(p: Path):
 async def upload_video(
     title: str = Form(...),
     video_file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Usuario = Depends(get_current_user),
 ):
     logger.info(f"Subiendo archivo: {video_file.filename}")
@@ -70,81 +220,411 @@ async def upload_video(
     if ext != ".mp4":
         raise HTTPException(status_code=400, detail="Solo se permiten archivos MP4")
 
-    # Validar tamaño máximo
-    contents = await video_file.read()
-    if len(contents) > MAX_BYTES:
-        raise HTTPException(status_code=400, detail="El archivo excede el límite de 100 MB")
-    await video_file.seek(0)
-
     # Crear nombre único temporal
     unique_name = f"{uuid4().hex}{ext}"
     temp_path = Path(f"videos/unprocessed-videos/{unique_name}")
 
-    # Guardar temporalmente para validación
+    # Guardar en disco por bloques, validando tamaño y cabecera MP4 mientras llega
+    header_parser = Mp4HeaderParser()
     try:
-        async with aiofiles.open(temp_path, "wb") as out_f:
-            await out_f.write(contents)
+        size, checksum = await _stream_to_disk(video_file, temp_path, header_parser)
+    except HTTPException:
+        temp_path.unlink(missing_ok=True)
+        raise
     except Exception as e:
+        temp_path.unlink(missing_ok=True)
         raise HTTPException(status_code=500, detail=f"Error guardando archivo temporal: {e}")
-
-    # Validar metadatos
-    dur, width, height = _video_info(temp_path)
-    if dur <= 0.0:
+    logger.info(f"Archivo recibido: {size} bytes (sha256={checksum})")
+
+    # Si la cabecera no se pudo validar durante la carga (moov al final o estructura
+    # no reconocida) se usa MediaInfo, que es bloqueante: corre en el pool de inspección
+    if header_parser.info is None:
+        try:
+            await _probe_video_file(temp_path)
+        except HTTPException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+    # Reutilizar el resultado si el contenido ya se procesó; si no, subir a S3 y encolar
+    s3_key = f"unprocessed-videos/{unique_name}"
+    try:
+        return await _register_upload(db, title, temp_path, s3_key, current_user.id, checksum)
+    finally:
         temp_path.unlink(missing_ok=True)
-        raise HTTPException(status_code=400, detail="No se pudo determinar la duración del video.")
-    if not (MIN_T <= dur <= MAX_T):
+
+
+@router.post(
+    "/multipart-uploads",
+    status_code=201,
+    response_model=schemas.MultipartUploadOut,
+    summary="Inicia una carga multiparte directa a S3 y retorna las URLs prefirmadas de cada parte.",
+)
+def create_multipart_upload_session(
+    payload: schemas.MultipartUploadCreate,
+    current_user: Usuario = Depends(get_current_user),
+):
+    if Path(payload.filename).suffix.lower() != ".mp4":
+        raise HTTPException(status_code=400, detail="Solo se permiten archivos MP4")
+    if payload.size <= 0 or payload.size > MAX_BYTES:
+        raise HTTPException(status_code=400, detail="El archivo excede el límite de 100 MB")
+
+    s3_key = f"{_multipart_prefix(current_user.id)}{uuid4().hex}.mp4"
+    upload_id = create_multipart_upload(s3_key, metadata={"owner-id": str(current_user.id)})
+    if not upload_id:
+        raise HTTPException(status_code=500, detail="Error iniciando la carga en S3")
+
+    total_parts = math.ceil(payload.size / MULTIPART_PART_SIZE)
+    try:
+        parts = [
+            {
+                "part_number": n,
+                "url": presign_upload_part(s3_key, upload_id, n, PRESIGNED_URL_EXPIRATION),
+            }
+            for n in range(1, total_parts + 1)
+        ]
+    except Exception:
+        abort_multipart_upload(s3_key, upload_id)
+        raise
+    return {"upload_id": upload_id, "key": s3_key, "part_size": MULTIPART_PART_SIZE, "parts": parts}
+
+
+def _multipart_prefix(owner_id: int) -> str:
+    # El dueño va en la clave: se verifica antes de completar o cancelar la carga en S3
+    return f"unprocessed-videos/{owner_id}-"
+
+
+def _check_multipart_owner(key: str, owner_id: int):
+    if not key.startswith("unprocessed-videos/"):
+        raise HTTPException(status_code=400, detail="Carga multiparte inválida.")
+    if not key.startswith(_multipart_prefix(owner_id)):
+        raise HTTPException(status_code=403, detail="No tienes permiso para acceder a esta carga.")
+
+
+@router.post(
+    "/multipart-uploads/complete",
+    status_code=201,
+    summary="Completa una carga multiparte, valida el video y encola su procesamiento.",
+)
+async def complete_multipart_upload_session(
+    payload: schemas.MultipartUploadComplete,
+    db: AsyncSession = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user),
+):
+    # Las llamadas a S3 y la validación son bloqueantes: corren en el pool de E/S
+    await io_pool.run(_finish_multipart_upload, payload, current_user.id)
+    try:
+        return await db.run_sync(_register_video, payload.title, payload.key, current_user.id)
+    except Exception:
+        # Sin registro en la BD el objeto quedaría huérfano en el bucket
+        await io_pool.run(delete_from_s3, payload.key)
+        raise
+
+
+def _finish_multipart_upload(payload: schemas.MultipartUploadComplete, owner_id: int):
+    """
+    Verifica el dueño, completa la carga en S3 y valida tamaño y metadatos del video; si no
+    es válido lo borra. Si S3 rechaza la carga se cancela para liberar las partes subidas.
+    """
+    _check_multipart_owner(payload.key, owner_id)
+    if not payload.parts:
+        abort_multipart_upload(payload.key, payload.upload_id)
+        raise HTTPException(status_code=400, detail="Carga multiparte inválida.")
+
+    parts = [
+        {"PartNumber": p.part_number, "ETag": p.etag}
+        for p in sorted(payload.parts, key=lambda p: p.part_number)
+    ]
+    if not complete_multipart_upload(payload.key, payload.upload_id, parts):
+        abort_multipart_upload(payload.key, payload.upload_id)
+        raise HTTPException(status_code=400, detail="No se pudo completar la carga multiparte; inicia una nueva carga.")
+
+    head = head_object(payload.key)
+    if head is None:
+        raise HTTPException(status_code=500, detail="Error consultando el archivo en S3")
+    if head.get("Metadata", {}).get("owner-id") != str(owner_id):
+        raise HTTPException(status_code=403, detail="No tienes permiso para completar esta carga.")
+    if head["ContentLength"] > MAX_BYTES:
+        delete_from_s3(payload.key)
+        raise HTTPException(status_code=400, detail="El archivo excede el límite de 100 MB")
+
+    # Validar metadatos a partir de la cabecera del archivo, sin descargarlo completo
+    temp_path = Path(f"videos/unprocessed-videos/{Path(payload.key).name}")
+    try:
+        if not download_range_from_s3(payload.key, temp_path, S3_PROBE_BYTES):
+            raise HTTPException(status_code=500, detail="Error descargando el archivo desde S3")
+        header_info = probe_mp4_bytes(temp_path.read_bytes())
+        if header_info is not None:
+            _check_video_metadata(*header_info)
+        else:
+            # El átomo moov está al final del archivo: se requiere el archivo completo
+            if head["ContentLength"] > S3_PROBE_BYTES:
+                download_from_s3(payload.key, temp_path)
+            _validate_video_file(temp_path)
+    except HTTPException as e:
+        if e.status_code == 400:
+            delete_from_s3(payload.key)
+        raise
+    finally:
         temp_path.unlink(missing_ok=True)
+
+
+@router.delete(
+    "/multipart-uploads/{upload_id}",
+    status_code=status.HTTP_200_OK,
+    summary="Cancela una carga multiparte y libera las partes ya subidas a S3.",
+)
+async def abort_multipart_upload_session(
+    upload_id: str,
+    key: str,
+    current_user: Usuario = Depends(get_current_user),
+):
+    _check_multipart_owner(key, current_user.id)
+    if not await io_pool.run(abort_multipart_upload, key, upload_id):
+        raise HTTPException(status_code=404, detail="La carga multiparte no existe o ya finalizó.")
+    return {"message": "Carga cancelada.", "upload_id": upload_id}
+
+
+# =======================================================
+# CARGA REANUDABLE POR BLOQUES
+# =======================================================
+def _get_upload_session(upload_id: str, current_user: Usuario) -> dict:
+    session = upload_sessions.load_session(upload_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="La sesión de carga no existe o expiró.")
+    if session["owner_id"] != current_user.id:
+        raise HTTPException(status_code=403, detail="No tienes permiso para acceder a esta carga.")
+    return session
+
+
+def _session_out(session: dict) -> dict:
+    return {
+        "upload_id": session["upload_id"],
+        "offset": session["offset"],
+        "size": session["size"],
+        "expires_at": datetime.fromtimestamp(session["expires_at"], tz=timezone.utc),
+    }
+
+
+def _probe_session_header(path: Path, length: int):
+    """Inspecciona la cabecera MP4 de los primeros `length` bytes recibidos."""
+    parser = Mp4HeaderParser()
+    with open(path, "rb") as f:
+        while not parser.done and (chunk := f.read(UPLOAD_CHUNK_SIZE)):
+            parser.feed(chunk)
+    if parser.info is not None:
+        return list(parser.info)
+    if parser.done or length > MAX_MOOV_BYTES + UPLOAD_CHUNK_SIZE:
+        return "deferred"
+    return None
+
+
+@router.post(
+    "/uploads",
+    status_code=201,
+    response_model=schemas.UploadSessionOut,
+    summary="Crea una sesión de carga reanudable por bloques.",
+)
+async def create_upload_session(
+    payload: schemas.UploadSessionCreate,
+    response: Response,
+    current_user: Usuario = Depends(get_current_user),
+):
+    if Path(payload.filename).suffix.lower() != ".mp4":
+        raise HTTPException(status_code=400, detail="Solo se permiten archivos MP4")
+    if payload.size <= 0 or payload.size > MAX_BYTES:
+        raise HTTPException(status_code=400, detail="El archivo excede el límite de 100 MB")
+
+    session = await io_pool.run(
+        upload_sessions.create_session, current_user.id, payload.title, payload.filename, payload.size
+    )
+    response.headers["Location"] = f"{router.prefix}/uploads/{session['upload_id']}"
+    return _session_out(session)
+
+
+@router.api_route(
+    "/uploads/{upload_id}",
+    methods=["GET", "HEAD"],
+    response_model=schemas.UploadSessionOut,
+    summary="Consulta el offset actual de una carga reanudable.",
+)
+def get_upload_session(
+    upload_id: str,
+    response: Response,
+    current_user: Usuario = Depends(get_current_user),
+):
+    session = _get_upload_session(upload_id, current_user)
+    response.headers["Upload-Offset"] = str(session["offset"])
+    response.headers["Upload-Length"] = str(session["size"])
+    response.headers["Cache-Control"] = "no-store"
+    return _session_out(session)
+
+
+def _is_received_chunk(session: dict, upload_offset: int, checksum: str) -> bool:
+    """
+    True si es el reintento de un bloque ya recibido (mismo offset y checksum), que no se
+    vuelve a escribir. Si no, el bloque debe empezar en el offset actual de la sesión.
+    """
+    offset = session["offset"]
+    if upload_offset < offset and session["chunks"].get(str(upload_offset)) == checksum:
+        return True
+    if upload_offset != offset:
         raise HTTPException(
-            status_code=400,
-            detail=f"Duración inválida: {dur:.1f}s (debe estar entre {MIN_T}-{MAX_T}s).",
+            status_code=409, detail="El offset no coincide con la carga.", headers={"Upload-Offset": str(offset)}
         )
-    if height < 1080 and width < 1920:
-        temp_path.unlink(missing_ok=True)
+    return False
+
+
+async def _lock_upload_session(upload_id: str, current_user: Usuario, session: dict) -> tuple[dict, int]:
+    """
+    Toma el lock de la sesión (el mismo para bloques, commit y cancelación) y la relee bajo
+    el lock: otra operación pudo cambiarla o eliminarla desde la primera lectura.
+    Retorna (sesión vigente, lock para upload_sessions.release_write).
+    """
+    lock = await io_pool.run(upload_sessions.acquire_write, upload_id)
+    if lock is None:
         raise HTTPException(
-            status_code=400,
-            detail=f"Resolución demasiado baja: {width}x{height} (mínimo 1920x1080).",
+            status_code=409,
+            detail="Ya hay una operación en curso para esta carga.",
+            headers={"Upload-Offset": str(session["offset"])},
         )
+    try:
+        return await io_pool.run(_get_upload_session, upload_id, current_user), lock
+    except BaseException as e:
+        if isinstance(e, HTTPException) and e.status_code == 404:
+            # La sesión ya no existe: no deja huérfano el archivo de lock recién creado
+            upload_sessions.delete_session(upload_id)
+        upload_sessions.release_write(lock)
+        raise
+
+
+@router.patch(
+    "/uploads/{upload_id}",
+    status_code=204,
+    summary="Envía un bloque de bytes a partir de Upload-Offset, verificado con Upload-Checksum.",
+)
+async def upload_session_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    upload_checksum: str = Header(..., alias="Upload-Checksum"),
+    current_user: Usuario = Depends(get_current_user),
+):
+    algorithm, _, expected = upload_checksum.partition(" ")
+    if algorithm.lower() != "sha256" or not expected:
+        raise HTTPException(status_code=400, detail="Upload-Checksum debe tener el formato 'sha256 <base64>'.")
 
-    # Subir archivo validado a S3
-    s3_key = f"unprocessed-videos/{unique_name}"
-    success = upload_to_s3(temp_path, s3_key)
-    temp_path.unlink(missing_ok=True)
-    if not success:
-        raise HTTPException(status_code=500, detail="Error subiendo archivo a S3")
-
-    # Registrar en BD con estado inicial
-    new_video = Video(title=title, filename=s3_key, owner_id=current_user.id)
-    db.add(new_video)
-    db.commit()
-    db.refresh(new_video)
+    session = await io_pool.run(_get_upload_session, upload_id, current_user)
+    if _is_received_chunk(session, upload_offset, expected):
+        return Response(status_code=204, headers={"Upload-Offset": str(session["offset"])})
 
+    session, lock = await _lock_upload_session(upload_id, current_user, session)
     try:
-        video_dict = new_video.to_dict()
+        # Otro bloque pudo terminar entre la primera lectura y el lock: se valida de nuevo
+        # contra la sesión vigente para no truncar bytes ya confirmados
+        if _is_received_chunk(session, upload_offset, expected):
+            return Response(status_code=204, headers={"Upload-Offset": str(session["offset"])})
+        offset = session["offset"]
+        path = upload_sessions.data_path(upload_id)
+
+        digest = hashlib.sha256()
+        received = 0
+        out_f = await io_pool.run(open, path, "r+b")
+        try:
+            try:
+                await io_pool.run(out_f.seek, offset)
+                async for chunk in request.stream():
+                    received += len(chunk)
+                    if offset + received > session["size"]:
+                        raise HTTPException(status_code=400, detail="El bloque excede el tamaño declarado.")
+                    digest.update(chunk)
+                    await io_pool.run(out_f.write, chunk)
+                if base64.b64encode(digest.digest()).decode() != expected:
+                    raise HTTPException(status_code=400, detail="El checksum del bloque no coincide.")
+            except BaseException:
+                # Se descarta el bloque incompleto o inválido para que el offset siga siendo consistente.
+                # La limpieza no pasa por el pool: debe ocurrir aunque esté saturado
+                out_f.truncate(offset)
+                raise
+        finally:
+            out_f.close()
+
+        session["offset"] = offset + received
+        session["chunks"][str(offset)] = expected
+
+        # Validación temprana: se rechaza la carga apenas la cabecera MP4 es inválida
+        if session["header"] is None:
+            session["header"] = await io_pool.run(_probe_session_header, path, session["offset"])
+            if isinstance(session["header"], list):
+                try:
+                    _check_video_metadata(*session["header"])
+                except HTTPException:
+                    await io_pool.run(upload_sessions.delete_session, upload_id)
+                    raise
+
+        await io_pool.run(upload_sessions.save_session, session)
+    finally:
+        upload_sessions.release_write(lock)
+
+    return Response(status_code=204, headers={"Upload-Offset": str(session["offset"])})
 
-        sent = send_to_sqs(video_dict)
-
-        if not sent:
-            logger.error("No se pudo encolar la tarea en SQS.")
-            return {
-                "message": "Error encolando tarea de procesamiento.",
-                "task_id": new_video.id,
-                "status": "error"
-            }
 
-        logger.info(f"Video {new_video.id} encolado en SQS exitosamente.")
+@router.post(
+    "/uploads/{upload_id}/commit",
+    status_code=201,
+    summary="Finaliza una carga reanudable, valida el video y encola su procesamiento.",
+)
+async def commit_upload_session(
+    upload_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user),
+):
+    session = await io_pool.run(_get_upload_session, upload_id, current_user)
+    # Bajo el lock: un segundo commit concurrente no registra el video dos veces
+    session, lock = await _lock_upload_session(upload_id, current_user, session)
+    try:
+        if session["offset"] != session["size"]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"La carga está incompleta ({session['offset']}/{session['size']} bytes).",
+                headers={"Upload-Offset": str(session["offset"])},
+            )
+
+        path = upload_sessions.data_path(upload_id)
+        try:
+            if isinstance(session["header"], list):
+                _check_video_metadata(*session["header"])
+            else:
+                await _probe_video_file(path)
+        except HTTPException:
+            await io_pool.run(upload_sessions.delete_session, upload_id)
+            raise
+
+        content_sha256 = await io_pool.run(file_sha256, path)
+        s3_key = f"unprocessed-videos/{upload_id}.mp4"
+        response = await _register_upload(db, session["title"], path, s3_key, current_user.id, content_sha256)
+        await io_pool.run(upload_sessions.delete_session, upload_id)
+    finally:
+        upload_sessions.release_write(lock)
+    return response
 
-    except Exception as e:
-        logger.error(f"Error enviando a SQS: {e}")
-        return {
-            "message": "Error interno al encolar el procesamiento.",
-            "task_id": new_video.id,
-            "status": "error"
-        }
 
-    return {
-        "message": "Video subido correctamente. Procesamiento en curso.",
-        "task_id": new_video.id,
-    }
+@router.delete(
+    "/uploads/{upload_id}",
+    status_code=status.HTTP_200_OK,
+    summary="Cancela una carga reanudable y elimina los bytes recibidos.",
+)
+async def cancel_upload_session(
+    upload_id: str,
+    current_user: Usuario = Depends(get_current_user),
+):
+    session = await io_pool.run(_get_upload_session, upload_id, current_user)
+    # Bajo el lock: un bloque en curso no vuelve a guardar la sesión después de cancelarla
+    _, lock = await _lock_upload_session(upload_id, current_user, session)
+    try:
+        await io_pool.run(upload_sessions.delete_session, upload_id)
+    finally:
+        upload_sessions.release_write(lock)
+    return {"message": "Carga cancelada.", "upload_id": upload_id}
 
 
 @router.get(
@@ -152,30 +632,43 @@ async def upload_video(
     response_model=list[schemas.VideoOut],
     summary="Lista de videos subidos por el usuario autenticado",
 )
-def list_my_videos(
-    db: Session = Depends(get_db),
+async def list_my_videos(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     current_user: Usuario = Depends(get_current_user),
+    cursor: str | None = None,
+    limit: int = PAGE_SIZE_DEFAULT,
 ):
-    videos = (
-        db.query(Video)
-        .filter(Video.owner_id == current_user.id)
-        .order_by(Video.uploaded_at.desc())
-        .all()
-    )
+    # Con réplica de lectura, un video recién subido aparece cuando la réplica se pone al día
+    videos, next_cursor = await db.run_sync(_my_videos_page, current_user.id, cursor, clamp_page_size(limit))
+    set_next_cursor(response, next_cursor)
     return videos
 
 
+def _my_videos_page(db: Session, owner_id: int, cursor: str | None, limit: int):
+    # Paginación por cursor sobre (uploaded_at, id); ver ix_videos_owner_uploaded
+    return keyset_page(
+        db.query(Video).filter(Video.owner_id == owner_id),
+        Video.uploaded_at,
+        Video.id,
+        cursor,
+        limit,
+    )
+
+
 @router.get(
     "/{video_id}",
     response_model=schemas.VideoOut,
     summary="Obtiene la información detallada de un video por ID",
 )
-def get_video_by_id(
+async def get_video_by_id(
     video_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     current_user: Usuario = Depends(get_current_user),
 ):
-    video = db.query(Video).filter(Video.id == video_id).first()
+    video = await db.run_sync(_get_video, video_id)
 
     if not video:
         raise HTTPException(status_code=404, detail=f"El video con id={video_id} no existe.")
@@ -183,6 +676,16 @@ def get_video_by_id(
     if video.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="No tienes permiso para acceder a este video.")
 
+    # La búsqueda por PK se mantiene (detecta borrados hechos en otras instancias);
+    # el ETag de la fila evita serializar y enviar el cuerpo si no cambió
+    etag = make_etag("video", current_user.id, video.id, video.status, video.processed_at, video.filename, video.title)
+    not_modified = conditional_response(
+        request, response, "video", etag, PRIVATE_CACHE_CONTROL,
+        last_modified=video.processed_at or video.uploaded_at,
+    )
+    if not_modified:
+        return not_modified
+
     response = {
         "id": video.id,
         "title": video.title,
@@ -206,12 +709,12 @@ def get_video_by_id(
     status_code=status.HTTP_200_OK,
     summary="Elimina un video por ID",
 )
-def delete_video_by_id(
+async def delete_video_by_id(
     video_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: Usuario = Depends(get_current_user),
 ):
-    video = db.query(Video).filter(Video.id == video_id).first()
+    video = await db.run_sync(_get_video, video_id)
     if not video:
         raise HTTPException(status_code=404, detail=f"El video con id={video_id} no existe.")
 
@@ -222,10 +725,9 @@ def delete_video_by_id(
         raise HTTPException(status_code=400, detail="El video ya está procesado para votación.")
 
     # Eliminar del bucket S3
-    delete_from_s3(video.filename)
+    await io_pool.run(delete_from_s3, video.filename)
 
     # Eliminar registro en BD
-    db.delete(video)
-    db.commit()
+    await db.run_sync(_delete_video, video)
 
     return {"message": f"Video '{video.title}' eliminado correctamente.", "video_id": video_id}
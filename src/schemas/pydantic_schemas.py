@@ -88,4 +88,55 @@ class Vote(BaseModel):
 
 class RankingOut(BaseModel):
     jugador: str
-    votos_acumulados: int
\ No newline at end of file
+    votos_acumulados: int
+
+class RankingPositionOut(RankingOut):
+    posicion: int
+
+class TrendingOut(BaseModel):
+    jugador: str
+    votos_periodo: int
+
+# Carga multiparte directa a S3 con URLs prefirmadas
+class MultipartUploadCreate(BaseModel):
+    title: str
+    filename: str
+    size: int
+
+
+class MultipartUploadPart(BaseModel):
+    part_number: int
+    url: str
+
+
+class MultipartUploadOut(BaseModel):
+    upload_id: str
+    key: str
+    part_size: int
+    parts: list[MultipartUploadPart]
+
+
+class CompletedPart(BaseModel):
+    part_number: int
+    etag: str
+
+
+class MultipartUploadComplete(BaseModel):
+    upload_id: str
+    key: str
+    title: str
+    parts: list[CompletedPart]
+
+
+# Carga reanudable por bloques
+class UploadSessionCreate(BaseModel):
+    title: str
+    filename: str
+    size: int
+
+
+class UploadSessionOut(BaseModel):
+    upload_id: str
+    offset: int
+    size: int
+    expires_at: datetime
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from src.models.db_models import ProcessedArtifact
+
+logger = logging.getLogger(__name__)
+
+# Parámetros del pipeline de procesamiento (worker/video_processor_task.py).
+# Un mismo archivo procesado con los mismos parámetros produce el mismo resultado,
+# así que el índice de deduplicación usa (sha256 del archivo, huella de estos parámetros).
+PIPELINE_PARAMS = {
+    "max_seconds": 30,
+    "fps": 30,
+    "width": 1920,
+    "height": 1080,
+    "video_codec": "libx264",
+    "preset": "medium",
+    "crf": 23,
+    "audio_codec": "aac",
+    "audio_rate": 44100,
+    "audio_channels": 2,
+    "audio_bitrate": "128k",
+    "watermark": "nba-rs-normalized.mp4",
+}
+PIPELINE_FINGERPRINT = hashlib.sha256(json.dumps(PIPELINE_PARAMS, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Calcula el SHA-256 de un archivo leyéndolo por bloques."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_processed_artifact(db: Session, content_sha256: str | None) -> str | None:
+    """Retorna la llave S3 del video ya procesado para ese contenido, o None."""
+    if not content_sha256:
+        return None
+    artifact = (
+        db.query(ProcessedArtifact)
+        .filter(
+            ProcessedArtifact.content_sha256 == content_sha256,
+            ProcessedArtifact.pipeline_fingerprint == PIPELINE_FINGERPRINT,
+        )
+        .first()
+    )
+    return artifact.processed_key if artifact else None
+
+
+def register_processed_artifact(db: Session, content_sha256: str, processed_key: str) -> bool:
+    """
+    Agrega el resultado del pipeline al índice de deduplicación (sin hacer commit).
+    Si otro worker ya registró el mismo contenido, se conserva el existente.
+    """
+    try:
+        with db.begin_nested():
+            db.add(
+                ProcessedArtifact(
+                    content_sha256=content_sha256,
+                    pipeline_fingerprint=PIPELINE_FINGERPRINT,
+                    processed_key=processed_key,
+                )
+            )
+        return True
+    except IntegrityError:
+        logger.info(f"El contenido {content_sha256[:12]} ya estaba en el índice de deduplicación.")
+        return False
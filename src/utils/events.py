@@ -0,0 +1,132 @@
+import json
+import logging
+import os
+import threading
+import uuid
+
+import redis
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+# "local": solo dentro del proceso. "redis": además se difunde por pub/sub a las demás
+# instancias de la API (y el worker publica ahí sus transiciones a "processed")
+EVENT_BUS_BACKEND = os.getenv("EVENT_BUS_BACKEND", "local")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+EVENT_CHANNEL = os.getenv("EVENT_CHANNEL", "anb:events")
+
+EVENTS_PUBLISHED = Counter("events_published_total", "Eventos publicados", ["type"])
+EVENTS_RECEIVED = Counter("events_received_total", "Eventos recibidos de otras instancias", ["type"])
+EVENTS_PUBLISH_FAILURES = Counter("events_publish_failures_total", "Eventos que no se pudieron difundir")
+
+VOTE = "vote"
+PROCESSED = "processed"
+USER_CHANGED = "user_changed"
+
+
+class LocalEventBus:
+    """Entrega los eventos a los manejadores registrados en este proceso."""
+
+    def __init__(self):
+        self.instance_id = uuid.uuid4().hex
+        self._handlers = []
+
+    def subscribe(self, handler):
+        self._handlers.append(handler)
+
+    def _dispatch(self, event: dict):
+        for handler in self._handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                logger.error(f"Error en manejador de evento {event.get('type')}: {e}")
+
+    def publish(self, event_type: str, **data):
+        event = {"type": event_type, "origin": self.instance_id, **data}
+        EVENTS_PUBLISHED.labels(event_type).inc()
+        self._dispatch(event)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class RedisEventBus(LocalEventBus):
+    """
+    Publica cada evento en un canal de Redis. Un hilo escucha el canal y entrega los
+    eventos de otras instancias; los propios ya se entregaron al publicarlos.
+    Si Redis no responde, el evento solo se aplica localmente y las demás instancias
+    se ponen al día con su sondeo periódico (ver versioning.DataVersion).
+    """
+
+    def __init__(self, client: redis.Redis, channel: str = EVENT_CHANNEL):
+        super().__init__()
+        self._client = client
+        self.channel = channel
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def publish(self, event_type: str, **data):
+        event = {"type": event_type, "origin": self.instance_id, **data}
+        EVENTS_PUBLISHED.labels(event_type).inc()
+        self._dispatch(event)
+        try:
+            self._client.publish(self.channel, json.dumps(event))
+        except redis.RedisError as e:
+            EVENTS_PUBLISH_FAILURES.inc()
+            logger.warning(f"No se pudo difundir el evento {event_type}: {e}")
+
+    def handle_message(self, message: dict):
+        if not message or message.get("type") != "message":
+            return
+        try:
+            event = json.loads(message["data"])
+        except (TypeError, ValueError):
+            logger.warning("Evento con formato inválido descartado.")
+            return
+        if event.get("origin") == self.instance_id:
+            return
+        EVENTS_RECEIVED.labels(event.get("type")).inc()
+        self._dispatch(event)
+
+    def _listen(self):
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                while not self._stop.is_set():
+                    self.handle_message(pubsub.get_message(timeout=1.0))
+            except redis.RedisError as e:
+                logger.warning(f"Suscripción a eventos interrumpida: {e}")
+                self._stop.wait(1.0)
+            finally:
+                if pubsub is not None:
+                    pubsub.close()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._listen, name="event-bus", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def _create_event_bus():
+    if EVENT_BUS_BACKEND == "redis":
+        return RedisEventBus(redis.Redis.from_url(REDIS_URL))
+    return LocalEventBus()
+
+
+event_bus = _create_event_bus()
+
+
+def publish_event(event_type: str, **data):
+    event_bus.publish(event_type, **data)
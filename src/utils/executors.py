@@ -0,0 +1,110 @@
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+POOL_IN_FLIGHT = Gauge("executor_in_flight_tasks", "Tareas ejecutándose en el pool", ["pool"])
+POOL_QUEUED = Gauge("executor_queued_tasks", "Tareas esperando un worker libre en el pool", ["pool"])
+POOL_SATURATION = Gauge("executor_saturation_ratio", "Tareas pendientes / workers del pool", ["pool"])
+POOL_REJECTED = Counter("executor_rejected_tasks_total", "Tareas rechazadas por pool saturado", ["pool"])
+POOL_TASK_SECONDS = Histogram("executor_task_seconds", "Tiempo total (cola + ejecución) por tarea", ["pool"])
+
+
+class PoolSaturatedError(Exception):
+    """Se lanza cuando un pool ya tiene el máximo de tareas pendientes permitidas."""
+
+    def __init__(self, pool_name: str):
+        super().__init__(f"El pool '{pool_name}' está saturado.")
+        self.pool_name = pool_name
+
+
+class BoundedExecutor:
+    """
+    Pool de hilos o procesos con límite de tareas pendientes.
+    Permite ejecutar funciones bloqueantes desde rutas async sin bloquear el event loop
+    y expone en Prometheus las tareas en ejecución, en cola y rechazadas.
+    """
+
+    def __init__(self, name: str, max_workers: int, kind: str = "thread", max_pending: int | None = None):
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self):
+        # Creación perezosa: evita lanzar procesos al importar el módulo
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _update_gauges(self):
+        POOL_IN_FLIGHT.labels(self.name).set(min(self._pending, self.max_workers))
+        POOL_QUEUED.labels(self.name).set(max(0, self._pending - self.max_workers))
+        POOL_SATURATION.labels(self.name).set(self._pending / self.max_workers)
+
+    async def run(self, fn, *args, **kwargs):
+        """Ejecuta fn(*args, **kwargs) en el pool y espera su resultado."""
+        with self._lock:
+            if self.max_pending is not None and self._pending >= self.max_workers + self.max_pending:
+                POOL_REJECTED.labels(self.name).inc()
+                raise PoolSaturatedError(self.name)
+            self._pending += 1
+            self._update_gauges()
+
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            call = functools.partial(fn, *args, **kwargs)
+            if self.kind == "thread":
+                # El hilo ve el contexto de la petición (p. ej. el conteo de sentencias SQL)
+                call = functools.partial(contextvars.copy_context().run, call)
+            return await loop.run_in_executor(self._get_executor(), call)
+        finally:
+            POOL_TASK_SECONDS.labels(self.name).observe(time.perf_counter() - start)
+            with self._lock:
+                self._pending -= 1
+                self._update_gauges()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _optional_int(value: str | None) -> int | None:
+    return int(value) if value not in (None, "") else None
+
+
+# Pool para trabajo intensivo en CPU (inspección de metadatos con MediaInfo)
+probe_pool = BoundedExecutor(
+    "probe",
+    max_workers=int(os.getenv("PROBE_POOL_WORKERS", 2)),
+    kind=os.getenv("PROBE_POOL_KIND", "thread"),
+    max_pending=_optional_int(os.getenv("PROBE_POOL_MAX_PENDING", "32")),
+)
+
+# Pool para E/S bloqueante (boto3, SQLAlchemy síncrono)
+io_pool = BoundedExecutor(
+    "io",
+    max_workers=int(os.getenv("IO_POOL_WORKERS", 16)),
+    kind="thread",
+    max_pending=_optional_int(os.getenv("IO_POOL_MAX_PENDING", "256")),
+)
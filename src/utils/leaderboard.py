@@ -0,0 +1,458 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from datetime import datetime
+
+from prometheus_client import Gauge, Histogram
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from src.db.database import SessionLocal
+from src.models.db_models import Usuario, Video, Vote
+from src.utils.events import VOTE, event_bus
+
+logger = logging.getLogger(__name__)
+
+# Cada cuánto se incorporan jugadores con videos recién procesados (por el worker)
+LEADERBOARD_SYNC_INTERVAL = float(os.getenv("LEADERBOARD_SYNC_INTERVAL", 5))
+# Reconstrucción completa periódica: corrige la deriva por votos recibidos en otras instancias
+LEADERBOARD_REBUILD_INTERVAL = float(os.getenv("LEADERBOARD_REBUILD_INTERVAL", 300))
+
+LEADERBOARD_PLAYERS = Gauge("leaderboard_players", "Jugadores en el leaderboard en memoria")
+LEADERBOARD_REGIONS = Gauge("leaderboard_regions", "Leaderboards regionales (países y ciudades)")
+LEADERBOARD_REBUILD_SECONDS = Histogram("leaderboard_rebuild_seconds", "Duración de la reconstrucción del leaderboard")
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, level: int):
+        self.key = key
+        self.next = [None] * level
+        # width[i] = posiciones que se avanzan siguiendo next[i]
+        self.width = [1] * level
+
+
+class IndexableSkipList:
+    """
+    Skip list ordenada con anchos por enlace, lo que permite obtener la posición de una
+    clave y la clave en una posición en O(log n) esperado.
+    """
+
+    MAX_LEVEL = 32
+
+    def __init__(self, seed=None):
+        self._rng = random.Random(seed)
+        self._head = _Node(None, self.MAX_LEVEL)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < self.MAX_LEVEL and self._rng.random() < 0.5:
+            level += 1
+        return level
+
+    def insert(self, key):
+        chain = [None] * self.MAX_LEVEL
+        steps_at_level = [0] * self.MAX_LEVEL
+        node = self._head
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        depth = self._random_level()
+        new_node = _Node(key, depth)
+        steps = 0
+        for level in range(depth):
+            prev = chain[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            new_node.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(depth, self.MAX_LEVEL):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key):
+        chain = [None] * self.MAX_LEVEL
+        node = self._head
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(len(target.next), self.MAX_LEVEL):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def rank(self, key) -> int:
+        """Posición (desde 0) de la clave; KeyError si no existe."""
+        node = self._head
+        position = 0
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        target = node.next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        return position
+
+    def slice(self, offset: int, limit: int) -> list:
+        """Claves en las posiciones [offset, offset + limit)."""
+        if offset >= self._size or limit <= 0:
+            return []
+        node = self._head
+        remaining = offset + 1
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        keys = []
+        while node is not None and len(keys) < limit:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class Leaderboard:
+    """
+    Totales de votos por jugador ordenados en una skip list indexable.
+    El orden es (votos desc, id de jugador asc), igual que el ranking en SQL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._list = IndexableSkipList()
+        self._players: dict[int, tuple[int, str]] = {}
+        self.ready = False
+
+    @staticmethod
+    def _key(player_id: int, score: int):
+        return (-score, player_id)
+
+    def rebuild(self, rows):
+        """Reemplaza el contenido con filas (id_jugador, nombre, votos)."""
+        skiplist = IndexableSkipList()
+        players = {}
+        for player_id, name, score in rows:
+            score = int(score or 0)
+            players[player_id] = (score, name)
+            skiplist.insert(self._key(player_id, score))
+        with self._lock:
+            self._list = skiplist
+            self._players = players
+            self.ready = True
+        LEADERBOARD_PLAYERS.set(len(players))
+
+    def __contains__(self, player_id: int) -> bool:
+        return player_id in self._players
+
+    def ensure_player(self, player_id: int, name: str):
+        """Incorpora un jugador con 0 votos si aún no está (p. ej. su primer video procesado)."""
+        with self._lock:
+            if player_id in self._players:
+                return
+            self._players[player_id] = (0, name)
+            self._list.insert(self._key(player_id, 0))
+            LEADERBOARD_PLAYERS.set(len(self._players))
+
+    def add_votes(self, player_id: int, delta: int, name: str | None = None):
+        with self._lock:
+            score, current_name = self._players.get(player_id, (None, name))
+            if score is None:
+                score = 0
+            else:
+                self._list.remove(self._key(player_id, score))
+            score += delta
+            self._players[player_id] = (score, current_name)
+            self._list.insert(self._key(player_id, score))
+            LEADERBOARD_PLAYERS.set(len(self._players))
+
+    def top(self, offset: int = 0, limit: int = 10) -> list[dict]:
+        with self._lock:
+            keys = self._list.slice(offset, limit)
+            return [
+                {"jugador": self._players[player_id][1], "votos_acumulados": -neg_score}
+                for neg_score, player_id in keys
+            ]
+
+    def rank(self, player_id: int) -> dict | None:
+        """Posición (desde 1) y votos del jugador, o None si no tiene videos procesados."""
+        with self._lock:
+            entry = self._players.get(player_id)
+            if entry is None:
+                return None
+            score, name = entry
+            position = self._list.rank(self._key(player_id, score)) + 1
+        return {"jugador": name, "votos_acumulados": score, "posicion": position}
+
+
+def region_key(country: str | None, city: str | None = None) -> tuple:
+    """Clave normalizada de una región: (país,) o (país, ciudad)."""
+    country = (country or "").strip().casefold()
+    if city is None:
+        return (country,)
+    return (country, city.strip().casefold())
+
+
+class RegionalLeaderboards:
+    """
+    Leaderboard global más uno por país y uno por (país, ciudad). Cada voto actualiza
+    los tres en O(log n); las consultas por región cuestan lo mismo sin importar
+    cuántos jugadores haya en ella.
+    `version` cuenta los cambios aplicados en esta instancia (ver etag_version).
+    """
+
+    def __init__(self):
+        # Reentrante: rebuild reaplica los votos pendientes con el lock tomado
+        self._lock = threading.RLock()
+        self.global_board = Leaderboard()
+        self._regions: dict[tuple, Leaderboard] = {}
+        self._player_regions: dict[int, tuple[tuple, tuple]] = {}
+        self.version = 0
+        # Votos recibidos mientras corre el agregado de una reconstrucción (None: sin reconstrucción)
+        self._replay: list | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.global_board.ready
+
+    def __contains__(self, player_id: int) -> bool:
+        return player_id in self._player_regions
+
+    def _boards_for(self, player_id: int) -> list[Leaderboard]:
+        country, city = self._player_regions[player_id]
+        return [self.global_board, self._regions[country], self._regions[city]]
+
+    def begin_rebuild(self):
+        """Desde aquí y hasta rebuild, los votos recibidos se reaplican sobre el resultado."""
+        with self._lock:
+            self._replay = []
+
+    def cancel_rebuild(self):
+        with self._lock:
+            self._replay = None
+
+    def rebuild(self, rows):
+        """
+        Reemplaza el contenido con filas (id_jugador, nombre, país, ciudad, votos) y reaplica
+        los votos recibidos desde begin_rebuild, que el agregado pudo no incluir.
+        """
+        per_region: dict[tuple, list] = {}
+        player_regions = {}
+        global_rows = []
+        for player_id, name, country, city, score in rows:
+            regions = (region_key(country), region_key(country, city))
+            player_regions[player_id] = regions
+            global_rows.append((player_id, name, score))
+            for region in regions:
+                per_region.setdefault(region, []).append((player_id, name, score))
+
+        regions = {}
+        for region, region_rows in per_region.items():
+            regions[region] = Leaderboard()
+            regions[region].rebuild(region_rows)
+        with self._lock:
+            self._regions = regions
+            self._player_regions = player_regions
+            self.global_board.rebuild(global_rows)
+            self.version += 1
+            replay, self._replay = self._replay or [], None
+            for player_id, owner in replay:
+                self._apply_vote(player_id, owner)
+        LEADERBOARD_REGIONS.set(len(regions))
+
+    def ensure_player(self, player_id: int, name: str, country: str, city: str):
+        with self._lock:
+            if player_id in self._player_regions:
+                return
+            regions = (region_key(country), region_key(country, city))
+            self._player_regions[player_id] = regions
+            for region in regions:
+                self._regions.setdefault(region, Leaderboard()).ensure_player(player_id, name)
+            self.global_board.ensure_player(player_id, name)
+            self.version += 1
+            LEADERBOARD_REGIONS.set(len(self._regions))
+
+    def add_votes(self, player_id: int, delta: int):
+        """Solo para jugadores conocidos; los nuevos entran con ensure_player."""
+        with self._lock:
+            if player_id not in self._player_regions:
+                return False
+            for board in self._boards_for(player_id):
+                board.add_votes(player_id, delta)
+            self.version += 1
+            return True
+
+    def _apply_vote(self, player_id: int, owner: dict | None):
+        if owner and player_id not in self:
+            self.ensure_player(player_id, owner["name"], owner["country"], owner["city"])
+        self.add_votes(player_id, 1)
+
+    def record_vote(self, player_id: int, owner: dict | None = None):
+        """
+        Un voto nuevo por un video del jugador. Si el dueño aún no está en el leaderboard,
+        `owner` trae su nombre y región para incorporarlo. Durante una reconstrucción
+        también se guarda para reaplicarlo sobre el resultado.
+        """
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((player_id, owner))
+            if self.ready:
+                self._apply_vote(player_id, owner)
+
+    def board(self, country: str | None = None, city: str | None = None) -> Leaderboard | None:
+        if country is None:
+            return self.global_board
+        return self._regions.get(region_key(country, city))
+
+    def top(self, offset: int = 0, limit: int = 10, country: str | None = None, city: str | None = None) -> list[dict]:
+        board = self.board(country, city)
+        return board.top(offset, limit) if board is not None else []
+
+    def rank(self, player_id: int) -> dict | None:
+        return self.global_board.rank(player_id)
+
+    def etag_version(self) -> str:
+        """
+        Versión para el ETag de /rankings. Cada instancia aplica los eventos a su propia
+        copia (y la reconstruye en momentos distintos), así que la versión incluye la
+        instancia: una copia nunca valida el cuerpo servido por otra.
+        """
+        return f"{event_bus.instance_id}:{self.version}"
+
+
+leaderboard = RegionalLeaderboards()
+
+
+def player_totals_query(db: Session, country: str | None = None, city: str | None = None):
+    """Agregado SQL de votos por jugador (solo videos procesados), opcionalmente por región."""
+    total = func.coalesce(func.sum(Video.votes_count), 0)
+    query = (
+        db.query(Usuario.id, Usuario.first_name.label("jugador"), total.label("votos_acumulados"))
+        .join(Video, Video.owner_id == Usuario.id)
+        .filter(Video.status == "processed")
+    )
+    if country is not None:
+        query = query.filter(func.lower(func.trim(Usuario.country)) == country.strip().lower())
+    if city is not None:
+        query = query.filter(func.lower(func.trim(Usuario.city)) == city.strip().lower())
+    return query.group_by(Usuario.id), total
+
+
+def region_totals_query(db: Session):
+    """Votos por jugador contados desde la tabla votes (fuente de verdad), con su región."""
+    votes = func.count(Vote.id)
+    return (
+        db.query(Usuario.id, Usuario.first_name, Usuario.country, Usuario.city, votes)
+        .join(Video, and_(Video.owner_id == Usuario.id, Video.status == "processed"))
+        .outerjoin(Vote, Vote.video_id == Video.id)
+        .group_by(Usuario.id)
+    )
+
+
+def rebuild_from_db(db: Session):
+    """
+    Repuebla el leaderboard global y los regionales desde la tabla votes. Los votos que
+    llegan mientras corre el agregado se reaplican después; uno confirmado justo antes de
+    la consulta cuyo evento llegue tarde puede contarse dos veces hasta la siguiente
+    reconstrucción, en vez de perderse todos los de la ventana.
+    """
+    leaderboard.begin_rebuild()
+    try:
+        with LEADERBOARD_REBUILD_SECONDS.time():
+            leaderboard.rebuild(region_totals_query(db).all())
+    except Exception:
+        leaderboard.cancel_rebuild()
+        raise
+    finally:
+        db.rollback()
+
+
+def latest_processed_at(db: Session) -> datetime | None:
+    """Marca de agua inicial de la sincronización: un solo salto por ix_videos_status_processed."""
+    value = db.query(func.max(Video.processed_at)).filter(Video.status == "processed").scalar()
+    db.rollback()
+    return value
+
+
+def sync_processed_since(db: Session, since: datetime | None) -> datetime | None:
+    """
+    Incorpora a los dueños de videos procesados desde `since` (transiciones del worker).
+    Retorna la nueva marca de agua.
+    """
+    query = (
+        db.query(Video.owner_id, Usuario.first_name, Usuario.country, Usuario.city, Video.processed_at)
+        .join(Usuario, Usuario.id == Video.owner_id)
+        .filter(Video.status == "processed")
+    )
+    if since is not None:
+        query = query.filter(Video.processed_at >= since)
+    watermark = since
+    for owner_id, name, country, city, processed_at in query.all():
+        leaderboard.ensure_player(owner_id, name, country, city)
+        if processed_at is not None and (watermark is None or processed_at > watermark):
+            watermark = processed_at
+    db.rollback()
+    return watermark
+
+
+def on_vote_event(event: dict):
+    """
+    Aplica los votos (de esta instancia o de otras, vía el bus de eventos). Si el dueño
+    aún no está en el leaderboard, el evento trae sus datos para incorporarlo.
+    """
+    if event.get("type") != VOTE or "owner_id" not in event:
+        return
+    leaderboard.record_vote(event["owner_id"], event.get("owner"))
+
+
+event_bus.subscribe(on_vote_event)
+
+
+def _sync_step(since, rebuild: bool):
+    db = SessionLocal()
+    try:
+        if rebuild:
+            # La reconstrucción ya incluye a todos los jugadores: basta la marca de agua,
+            # tomada antes del agregado para no perder transiciones intermedias
+            watermark = latest_processed_at(db)
+            rebuild_from_db(db)
+            return watermark
+        return sync_processed_since(db, since)
+    finally:
+        db.close()
+
+
+async def run_leaderboard_sync():
+    """Reconstruye el leaderboard al iniciar y lo mantiene al día dentro del lifespan de la API."""
+    from src.utils.executors import io_pool
+
+    since = None
+    last_rebuild = None
+    while True:
+        rebuild = last_rebuild is None or time.monotonic() - last_rebuild >= LEADERBOARD_REBUILD_INTERVAL
+        try:
+            since = await io_pool.run(_sync_step, since, rebuild)
+            if rebuild:
+                last_rebuild = time.monotonic()
+        except Exception as e:
+            logger.error(f"Error sincronizando el leaderboard: {e}")
+        await asyncio.sleep(LEADERBOARD_SYNC_INTERVAL)
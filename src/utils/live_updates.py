@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import select
+
+from src.db.database import SessionLocal
+from src.models.db_models import Video
+from src.utils.events import VOTE, event_bus
+
+logger = logging.getLogger(__name__)
+
+# Los votos recibidos durante un tick se agregan en un único mensaje por suscriptor
+LIVE_TICK_INTERVAL = float(os.getenv("LIVE_TICK_INTERVAL", 0.5))
+# Mensajes recientes que se conservan (compartidos por todos los suscriptores). Un
+# suscriptor que se atrasa más que esto recibe "resync" y debe volver a consultar la API
+LIVE_BACKLOG = int(os.getenv("LIVE_BACKLOG", 64))
+LIVE_MAX_SUBSCRIBERS = int(os.getenv("LIVE_MAX_SUBSCRIBERS", 5000))
+LIVE_HEARTBEAT_INTERVAL = float(os.getenv("LIVE_HEARTBEAT_INTERVAL", 15))
+# Posiciones del ranking global que se vigilan para informar cambios
+LIVE_RANKING_TOP = int(os.getenv("LIVE_RANKING_TOP", 10))
+
+LIVE_SUBSCRIBERS = Gauge("live_subscribers", "Suscriptores SSE conectados")
+LIVE_MESSAGES = Counter("live_messages_total", "Mensajes de cambios generados (uno por tick con votos)")
+LIVE_RESYNCS = Counter("live_resyncs_total", "Suscriptores atrasados a los que se pidió resincronizar")
+LIVE_REJECTED = Counter("live_rejected_total", "Conexiones rechazadas por exceder LIVE_MAX_SUBSCRIBERS")
+LIVE_TICK_SECONDS = Histogram("live_tick_seconds", "Duración de un tick (consulta + serialización)")
+LIVE_TICK_VIDEOS = Histogram(
+    "live_tick_videos", "Videos con votos nuevos por tick", buckets=(1, 5, 10, 50, 100, 500, 1000, 5000)
+)
+
+RESYNC = b"event: resync\ndata: {}\n\n"
+HEARTBEAT = b": ping\n\n"
+# Espera sugerida al cliente antes de reconectar
+RETRY = b"retry: 3000\n\n"
+
+
+def _load_video_totals(video_ids: list[int]) -> dict[int, int]:
+    """Votos actuales de los videos (persistidos más los pendientes de la escritura diferida)."""
+    from src.utils.vote_buffer import VOTE_WRITE_BEHIND, vote_buffer
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(select(Video.id, Video.votes_count).where(Video.id.in_(video_ids))).all()
+    finally:
+        db.close()
+    pending = vote_buffer.pending if VOTE_WRITE_BEHIND else (lambda video_id: 0)
+    return {video_id: (votes or 0) + pending(video_id) for video_id, votes in rows}
+
+
+def _load_ranking_top(n: int) -> list[dict] | None:
+    from src.utils.leaderboard import leaderboard
+
+    return leaderboard.top(0, n) if leaderboard.ready else None
+
+
+class LiveBroadcaster:
+    """
+    Difusión de cambios por SSE. Los eventos de voto solo marcan el video como
+    modificado; en cada tick se consultan los totales de los videos marcados, se
+    compara el top del ranking con el tick anterior y se serializa UN mensaje que
+    comparten todos los suscriptores. Cada suscriptor solo guarda el número del último
+    mensaje enviado, así que la memoria por conexión no crece con la carga de votos.
+    """
+
+    def __init__(
+        self,
+        load_totals=_load_video_totals,
+        load_top=_load_ranking_top,
+        backlog: int = LIVE_BACKLOG,
+        max_subscribers: int = LIVE_MAX_SUBSCRIBERS,
+        ranking_top: int = LIVE_RANKING_TOP,
+        heartbeat: float = LIVE_HEARTBEAT_INTERVAL,
+    ):
+        self._load_totals = load_totals
+        self._load_top = load_top
+        self.max_subscribers = max_subscribers
+        self.ranking_top = ranking_top
+        self.heartbeat = heartbeat
+        # Votos que llegan desde hilos (rutas síncronas, bus de Redis)
+        self._dirty: set[int] = set()
+        self._dirty_lock = threading.Lock()
+        # (seq, mensaje SSE ya codificado)
+        self._messages: deque = deque(maxlen=backlog)
+        self.seq = 0
+        self._last_top: list[dict] | None = None
+        self._changed: asyncio.Condition | None = None
+        self.subscribers = 0
+
+    def mark(self, video_id: int):
+        with self._dirty_lock:
+            self._dirty.add(video_id)
+
+    def on_event(self, event: dict):
+        # Se ignora el evento del flush de la escritura diferida (video_ids): los totales
+        # informados ya incluían lo pendiente
+        if event.get("type") == VOTE and "video_id" in event:
+            self.mark(event["video_id"])
+
+    def _condition(self) -> asyncio.Condition:
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        return self._changed
+
+    def build_payload(self) -> str | None:
+        """Agrega lo ocurrido desde el tick anterior (JSON). Retorna None si no hubo votos."""
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return None
+        LIVE_TICK_VIDEOS.observe(len(dirty))
+
+        payload = {"videos": {str(k): v for k, v in sorted(self._load_totals(sorted(dirty)).items())}}
+        top = self._load_top(self.ranking_top)
+        if top is not None:
+            previous = self._last_top or []
+            payload["ranking"] = [
+                {"posicion": i + 1, **entry}
+                for i, entry in enumerate(top)
+                if i >= len(previous) or previous[i] != entry
+            ]
+            self._last_top = top
+
+        return json.dumps(payload, separators=(",", ":"))
+
+    async def tick(self):
+        """Publica el mensaje del tick (si hubo votos) y despierta a los suscriptores."""
+        from src.utils.executors import io_pool
+
+        with LIVE_TICK_SECONDS.time():
+            data = await io_pool.run(self.build_payload)
+        if data is None:
+            return
+        LIVE_MESSAGES.inc()
+        # seq y el backlog solo se modifican en el event loop
+        condition = self._condition()
+        async with condition:
+            self.seq += 1
+            self._messages.append((self.seq, f"id: {self.seq}\nevent: delta\ndata: {data}\n\n".encode()))
+            condition.notify_all()
+
+    def _pending(self, cursor: int) -> tuple[list[bytes], int]:
+        """Mensajes posteriores a `cursor`; [RESYNC] si ya salieron del backlog."""
+        if cursor >= self.seq:
+            return [], cursor
+        if not self._messages or self._messages[0][0] > cursor + 1:
+            LIVE_RESYNCS.inc()
+            return [RESYNC], self.seq
+        return [message for seq, message in self._messages if seq > cursor], self.seq
+
+    def has_capacity(self) -> bool:
+        if self.subscribers < self.max_subscribers:
+            return True
+        LIVE_REJECTED.inc()
+        return False
+
+    async def stream(self, last_event_id: str | None = None):
+        """Generador SSE de un suscriptor; Last-Event-ID permite retomar tras reconectar."""
+        cursor = self.seq
+        if last_event_id and last_event_id.isdigit():
+            # Reconexión: se reenvía lo perdido si sigue en el backlog
+            cursor = min(int(last_event_id), self.seq)
+
+        self.subscribers += 1
+        LIVE_SUBSCRIBERS.inc()
+        condition = self._condition()
+        try:
+            yield RETRY
+            while True:
+                messages, cursor = self._pending(cursor)
+                for message in messages:
+                    yield message
+                if messages:
+                    continue
+                # Nunca se hace yield con el lock tomado: un cliente lento no frena el tick
+                async with condition:
+                    try:
+                        await asyncio.wait_for(condition.wait_for(lambda: self.seq > cursor), self.heartbeat)
+                        idle = False
+                    except asyncio.TimeoutError:
+                        idle = True
+                if idle:
+                    yield HEARTBEAT
+        finally:
+            self.subscribers -= 1
+            LIVE_SUBSCRIBERS.dec()
+
+
+live_broadcaster = LiveBroadcaster()
+event_bus.subscribe(live_broadcaster.on_event)
+
+
+async def run_live_updates(broadcaster: LiveBroadcaster = live_broadcaster, interval: float = LIVE_TICK_INTERVAL):
+    """Un tick cada LIVE_TICK_INTERVAL dentro del lifespan de la API."""
+    while True:
+        started = time.monotonic()
+        try:
+            await broadcaster.tick()
+        except Exception as e:
+            logger.error(f"Error generando cambios en vivo: {e}")
+        await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
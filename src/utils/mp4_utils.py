@@ -0,0 +1,167 @@
+import struct
+
+# Tamaño máximo de la caja moov que se acepta mantener en memoria
+MAX_MOOV_BYTES = 16 * 1024 * 1024
+
+
+def _iter_boxes(data: bytes, start: int, end: int):
+    """Recorre las cajas hijas en data[start:end] y retorna (tipo, inicio_contenido, fin)."""
+    pos = start
+    while pos + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, pos)
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                return
+            size = struct.unpack_from(">Q", data, pos + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            return
+        yield box_type, pos + header, pos + size
+        pos += size
+
+
+def _parse_mvhd(data: bytes, start: int):
+    """Duración en segundos a partir de la caja mvhd."""
+    if data[start] == 1:
+        timescale, duration = struct.unpack_from(">IQ", data, start + 20)
+    else:
+        timescale, duration = struct.unpack_from(">II", data, start + 12)
+    return duration / timescale if timescale else 0.0
+
+
+def _parse_tkhd(data: bytes, start: int):
+    """Ancho y alto (punto fijo 16.16) a partir de la caja tkhd."""
+    offset = start + 88 if data[start] == 1 else start + 76
+    width, height = struct.unpack_from(">II", data, offset)
+    return width >> 16, height >> 16
+
+
+def _parse_trak(data: bytes, start: int, end: int):
+    """Retorna (ancho, alto, es_video) de una pista."""
+    width = height = 0
+    handler = None
+    for box_type, child_start, child_end in _iter_boxes(data, start, end):
+        if box_type == b"tkhd":
+            width, height = _parse_tkhd(data, child_start)
+        elif box_type == b"mdia":
+            for sub_type, sub_start, _ in _iter_boxes(data, child_start, child_end):
+                if sub_type == b"hdlr":
+                    handler = data[sub_start + 8:sub_start + 12]
+    is_video = handler == b"vide" if handler is not None else (width > 0 and height > 0)
+    return width, height, is_video
+
+
+def parse_moov(moov: bytes):
+    """
+    Extrae (duración, ancho, alto) de una caja moov completa (incluyendo su cabecera).
+    Retorna None si no encuentra una duración válida.
+    """
+    header = 16 if struct.unpack_from(">I", moov, 0)[0] == 1 else 8
+    duration = 0.0
+    width = height = 0
+    try:
+        for box_type, start, end in _iter_boxes(moov, header, len(moov)):
+            if box_type == b"mvhd":
+                duration = _parse_mvhd(moov, start)
+            elif box_type == b"trak":
+                w, h, is_video = _parse_trak(moov, start, end)
+                if is_video and w * h > width * height:
+                    width, height = w, h
+    except (struct.error, IndexError):
+        return None
+    if duration <= 0.0:
+        return None
+    return duration, width, height
+
+
+class Mp4HeaderParser:
+    """
+    Parser incremental de la cabecera de un MP4.
+    Se alimenta con los bloques del archivo a medida que llegan; cuando encuentra
+    la caja moov extrae duración, ancho y alto sin esperar al resto del archivo.
+
+    Estados finales:
+        - info: (duración, ancho, alto) obtenida de moov.
+        - deferred: la caja mdat aparece antes que moov (moov al final del archivo);
+          la validación debe hacerse con el archivo completo.
+        - failed: estructura no reconocida; la validación debe hacerse con MediaInfo.
+    """
+
+    def __init__(self, max_moov_bytes: int = MAX_MOOV_BYTES):
+        self.max_moov_bytes = max_moov_bytes
+        self.info = None
+        self.deferred = False
+        self.failed = False
+        self._buffer = bytearray()
+        self._skip = 0
+        self._moov_size = None
+        self._boxes_seen = 0
+
+    @property
+    def done(self) -> bool:
+        return self.info is not None or self.deferred or self.failed
+
+    def feed(self, chunk: bytes):
+        """Procesa un bloque y retorna la información si ya está disponible."""
+        if self.done:
+            return self.info
+
+        data = memoryview(chunk)
+        if self._skip:
+            n = min(self._skip, len(data))
+            self._skip -= n
+            data = data[n:]
+        self._buffer += data
+
+        while not self.done:
+            if self._moov_size is not None:
+                if len(self._buffer) < self._moov_size:
+                    break
+                self.info = parse_moov(bytes(self._buffer[:self._moov_size]))
+                self.failed = self.info is None
+                self._buffer.clear()
+                break
+
+            if len(self._buffer) < 8:
+                break
+            size, box_type = struct.unpack_from(">I4s", self._buffer, 0)
+            header = 8
+            if size == 1:
+                if len(self._buffer) < 16:
+                    break
+                size = struct.unpack_from(">Q", self._buffer, 8)[0]
+                header = 16
+
+            if (self._boxes_seen == 0 and box_type != b"ftyp") or (size != 0 and size < header):
+                self.failed = True
+                break
+            if box_type == b"moov":
+                if size == 0 or size > self.max_moov_bytes:
+                    self.failed = True
+                    break
+                self._moov_size = size
+                continue
+            if box_type == b"mdat" or size == 0:
+                self.deferred = True
+                break
+
+            # Caja irrelevante (ftyp, free, uuid...): se descarta sin guardarla
+            self._boxes_seen += 1
+            if len(self._buffer) >= size:
+                del self._buffer[:size]
+            else:
+                self._skip = size - len(self._buffer)
+                self._buffer.clear()
+
+        if self.done:
+            self._buffer.clear()
+        return self.info
+
+
+def probe_mp4_bytes(data: bytes):
+    """Aplica el parser a un bloque de bytes completo (p. ej. el rango inicial de un objeto S3)."""
+    parser = Mp4HeaderParser()
+    return parser.feed(data)
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy.orm import Session, joinedload
+
+from src.db.database import SessionLocal
+from src.models.db_models import OutboxMessage
+from src.utils.sqs_utils import send_batch_to_sqs
+
+logger = logging.getLogger(__name__)
+
+# SendMessageBatch admite como máximo 10 mensajes por llamada
+OUTBOX_BATCH_SIZE = min(int(os.getenv("OUTBOX_BATCH_SIZE", 10)), 10)
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", 0.5))
+OUTBOX_MAX_BACKOFF = float(os.getenv("OUTBOX_MAX_BACKOFF", 30))
+# Envíos rechazados tras los que un mensaje se marca como muerto y deja de reintentarse
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 10))
+
+OUTBOX_SENT = Counter("outbox_messages_sent_total", "Mensajes del outbox enviados a SQS")
+OUTBOX_FAILED = Counter("outbox_send_failures_total", "Envíos del outbox rechazados o fallidos")
+OUTBOX_DEAD = Counter("outbox_dead_letters_total", "Mensajes del outbox descartados tras OUTBOX_MAX_ATTEMPTS intentos")
+OUTBOX_PENDING = Gauge("outbox_pending_messages", "Mensajes del outbox en el último lote leído")
+OUTBOX_BATCH_SECONDS = Histogram("outbox_batch_seconds", "Duración de cada lote del relay")
+
+
+def relay_once(db: Session, batch_size: int = OUTBOX_BATCH_SIZE) -> tuple[int, int]:
+    """
+    Envía un lote de mensajes pendientes del outbox.
+    Los enviados se eliminan; los fallidos quedan para el siguiente intento, salvo los
+    que llegan a OUTBOX_MAX_ATTEMPTS, que se marcan como muertos (dead_at).
+    Retorna (enviados, fallidos).
+    """
+    with OUTBOX_BATCH_SECONDS.time():
+        # SKIP LOCKED permite varios relays (uno por instancia) sin duplicar envíos
+        rows = (
+            db.query(OutboxMessage)
+            .options(joinedload(OutboxMessage.video, innerjoin=True))
+            .filter(OutboxMessage.dead_at.is_(None))
+            .order_by(OutboxMessage.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True, of=OutboxMessage)
+            .all()
+        )
+        OUTBOX_PENDING.set(len(rows))
+        if not rows:
+            db.commit()
+            return 0, 0
+
+        sent = send_batch_to_sqs([row.video.to_dict() for row in rows])
+        for i, row in enumerate(rows):
+            if i in sent:
+                db.delete(row)
+            else:
+                row.attempts = (row.attempts or 0) + 1
+                row.last_error = "SendMessageBatch rechazó el mensaje"
+                if row.attempts >= OUTBOX_MAX_ATTEMPTS:
+                    row.dead_at = datetime.now(timezone.utc)
+                    OUTBOX_DEAD.inc()
+                    logger.error(
+                        f"Mensaje {row.id} del outbox (video {row.video_id}) descartado tras {row.attempts} intentos."
+                    )
+        db.commit()
+
+    failed = len(rows) - len(sent)
+    OUTBOX_SENT.inc(len(sent))
+    OUTBOX_FAILED.inc(failed)
+    return len(sent), failed
+
+
+def _drain(batch_size: int = OUTBOX_BATCH_SIZE) -> tuple[int, int]:
+    """Vacía el outbox lote a lote hasta que no quedan mensajes o un lote falla."""
+    total_sent = total_failed = 0
+    db = SessionLocal()
+    try:
+        while True:
+            sent, failed = relay_once(db, batch_size)
+            total_sent += sent
+            total_failed += failed
+            if failed or sent < batch_size:
+                return total_sent, total_failed
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error en el relay del outbox: {e}")
+        return total_sent, total_failed + 1
+    finally:
+        db.close()
+
+
+def _next_delay(failures: int) -> float:
+    """Espera entre ciclos: el intervalo normal o un backoff exponencial tras fallos."""
+    if not failures:
+        return OUTBOX_POLL_INTERVAL
+    return min(OUTBOX_POLL_INTERVAL * (2 ** failures), OUTBOX_MAX_BACKOFF)
+
+
+async def run_outbox_relay():
+    """Bucle del relay para ejecutarse dentro del lifespan de la API."""
+    from src.utils.executors import io_pool
+
+    logger.info("Relay del outbox iniciado.")
+    failures = 0
+    while True:
+        try:
+            _, failed = await io_pool.run(_drain)
+        except Exception as e:
+            # Pool saturado u otro error fuera de _drain: se reintenta con backoff
+            logger.error(f"Error en el relay del outbox: {e}")
+            failed = 1
+        failures = failures + 1 if failed else 0
+        await asyncio.sleep(_next_delay(failures))
+
+
+def run_outbox_relay_forever():
+    """Bucle del relay como proceso independiente: python -m src.utils.outbox_relay"""
+    logger.info("Relay del outbox iniciado (proceso independiente).")
+    failures = 0
+    while True:
+        try:
+            _, failed = _drain()
+            failures = failures + 1 if failed else 0
+            time.sleep(_next_delay(failures))
+        except KeyboardInterrupt:
+            logger.info("Relay del outbox detenido manualmente.")
+            break
+        except Exception as e:
+            logger.error(f"Error en el relay del outbox: {e}")
+            failures += 1
+            time.sleep(_next_delay(failures))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_outbox_relay_forever()
@@ -0,0 +1,84 @@
+import base64
+import json
+import os
+from datetime import datetime
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import tuple_
+
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", 20))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", 100))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def clamp_page_size(limit: int | None) -> int:
+    """Tamaño de página solicitado, acotado a [1, PAGE_SIZE_MAX]."""
+    if not limit or limit < 1:
+        return PAGE_SIZE_DEFAULT
+    return min(limit, PAGE_SIZE_MAX)
+
+
+def encode_cursor(sort_value, row_id: int) -> str:
+    """Cursor opaco con la clave de orden (valor, id) de la última fila entregada."""
+    if isinstance(sort_value, datetime):
+        payload = {"t": sort_value.isoformat(), "id": row_id}
+    else:
+        payload = {"v": sort_value, "id": row_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_type: type | None = None) -> tuple:
+    """
+    Retorna (valor, id) del cursor; 400 si el cursor fue manipulado o es inválido,
+    incluido un valor que no es de `sort_type` (el tipo de la columna de orden).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        row_id = int(payload["id"])
+        if "t" in payload:
+            sort_value = datetime.fromisoformat(payload["t"])
+        else:
+            sort_value = payload["v"]
+        # bool es subclase de int, pero no es un valor de orden válido
+        if sort_type is not None and (not isinstance(sort_value, sort_type) or isinstance(sort_value, bool)):
+            raise TypeError(f"Se esperaba {sort_type.__name__}")
+        return sort_value, row_id
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido.",
+        )
+
+
+def keyset_page(query, sort_column, id_column, cursor: str | None, limit: int):
+    """
+    Aplica paginación por clave (keyset) en orden descendente de (sort_column, id_column).
+    El costo de cada página depende solo de `limit`, no de cuántas filas hay antes,
+    siempre que exista un índice compuesto sobre las columnas de orden.
+    Retorna (filas, cursor_siguiente_o_None).
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor, sort_column.type.python_type)
+        query = query.filter(tuple_(sort_column, id_column) < tuple_(sort_value, row_id))
+
+    rows = (
+        query.order_by(sort_column.desc(), id_column.desc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    # Se pide una fila extra solo para saber si hay página siguiente
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+
+def set_next_cursor(response: Response, next_cursor: str | None):
+    """Publica el cursor de la página siguiente en la cabecera X-Next-Cursor."""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,62 @@
+import hmac
+import os
+import time
+
+from passlib.context import CryptContext
+from prometheus_client import Histogram
+
+from src.utils.executors import BoundedExecutor
+
+# Costo de bcrypt (2^rounds iteraciones). Al cambiarlo, los hashes existentes
+# se regeneran de forma transparente en el siguiente login exitoso.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# Pool dedicado y acotado: una avalancha de logins se rechaza con 503 (PoolSaturatedError)
+# en lugar de acaparar los hilos que usan las demás rutas
+hash_pool = BoundedExecutor(
+    "password-hashing",
+    max_workers=int(os.getenv("HASH_POOL_WORKERS", os.cpu_count() or 2)),
+    max_pending=int(os.getenv("HASH_POOL_MAX_PENDING", 64)),
+)
+
+HASH_SECONDS = Histogram(
+    "password_hash_seconds",
+    "Tiempo de CPU por operación de hash de contraseñas",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+
+def _hash(password: str) -> str:
+    start = time.perf_counter()
+    try:
+        return pwd_context.hash(password)
+    finally:
+        HASH_SECONDS.labels("hash").observe(time.perf_counter() - start)
+
+
+def _verify_and_update(password: str, stored: str) -> tuple[bool, str | None]:
+    """
+    Verifica la contraseña y, si el hash almacenado usa un costo distinto al actual
+    (o es una contraseña legada en texto plano), retorna también el nuevo hash.
+    """
+    start = time.perf_counter()
+    try:
+        if pwd_context.identify(stored) is None:
+            valid = hmac.compare_digest(password.encode(), stored.encode())
+            return valid, pwd_context.hash(password) if valid else None
+        return pwd_context.verify_and_update(password, stored)
+    finally:
+        HASH_SECONDS.labels("verify").observe(time.perf_counter() - start)
+
+
+async def hash_password(password: str) -> str:
+    """Genera el hash bcrypt en el pool de hashing, sin bloquear el event loop."""
+    return await hash_pool.run(_hash, password)
+
+
+async def verify_password(password: str, stored: str) -> tuple[bool, str | None]:
+    """Retorna (válida, nuevo_hash_o_None) ejecutando bcrypt en el pool de hashing."""
+    return await hash_pool.run(_verify_and_update, password, stored)
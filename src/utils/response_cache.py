@@ -0,0 +1,222 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import redis
+from fastapi import Response
+from prometheus_client import Counter, Gauge
+
+from src.utils.events import PROCESSED, REDIS_URL, VOTE, event_bus
+from src.utils.singleflight import SingleFlight
+from src.utils.versioning import data_version
+
+logger = logging.getLogger(__name__)
+
+# "memory": LRU por instancia. "redis": compartida entre instancias. "none": deshabilitada
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 1024))
+# Red de seguridad: la invalidación normal la hacen los eventos de voto y procesamiento
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 300))
+
+CACHE_HITS = Counter("response_cache_hits_total", "Respuestas servidas desde la caché", ["namespace"])
+CACHE_MISSES = Counter("response_cache_misses_total", "Respuestas que hubo que generar", ["namespace"])
+CACHE_BYTES_SAVED = Counter("response_cache_bytes_saved_total", "Bytes servidos sin consultar ni serializar", ["namespace"])
+CACHE_HIT_RATIO = Gauge("response_cache_hit_ratio", "Proporción de aciertos desde el arranque", ["namespace"])
+CACHE_INVALIDATIONS = Counter("response_cache_invalidations_total", "Invalidaciones por evento", ["namespace"])
+
+# Qué listados cambia cada evento
+INVALIDATES = {
+    VOTE: ("public_videos", "rankings", "trending"),
+    PROCESSED: ("public_videos", "rankings"),
+}
+
+
+def _encode(body: bytes, headers: dict) -> bytes:
+    return json.dumps(headers).encode() + b"\n" + body
+
+
+def _decode(raw: bytes) -> tuple[bytes, dict]:
+    headers, body = raw.split(b"\n", 1)
+    return body, json.loads(headers)
+
+
+class MemoryResponseCache:
+    """LRU en memoria con expiración por entrada, segura entre hilos."""
+
+    shared = False
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl: float = RESPONSE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._data.get((namespace, key))
+            if entry is None:
+                return None
+            raw, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[(namespace, key)]
+                return None
+            self._data.move_to_end((namespace, key))
+            return raw
+
+    def set(self, namespace: str, key: str, raw: bytes):
+        with self._lock:
+            self._data[(namespace, key)] = (raw, time.monotonic() + self.ttl)
+            self._data.move_to_end((namespace, key))
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, namespace: str):
+        with self._lock:
+            for cache_key in [k for k in self._data if k[0] == namespace]:
+                del self._data[cache_key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisResponseCache:
+    """
+    Caché compartida en Redis. Las claves incluyen el ETag (versión de los datos), así
+    que tras un evento las entradas viejas quedan inalcanzables; además cada namespace
+    lleva un índice de sus claves para borrarlas al invalidar.
+    Los errores de Redis se tratan como fallos de caché.
+    """
+
+    # Compartida: basta con que la invalide la instancia que originó el evento
+    shared = True
+
+    def __init__(self, client: redis.Redis, ttl: int = RESPONSE_CACHE_TTL, prefix: str = "anb:rc"):
+        self._client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{key}"
+
+    def _index_key(self, namespace: str) -> str:
+        return f"{self.prefix}:{namespace}:__keys__"
+
+    def get(self, namespace: str, key: str) -> bytes | None:
+        try:
+            return self._client.get(self._key(namespace, key))
+        except redis.RedisError as e:
+            logger.debug(f"Caché de respuestas no disponible: {e}")
+            return None
+
+    def set(self, namespace: str, key: str, raw: bytes):
+        cache_key, index_key = self._key(namespace, key), self._index_key(namespace)
+        try:
+            pipe = self._client.pipeline()
+            pipe.set(cache_key, raw, ex=self.ttl)
+            pipe.sadd(index_key, cache_key)
+            pipe.expire(index_key, self.ttl)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.debug(f"Caché de respuestas no disponible: {e}")
+
+    def invalidate(self, namespace: str):
+        index_key = self._index_key(namespace)
+        try:
+            # Leer y vaciar el índice en una transacción: las claves agregadas después
+            # quedan en el índice siguiente
+            pipe = self._client.pipeline()
+            pipe.smembers(index_key)
+            pipe.delete(index_key)
+            keys, _ = pipe.execute()
+            if keys:
+                self._client.unlink(*keys)
+        except redis.RedisError as e:
+            logger.debug(f"Caché de respuestas no disponible: {e}")
+
+
+class NullResponseCache:
+    shared = False
+
+    def get(self, namespace: str, key: str):
+        return None
+
+    def set(self, namespace: str, key: str, raw: bytes):
+        pass
+
+    def invalidate(self, namespace: str):
+        pass
+
+    def clear(self):
+        pass
+
+
+def _create_response_cache():
+    if RESPONSE_CACHE_BACKEND == "redis":
+        return RedisResponseCache(redis.Redis.from_url(REDIS_URL))
+    if RESPONSE_CACHE_BACKEND == "none":
+        return NullResponseCache()
+    return MemoryResponseCache()
+
+
+response_cache = _create_response_cache()
+
+# Con la caché fría, las peticiones idénticas simultáneas comparten una sola consulta
+_builds = SingleFlight("response_cache")
+
+_lookups: dict[str, list[int]] = {}
+
+
+def _record(namespace: str, hit: bool, size: int = 0):
+    stats = _lookups.setdefault(namespace, [0, 0])
+    stats[0 if hit else 1] += 1
+    if hit:
+        CACHE_HITS.labels(namespace).inc()
+        CACHE_BYTES_SAVED.labels(namespace).inc(size)
+    else:
+        CACHE_MISSES.labels(namespace).inc()
+    CACHE_HIT_RATIO.labels(namespace).set(stats[0] / (stats[0] + stats[1]))
+
+
+async def _build_and_store(namespace: str, etag: str, build):
+    body, extra_headers = await build()
+    response_cache.set(namespace, etag, _encode(body, extra_headers))
+    return body, extra_headers
+
+
+async def cached_json(namespace: str, etag: str, headers: dict, build) -> Response:
+    """
+    Respuesta JSON para la versión identificada por `etag`. Si no está en caché, `await build()`
+    debe retornar (cuerpo_serializado, cabeceras_extra); las excepciones no se cachean y
+    se propagan a todas las peticiones que esperaban la misma construcción.
+    """
+    raw = response_cache.get(namespace, etag)
+    if raw is not None:
+        body, extra_headers = _decode(raw)
+        _record(namespace, hit=True, size=len(body))
+    else:
+        _record(namespace, hit=False)
+        body, extra_headers = await _builds.do_async((namespace, etag), _build_and_store, namespace, etag, build)
+    return Response(content=body, media_type="application/json", headers={**headers, **extra_headers})
+
+
+def on_data_event(event: dict):
+    """Un voto o un video procesado (de cualquier instancia) cambia los listados públicos."""
+    namespaces = INVALIDATES.get(event.get("type"))
+    if not namespaces:
+        return
+    data_version.invalidate()
+    if response_cache.shared and event.get("origin") != event_bus.instance_id:
+        return
+    for namespace in namespaces:
+        response_cache.invalidate(namespace)
+        CACHE_INVALIDATIONS.labels(namespace).inc()
+
+
+event_bus.subscribe(on_data_event)
@@ -41,3 +41,89 @@ def delete_from_s3(s3_key: str) -> bool:
     except ClientError as e:
         logger.error(f" Error eliminando de S3: {e}")
         return False
+
+
+# =======================================================
+# CARGA MULTIPARTE DIRECTA (URLs PREFIRMADAS)
+# =======================================================
+def create_multipart_upload(s3_key: str, metadata: dict | None = None) -> str | None:
+    """Inicia una carga multiparte y retorna su UploadId."""
+    try:
+        response = s3_client.create_multipart_upload(
+            Bucket=BUCKET_NAME,
+            Key=s3_key,
+            ContentType="video/mp4",
+            Metadata=metadata or {},
+        )
+        logger.info(f" Carga multiparte iniciada: {s3_key}")
+        return response["UploadId"]
+    except ClientError as e:
+        logger.error(f" Error iniciando carga multiparte: {e}")
+        return None
+
+
+def presign_upload_part(s3_key: str, upload_id: str, part_number: int, expires_in: int = 3600) -> str:
+    """Genera una URL prefirmada para subir una parte con PUT directamente a S3."""
+    return s3_client.generate_presigned_url(
+        "upload_part",
+        Params={
+            "Bucket": BUCKET_NAME,
+            "Key": s3_key,
+            "UploadId": upload_id,
+            "PartNumber": part_number,
+        },
+        ExpiresIn=expires_in,
+    )
+
+
+def complete_multipart_upload(s3_key: str, upload_id: str, parts: list[dict]) -> bool:
+    """
+    Completa una carga multiparte.
+    parts: lista de {"PartNumber": int, "ETag": str} ordenada por número de parte.
+    """
+    try:
+        s3_client.complete_multipart_upload(
+            Bucket=BUCKET_NAME,
+            Key=s3_key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+        logger.info(f" Carga multiparte completada: {s3_key}")
+        return True
+    except ClientError as e:
+        logger.error(f" Error completando carga multiparte: {e}")
+        return False
+
+
+def abort_multipart_upload(s3_key: str, upload_id: str) -> bool:
+    """Cancela una carga multiparte y libera las partes ya subidas."""
+    try:
+        s3_client.abort_multipart_upload(Bucket=BUCKET_NAME, Key=s3_key, UploadId=upload_id)
+        logger.info(f" Carga multiparte cancelada: {s3_key}")
+        return True
+    except ClientError as e:
+        logger.error(f" Error cancelando carga multiparte: {e}")
+        return False
+
+
+def head_object(s3_key: str) -> dict | None:
+    """Retorna los metadatos de un objeto (tamaño, tipo, metadatos de usuario) o None."""
+    try:
+        return s3_client.head_object(Bucket=BUCKET_NAME, Key=s3_key)
+    except ClientError as e:
+        logger.error(f" Error consultando metadatos en S3: {e}")
+        return None
+
+
+def download_range_from_s3(s3_key: str, local_path: Path, length: int) -> bool:
+    """Descarga solo los primeros `length` bytes de un objeto (para inspeccionar cabeceras)."""
+    try:
+        response = s3_client.get_object(Bucket=BUCKET_NAME, Key=s3_key, Range=f"bytes=0-{length - 1}")
+        with open(local_path, "wb") as f:
+            for chunk in response["Body"].iter_chunks():
+                f.write(chunk)
+        logger.info(f" Rango inicial descargado desde S3: {s3_key}")
+        return True
+    except ClientError as e:
+        logger.error(f" Error descargando rango desde S3: {e}")
+        return False
@@ -0,0 +1,76 @@
+import asyncio
+import os
+
+from prometheus_client import Counter
+
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", 10))
+
+SINGLE_FLIGHT_SHARED = Counter(
+    "singleflight_shared_total", "Llamadas que reutilizaron una ejecución en curso", ["group"]
+)
+SINGLE_FLIGHT_TIMEOUTS = Counter(
+    "singleflight_timeouts_total", "Ejecuciones compartidas que superaron el tiempo de espera", ["group"]
+)
+
+
+class SingleFlightTimeoutError(TimeoutError):
+    """La ejecución compartida no terminó dentro del tiempo de espera."""
+
+    def __init__(self, group: str):
+        super().__init__(f"Tiempo de espera agotado en '{group}'")
+        self.group = group
+
+
+class _AsyncCall:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = asyncio.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Agrupa corrutinas concurrentes con la misma clave: la primera ejecuta la función y
+    las demás esperan y reciben su resultado (o su excepción). La ejecución se corta a
+    los `timeout` segundos, así que nadie espera más que eso.
+    """
+
+    def __init__(self, group: str, timeout: float = SINGLE_FLIGHT_TIMEOUT):
+        self.group = group
+        self.timeout = timeout
+        self._calls: dict = {}
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """Ejecuta `await fn(*args, **kwargs)` una sola vez por clave. Siempre se llama desde el mismo event loop."""
+        while True:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _AsyncCall()
+                try:
+                    call.result = await asyncio.wait_for(fn(*args, **kwargs), self.timeout)
+                    return call.result
+                except asyncio.TimeoutError:
+                    SINGLE_FLIGHT_TIMEOUTS.labels(self.group).inc()
+                    call.error = SingleFlightTimeoutError(self.group)
+                    raise call.error from None
+                except BaseException as e:
+                    call.error = e
+                    raise
+                finally:
+                    del self._calls[key]
+                    call.done.set()
+
+            SINGLE_FLIGHT_SHARED.labels(self.group).inc()
+            await call.done.wait()
+            # Si se canceló la petición que ejecutaba la función (el cliente se fue),
+            # quien esperaba la vuelve a intentar en lugar de heredar la cancelación
+            if isinstance(call.error, asyncio.CancelledError):
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+    def in_flight(self) -> int:
+        return len(self._calls)
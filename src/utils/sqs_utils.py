@@ -3,12 +3,52 @@ from botocore.exceptions import ClientError
 import logging
 import json
 import os
+import zlib
 
 logger = logging.getLogger(__name__)
 
 sqs_client = boto3.client("sqs")
 SQS_QUEUE_URL = os.getenv("SQS_QUEUE_URL")
 
+# Estrategia de MessageGroupId en la cola FIFO. SQS entrega en orden y de a un
+# mensaje a la vez dentro de cada grupo, así que el número de grupos activos limita
+# cuántos workers pueden procesar en paralelo:
+#   global  -> un único grupo: todo se procesa en serie
+#   owner   -> un grupo por jugador: conserva el orden de los videos de cada jugador
+#   sharded -> jugadores repartidos por hash en SQS_GROUP_SHARDS grupos
+#   video   -> un grupo por video: máximo paralelismo, sin garantías de orden
+SQS_GROUP_STRATEGIES = ("global", "owner", "sharded", "video")
+SQS_GROUP_STRATEGY = os.getenv("SQS_GROUP_STRATEGY", "owner")
+SQS_GROUP_SHARDS = int(os.getenv("SQS_GROUP_SHARDS", 32))
+
+
+def _check_strategy(strategy: str) -> str:
+    # Un error de tipeo no debe serializar toda la cola en el grupo global
+    if strategy not in SQS_GROUP_STRATEGIES:
+        raise ValueError(
+            f"SQS_GROUP_STRATEGY inválida: {strategy!r}. Valores permitidos: {', '.join(SQS_GROUP_STRATEGIES)}."
+        )
+    return strategy
+
+
+_check_strategy(SQS_GROUP_STRATEGY)
+
+
+def message_group_id(message: dict, strategy: str | None = None, shards: int | None = None) -> str:
+    """Calcula el MessageGroupId de un mensaje de procesamiento según la estrategia."""
+    strategy = _check_strategy(strategy or SQS_GROUP_STRATEGY)
+    shards = shards or SQS_GROUP_SHARDS
+    owner_id = message.get("owner_id")
+
+    if strategy == "video":
+        return f"video-{message.get('id')}"
+    if strategy == "owner" and owner_id is not None:
+        return f"owner-{owner_id}"
+    if strategy == "sharded" and owner_id is not None:
+        # crc32 es estable entre procesos (a diferencia de hash())
+        return f"shard-{zlib.crc32(str(owner_id).encode()) % shards}"
+    return "video-processing"
+
 
 def send_to_sqs(message: dict) -> bool:
     """
@@ -19,7 +59,7 @@ def send_to_sqs(message: dict) -> bool:
         sqs_client.send_message(
             QueueUrl=SQS_QUEUE_URL,
             MessageBody=json.dumps(message),
-            MessageGroupId="video-processing",
+            MessageGroupId=message_group_id(message),
             MessageDeduplicationId=str(message.get("id")),
         )
         logger.info("Mensaje enviado a SQS correctamente.")
@@ -86,3 +126,35 @@ def delete_from_sqs(receipt_handle: str) -> bool:
     except ClientError as e:
         logger.error(f" Error eliminando mensaje de SQS: {e}")
         return False
+
+
+def send_batch_to_sqs(messages: list[dict]) -> set[int]:
+    """
+    Envía hasta 10 mensajes en una sola llamada SendMessageBatch.
+    Retorna los índices (posición en `messages`) que SQS aceptó;
+    los demás deben reintentarse.
+    """
+    if not messages:
+        return set()
+    try:
+        response = sqs_client.send_message_batch(
+            QueueUrl=SQS_QUEUE_URL,
+            Entries=[
+                {
+                    "Id": str(i),
+                    "MessageBody": json.dumps(message),
+                    "MessageGroupId": message_group_id(message),
+                    "MessageDeduplicationId": str(message.get("id")),
+                }
+                for i, message in enumerate(messages)
+            ],
+        )
+    except ClientError as e:
+        logger.error(f"Error enviando lote a SQS: {e}")
+        return set()
+
+    for failed in response.get("Failed", []):
+        logger.error(f"SQS rechazó el mensaje {failed['Id']}: {failed.get('Message')}")
+    sent = {int(entry["Id"]) for entry in response.get("Successful", [])}
+    logger.info(f"{len(sent)}/{len(messages)} mensaje(s) enviados a SQS en lote.")
+    return sent
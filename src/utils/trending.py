@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import case, delete, desc, func, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from src.db.database import SessionLocal
+from src.models.db_models import Usuario, Video, VoteBucket
+
+logger = logging.getLogger(__name__)
+
+# Los buckets por hora se conservan este tiempo (debe cubrir la ventana "day" completa);
+# después se suman a su bucket diario y se borran
+TRENDING_HOURLY_RETENTION_HOURS = int(os.getenv("TRENDING_HOURLY_RETENTION_HOURS", 48))
+TRENDING_DAILY_RETENTION_DAYS = int(os.getenv("TRENDING_DAILY_RETENTION_DAYS", 30))
+TRENDING_COMPACT_INTERVAL = float(os.getenv("TRENDING_COMPACT_INTERVAL", 3600))
+
+HOUR = "hour"
+DAY = "day"
+
+# Ventanas deslizantes disponibles en /api/public/rankings/trending
+TRENDING_WINDOWS = {
+    "day": timedelta(hours=24),
+    "week": timedelta(days=7),
+}
+
+VOTE_BUCKETS_COMPACTED = Counter("vote_buckets_compacted_total", "Buckets por hora sumados a su bucket diario")
+VOTE_BUCKETS_EXPIRED = Counter("vote_buckets_expired_total", "Buckets diarios borrados por antigüedad")
+VOTE_BUCKETS_COMPACT_SECONDS = Histogram("vote_buckets_compact_seconds", "Duración de la compactación de buckets")
+
+
+def hour_start(ts: datetime) -> datetime:
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(ts: datetime) -> datetime:
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _insert_for(db: Session):
+    return pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+
+
+def _add_to_bucket(stmt):
+    """Si el bucket del video ya existe, suma los votos en vez de insertar."""
+    return stmt.on_conflict_do_update(
+        index_elements=["granularity", "bucket_start", "video_id"],
+        set_={"votes": VoteBucket.votes + stmt.excluded.votes},
+    )
+
+
+def record_votes_statement(insert, deltas: dict[int, int], at: datetime | None = None, when=None):
+    """
+    INSERT ... SELECT ... ON CONFLICT DO UPDATE que suma los votos de cada video a su bucket
+    de la hora actual (el dueño se toma de videos). Con `when`, solo si la condición se
+    cumple (p. ej. que el CTE del voto haya insertado la fila).
+    """
+    start = hour_start(at or datetime.now(timezone.utc))
+    rows = select(
+        literal(HOUR),
+        literal(start, VoteBucket.bucket_start.type),
+        Video.id,
+        Video.owner_id,
+        case(deltas, value=Video.id, else_=0),
+    ).where(Video.id.in_(sorted(deltas)), Video.owner_id.isnot(None))
+    if when is not None:
+        rows = rows.where(when)
+    stmt = insert(VoteBucket).from_select(
+        ["granularity", "bucket_start", "video_id", "owner_id", "votes"], rows
+    )
+    return _add_to_bucket(stmt)
+
+
+def record_votes(db: Session, deltas: dict[int, int], at: datetime | None = None):
+    """Suma los votos de cada video a su bucket de la hora actual en una sola sentencia. No hace commit."""
+    if not deltas:
+        return
+    db.execute(record_votes_statement(_insert_for(db), deltas, at))
+
+
+def trending_query(db: Session, window: str, now: datetime | None = None):
+    """
+    Votos por jugador en la ventana: buckets por hora desde el inicio de la ventana más
+    los diarios ya compactados. Resolución de una hora (un día en la parte compactada).
+    Retorna (query, total) con las mismas etiquetas que el ranking histórico.
+    """
+    since = (now or datetime.now(timezone.utc)) - TRENDING_WINDOWS[window]
+    buckets = union_all(
+        select(VoteBucket.owner_id, VoteBucket.votes).where(
+            VoteBucket.granularity == HOUR, VoteBucket.bucket_start >= hour_start(since)
+        ),
+        select(VoteBucket.owner_id, VoteBucket.votes).where(
+            VoteBucket.granularity == DAY, VoteBucket.bucket_start >= day_start(since)
+        ),
+    ).subquery()
+    total = func.sum(buckets.c.votes)
+    query = (
+        db.query(Usuario.id, Usuario.first_name.label("jugador"), total.label("votos_periodo"))
+        .join(buckets, buckets.c.owner_id == Usuario.id)
+        .group_by(Usuario.id)
+    )
+    return query, total
+
+
+def trending_page(db: Session, window: str, skip: int, limit: int, now: datetime | None = None) -> list[dict]:
+    query, total = trending_query(db, window, now)
+    return [
+        {"jugador": r.jugador, "votos_periodo": r.votos_periodo}
+        for r in query.order_by(desc(total), Usuario.id).offset(skip).limit(limit).all()
+    ]
+
+
+def compact_vote_buckets(db: Session, now: datetime | None = None) -> int:
+    """
+    Suma los buckets por hora más antiguos que la retención a su bucket diario y borra
+    los diarios vencidos. El DELETE ... RETURNING reclama las filas, así que dos
+    compactaciones simultáneas no cuentan dos veces. Retorna los buckets compactados.
+    """
+    now = now or datetime.now(timezone.utc)
+    boundary = hour_start(now - timedelta(hours=TRENDING_HOURLY_RETENTION_HOURS))
+    with VOTE_BUCKETS_COMPACT_SECONDS.time():
+        claimed = db.execute(
+            delete(VoteBucket)
+            .where(VoteBucket.granularity == HOUR, VoteBucket.bucket_start < boundary)
+            .returning(VoteBucket.bucket_start, VoteBucket.video_id, VoteBucket.owner_id, VoteBucket.votes)
+        ).all()
+
+        daily = defaultdict(int)
+        for bucket, video_id, owner_id, votes in claimed:
+            daily[(day_start(bucket), video_id, owner_id)] += votes
+        if daily:
+            stmt = _insert_for(db)(VoteBucket).values([
+                {"granularity": DAY, "bucket_start": day, "video_id": video_id, "owner_id": owner_id, "votes": votes}
+                for (day, video_id, owner_id), votes in sorted(daily.items())
+            ])
+            db.execute(_add_to_bucket(stmt))
+
+        expired = db.execute(
+            delete(VoteBucket).where(
+                VoteBucket.granularity == DAY,
+                VoteBucket.bucket_start < day_start(now - timedelta(days=TRENDING_DAILY_RETENTION_DAYS)),
+            )
+        ).rowcount
+        db.commit()
+
+    VOTE_BUCKETS_COMPACTED.inc(len(claimed))
+    VOTE_BUCKETS_EXPIRED.inc(expired)
+    return len(claimed)
+
+
+def _compact_step():
+    db = SessionLocal()
+    try:
+        return compact_vote_buckets(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def run_trending_compaction():
+    """Compacta los buckets de votos cada TRENDING_COMPACT_INTERVAL dentro del lifespan de la API."""
+    from src.utils.executors import io_pool
+
+    while True:
+        try:
+            compacted = await io_pool.run(_compact_step)
+            if compacted:
+                logger.info(f"Buckets de votos compactados: {compacted}")
+        except Exception as e:
+            logger.error(f"Error compactando buckets de votos: {e}")
+        await asyncio.sleep(TRENDING_COMPACT_INTERVAL)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    logger.info(f"Buckets compactados: {_compact_step()}")
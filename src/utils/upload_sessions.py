@@ -0,0 +1,128 @@
+import fcntl
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+# Sesiones de carga reanudable: los bytes parciales y los metadatos se guardan en disco local
+UPLOAD_SESSIONS_DIR = Path(os.getenv("UPLOAD_SESSIONS_DIR", "videos/upload-sessions"))
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", 24 * 3600))
+PURGE_INTERVAL = int(os.getenv("UPLOAD_SESSION_PURGE_INTERVAL", 600))
+
+_last_purge = 0.0
+
+
+def data_path(upload_id: str) -> Path:
+    return UPLOAD_SESSIONS_DIR / f"{upload_id}.part"
+
+
+def _meta_path(upload_id: str) -> Path:
+    return UPLOAD_SESSIONS_DIR / f"{upload_id}.json"
+
+
+def _lock_path(upload_id: str) -> Path:
+    return UPLOAD_SESSIONS_DIR / f"{upload_id}.lock"
+
+
+def save_session(session: dict):
+    """Guarda los metadatos de forma atómica (escritura a temporal + rename)."""
+    path = _meta_path(session["upload_id"])
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(session))
+    os.replace(tmp, path)
+
+
+def create_session(owner_id: int, title: str, filename: str, size: int) -> dict:
+    """Crea una sesión de carga vacía y retorna sus metadatos."""
+    UPLOAD_SESSIONS_DIR.mkdir(parents=True, exist_ok=True)
+    maybe_purge_expired()
+
+    now = time.time()
+    session = {
+        "upload_id": uuid4().hex,
+        "owner_id": owner_id,
+        "title": title,
+        "filename": filename,
+        "size": size,
+        "offset": 0,
+        "created_at": now,
+        "expires_at": now + UPLOAD_SESSION_TTL,
+        # checksum de cada bloque recibido, por offset, para reintentos idempotentes
+        "chunks": {},
+        # resultado de la inspección de la cabecera MP4: None, "deferred" o [dur, w, h]
+        "header": None,
+    }
+    data_path(session["upload_id"]).touch()
+    save_session(session)
+    return session
+
+
+def load_session(upload_id: str) -> dict | None:
+    """Retorna la sesión, o None si no existe o ya expiró (en cuyo caso se elimina)."""
+    if not upload_id.isalnum():
+        return None
+    try:
+        session = json.loads(_meta_path(upload_id).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if session["expires_at"] < time.time():
+        delete_session(upload_id)
+        return None
+    return session
+
+
+def delete_session(upload_id: str):
+    for path in (data_path(upload_id), _meta_path(upload_id), _lock_path(upload_id)):
+        path.unlink(missing_ok=True)
+
+
+def purge_expired_sessions(now: float | None = None) -> int:
+    """Elimina las sesiones abandonadas cuyo plazo ya venció. Retorna cuántas eliminó."""
+    now = now or time.time()
+    purged = 0
+    for meta in UPLOAD_SESSIONS_DIR.glob("*.json"):
+        try:
+            expires_at = json.loads(meta.read_text())["expires_at"]
+        except (OSError, ValueError, KeyError):
+            continue
+        if expires_at < now:
+            delete_session(meta.stem)
+            purged += 1
+    if purged:
+        logger.info(f"{purged} sesión(es) de carga expiradas eliminadas.")
+    return purged
+
+
+def maybe_purge_expired():
+    """Purga sesiones expiradas como máximo una vez cada PURGE_INTERVAL segundos."""
+    global _last_purge
+    if time.time() - _last_purge >= PURGE_INTERVAL:
+        _last_purge = time.time()
+        purge_expired_sessions()
+
+
+def acquire_write(upload_id: str) -> int | None:
+    """
+    Bloquea la sesión para escribir un bloque con un flock sobre un archivo junto al .part,
+    válido entre workers y contenedores que comparten el directorio (el sistema lo libera
+    si el proceso muere). Retorna el descriptor a pasar a release_write, o None si ya hay
+    otra escritura en curso.
+    """
+    fd = os.open(_lock_path(upload_id), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def release_write(fd: int):
+    try:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
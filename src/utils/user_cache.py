@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from prometheus_client import Counter, Gauge
+
+from src.utils.events import USER_CHANGED, event_bus
+
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 60))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", 10000))
+# Tras un cambio, los claims de los tokens ya emitidos dejan de ser confiables
+# durante la vigencia de un token (ver AUTH_TRUST_TOKEN_CLAIMS)
+USER_CHANGE_WINDOW = float(os.getenv("USER_CHANGE_WINDOW", 30 * 60))
+
+CACHE_HITS = Counter("user_cache_hits_total", "Usuarios autenticados resueltos desde la caché")
+CACHE_MISSES = Counter("user_cache_misses_total", "Usuarios autenticados que requirieron consulta a la BD")
+CACHE_EVICTIONS = Counter("user_cache_evictions_total", "Entradas expulsadas de la caché por tamaño")
+CACHE_SIZE = Gauge("user_cache_entries", "Entradas actuales en la caché de usuarios")
+
+
+class CachedUser:
+    """Copia inmutable de los datos del usuario; no depende de una sesión de SQLAlchemy."""
+
+    __slots__ = ("id", "first_name", "last_name", "email", "city", "country")
+
+    def __init__(self, id, email, first_name=None, last_name=None, city=None, country=None):
+        self.id = id
+        self.email = email
+        self.first_name = first_name
+        self.last_name = last_name
+        self.city = city
+        self.country = country
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(
+            id=user.id,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            city=user.city,
+            country=user.country,
+        )
+
+
+class TTLCache:
+    """Caché LRU con expiración por entrada, segura entre hilos."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                CACHE_MISSES.inc()
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                CACHE_SIZE.set(len(self._data))
+                CACHE_MISSES.inc()
+                return None
+            self._data.move_to_end(key)
+            CACHE_HITS.inc()
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                CACHE_EVICTIONS.inc()
+            CACHE_SIZE.set(len(self._data))
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            CACHE_SIZE.set(len(self._data))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            CACHE_SIZE.set(0)
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Usuarios resueltos por get_current_user, indexados por el "sub" del token (email)
+user_cache = TTLCache(USER_CACHE_MAX_SIZE, USER_CACHE_TTL)
+
+
+# email -> instante (monotónico) hasta el que sus claims no son confiables
+_changed_users: dict[str, float] = {}
+_changed_lock = threading.Lock()
+
+
+def recently_changed(email: str) -> bool:
+    with _changed_lock:
+        until = _changed_users.get(email)
+        return until is not None and until > time.monotonic()
+
+
+def _on_user_event(event: dict):
+    if event.get("type") != USER_CHANGED:
+        return
+    email = event["email"]
+    now = time.monotonic()
+    with _changed_lock:
+        for key in [k for k, until in _changed_users.items() if until <= now]:
+            del _changed_users[key]
+        _changed_users[email] = now + USER_CHANGE_WINDOW
+    user_cache.invalidate(email)
+
+
+event_bus.subscribe(_on_user_event)
+
+
+def invalidate_user(email: str):
+    """
+    Debe llamarse cuando cambian los datos de un usuario (después del commit).
+    Se difunde por el bus de eventos para que todas las instancias lo saquen de su caché.
+    """
+    event_bus.publish(USER_CHANGED, email=email)
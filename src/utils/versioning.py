@@ -0,0 +1,156 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+from prometheus_client import Counter
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from src.models.db_models import DataVersionSlot
+
+# Cada cuánto se vuelve a leer la versión de la BD (cambios de otras instancias y del worker)
+VERSION_POLL_INTERVAL = float(os.getenv("VERSION_POLL_INTERVAL", 1.0))
+# Filas del contador: las escrituras concurrentes incrementan filas distintas
+DATA_VERSION_SLOTS = int(os.getenv("DATA_VERSION_SLOTS", 16))
+PUBLIC_CACHE_MAX_AGE = int(os.getenv("PUBLIC_CACHE_MAX_AGE", 5))
+
+# nginx/CDN pueden servir la respuesta unos segundos y luego revalidarla con If-None-Match
+PUBLIC_CACHE_CONTROL = f"public, max-age={PUBLIC_CACHE_MAX_AGE}, stale-while-revalidate={PUBLIC_CACHE_MAX_AGE * 6}"
+# Datos del usuario autenticado: solo caché del navegador y siempre revalidando
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+NOT_MODIFIED = Counter("http_not_modified_total", "Respuestas 304 por endpoint", ["endpoint"])
+
+
+def _insert_for(db: Session):
+    return pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+
+
+def bump_statement(insert, key: int = 0, when=None):
+    """
+    INSERT ... ON CONFLICT DO UPDATE que suma 1 al slot de `key`. Con `when`, solo si la
+    condición se cumple (p. ej. que el CTE del voto haya insertado la fila).
+    """
+    rows = select(literal(key % DATA_VERSION_SLOTS), literal(1))
+    # SQLite exige un WHERE en el SELECT de un upsert
+    rows = rows.where(when if when is not None else literal(True))
+    stmt = insert(DataVersionSlot).from_select(["slot", "version"], rows)
+    return stmt.on_conflict_do_update(index_elements=["slot"], set_={"version": DataVersionSlot.version + 1})
+
+
+def bump_data_version(db: Session, key: int = 0):
+    """
+    Marca un cambio de los datos públicos. Debe ejecutarse en la misma transacción que el
+    cambio, así la nueva versión es visible exactamente cuando lo es el cambio. No hace commit.
+    """
+    db.execute(bump_statement(_insert_for(db), key))
+
+
+class DataVersion:
+    """
+    Versión de los datos públicos (videos procesados y votes_count): la suma de los slots
+    de data_versions. Cada transacción que cambia esos datos suma 1 al confirmarse, así que
+    dos lecturas con la misma suma vieron los mismos cambios, sin importar en qué orden se
+    confirmaron. Se relee como mucho cada VERSION_POLL_INTERVAL, o de inmediato tras un
+    evento (invalidate), así todas las instancias generan el mismo ETag.
+    """
+
+    def __init__(self, poll_interval: float = VERSION_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        self._checked_at = 0.0
+
+    def current(self, db: Session) -> str:
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.poll_interval:
+            return self._version
+        # Sin esperar el lock: con la sesión async, la consulta cede el event loop a otras
+        # peticiones y bloquearse aquí lo congelaría. Si otra ya está releyendo, se usa
+        # la versión anterior
+        acquired = self._lock.acquire(blocking=False)
+        if not acquired and self._version is not None:
+            return self._version
+        try:
+            total = db.execute(select(func.coalesce(func.sum(DataVersionSlot.version), 0))).scalar()
+            self._version = str(total)
+            self._checked_at = time.monotonic()
+            return self._version
+        finally:
+            if acquired:
+                self._lock.release()
+
+
+data_version = DataVersion()
+
+
+def make_etag(*parts) -> str:
+    """ETag fuerte a partir de la versión de los datos y los parámetros de la petición."""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    candidates = (c.strip() for c in header.split(","))
+    return any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def _as_utc(value):
+    """Las fechas sin zona horaria se consideran UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _not_modified_since(header: str, last_modified) -> bool:
+    try:
+        since = _as_utc(parsedate_to_datetime(header))
+    except (TypeError, ValueError):
+        return False
+    return _as_utc(last_modified).replace(microsecond=0) <= since
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    endpoint: str,
+    etag: str,
+    cache_control: str,
+    last_modified=None,
+) -> Response | None:
+    """
+    Agrega ETag/Cache-Control (y Last-Modified) a la respuesta. Si el cliente ya tiene
+    esta versión retorna un 304 listo para devolver; si no, None.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if not isinstance(last_modified, datetime):
+        last_modified = None
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    if cache_control.startswith("private"):
+        headers["Vary"] = "Authorization"
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, etag)
+    elif last_modified is not None and "if-modified-since" in request.headers:
+        fresh = _not_modified_since(request.headers["if-modified-since"], last_modified)
+    else:
+        fresh = False
+
+    if not fresh:
+        return None
+    NOT_MODIFIED.labels(endpoint).inc()
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import os
+import threading
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from src.db.database import SessionLocal
+from src.models.db_models import Video, Vote
+from src.utils.events import VOTE, publish_event
+from src.utils.trending import record_votes
+from src.utils.versioning import bump_data_version
+
+logger = logging.getLogger(__name__)
+
+# Escritura diferida de votes_count: los votos se insertan de inmediato, pero los
+# incrementos se agregan en memoria y se aplican en lotes (un UPDATE por lote)
+VOTE_WRITE_BEHIND = os.getenv("VOTE_WRITE_BEHIND", "false").lower() == "true"
+VOTE_FLUSH_INTERVAL = float(os.getenv("VOTE_FLUSH_INTERVAL", 0.5))
+# Incrementos pendientes (sumando todos los videos) que adelantan el siguiente flush
+VOTE_FLUSH_THRESHOLD = int(os.getenv("VOTE_FLUSH_THRESHOLD", 500))
+
+VOTE_BUFFER_PENDING = Gauge("vote_buffer_pending", "Incrementos de votos pendientes de aplicar")
+VOTE_BUFFER_FLUSHES = Counter("vote_buffer_flushes_total", "Lotes de incrementos aplicados a la BD")
+VOTE_BUFFER_FLUSH_FAILURES = Counter("vote_buffer_flush_failures_total", "Lotes de incrementos fallidos")
+VOTE_BUFFER_FLUSH_SECONDS = Histogram("vote_buffer_flush_seconds", "Duración del UPDATE por lote")
+VOTE_BUFFER_BATCH_VIDEOS = Histogram(
+    "vote_buffer_batch_videos", "Videos distintos por lote", buckets=(1, 2, 5, 10, 25, 50, 100, 250, 1000)
+)
+
+
+class VoteBuffer:
+    """Incrementos de votes_count pendientes por video, seguro entre hilos."""
+
+    def __init__(self, threshold: int = VOTE_FLUSH_THRESHOLD):
+        self.threshold = threshold
+        self._pending: dict[int, int] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+
+    def add(self, video_id: int, delta: int = 1) -> int:
+        """Acumula el incremento y retorna el pendiente del video (incluido este)."""
+        with self._lock:
+            pending = self._pending.get(video_id, 0) + delta
+            self._pending[video_id] = pending
+            self._total += delta
+            full = self._total >= self.threshold
+        VOTE_BUFFER_PENDING.inc(delta)
+        if full and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return pending
+
+    def pending(self, video_id: int) -> int:
+        return self._pending.get(video_id, 0)
+
+    def drain(self) -> dict[int, int]:
+        with self._lock:
+            deltas, self._pending, self._total = self._pending, {}, 0
+        VOTE_BUFFER_PENDING.dec(sum(deltas.values()))
+        return deltas
+
+    def restore(self, deltas: dict[int, int]):
+        """Devuelve al buffer un lote que no se pudo aplicar."""
+        for video_id, delta in deltas.items():
+            self.add(video_id, delta)
+
+    def __len__(self):
+        return self._total
+
+
+vote_buffer = VoteBuffer()
+
+
+def apply_increments(db: Session, deltas: dict[int, int]):
+    """
+    Aplica todos los incrementos en un único UPDATE ... CASE y avanza la versión de los
+    datos públicos en la misma transacción (los ETag y la caché de respuestas dependen
+    de ella). No hace commit.
+    """
+    if not deltas:
+        return
+    ids = sorted(deltas)
+    db.execute(
+        update(Video)
+        .where(Video.id.in_(ids))
+        .values(votes_count=func.coalesce(Video.votes_count, 0) + case(deltas, value=Video.id, else_=0))
+        .execution_options(synchronize_session=False)
+    )
+    bump_data_version(db, ids[0])
+
+
+def flush_votes(buffer: VoteBuffer = vote_buffer) -> int:
+    """
+    Vacía el buffer en la BD (votes_count y buckets de votos por hora). Si falla, los
+    incrementos vuelven al buffer. Retorna los aplicados.
+    """
+    deltas = buffer.drain()
+    if not deltas:
+        return 0
+    db = SessionLocal()
+    try:
+        with VOTE_BUFFER_FLUSH_SECONDS.time():
+            apply_increments(db, deltas)
+            record_votes(db, deltas)
+            db.commit()
+    except Exception as e:
+        db.rollback()
+        buffer.restore(deltas)
+        VOTE_BUFFER_FLUSH_FAILURES.inc()
+        logger.error(f"Error aplicando incrementos de votos: {e}")
+        return 0
+    finally:
+        db.close()
+    # Los contadores persistidos cambiaron: invalida listados aquí y en las demás instancias
+    publish_event(VOTE, video_ids=sorted(deltas))
+    VOTE_BUFFER_FLUSHES.inc()
+    VOTE_BUFFER_BATCH_VIDEOS.observe(len(deltas))
+    return sum(deltas.values())
+
+
+async def run_vote_flusher(buffer: VoteBuffer = vote_buffer):
+    """Aplica el buffer cada VOTE_FLUSH_INTERVAL, o antes si se supera VOTE_FLUSH_THRESHOLD."""
+    from src.utils.executors import io_pool
+
+    buffer._loop = asyncio.get_running_loop()
+    buffer._wakeup = asyncio.Event()
+    logger.info("Escritura diferida de votos activa.")
+    try:
+        while True:
+            try:
+                await asyncio.wait_for(buffer._wakeup.wait(), timeout=VOTE_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            buffer._wakeup.clear()
+            try:
+                await io_pool.run(flush_votes, buffer)
+            except Exception as e:
+                # Pool saturado: flush_votes no llegó a vaciar el buffer, se reintenta
+                # en el siguiente ciclo con los incrementos intactos
+                VOTE_BUFFER_FLUSH_FAILURES.inc()
+                logger.error(f"Error aplicando incrementos de votos: {e}")
+    finally:
+        buffer._loop = None
+        # Último flush al apagar la API para no dejar incrementos en memoria
+        flush_votes(buffer)
+
+
+def reconcile_vote_counts(db: Session) -> int:
+    """
+    Recalcula votes_count desde la tabla votes (fuente de verdad) tras una caída con
+    incrementos sin aplicar. Solo es seguro con todas las instancias de la API detenidas.
+    """
+    counted = select(func.count(Vote.id)).where(Vote.video_id == Video.id).scalar_subquery()
+    result = db.execute(
+        update(Video)
+        .where(func.coalesce(Video.votes_count, 0) != counted)
+        .values(votes_count=counted)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        bump_data_version(db)
+    db.commit()
+    return result.rowcount
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        logger.info(f"Videos corregidos: {reconcile_vote_counts(db)}")
+    finally:
+        db.close()
@@ -0,0 +1,73 @@
+from sqlalchemy import exists, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from src.models.db_models import Video, Vote
+from src.utils.trending import record_votes, record_votes_statement
+from src.utils.versioning import bump_data_version, bump_statement
+
+
+def _insert_vote(insert, video_id: int, user_id: int):
+    """INSERT del voto solo si el video es público; el duplicado se descarta por uq_votes_video_user."""
+    votable = select(literal(video_id), literal(user_id)).where(
+        exists().where(Video.id == video_id, Video.status == "processed")
+    )
+    return (
+        insert(Vote)
+        .from_select(["video_id", "user_id"], votable)
+        .on_conflict_do_nothing(index_elements=["video_id", "user_id"])
+        .returning(Vote.video_id)
+    )
+
+
+def _increment(video_filter):
+    return (
+        update(Video)
+        .where(video_filter)
+        .values(votes_count=func.coalesce(Video.votes_count, 0) + 1)
+        .returning(Video.id, Video.votes_count, Video.owner_id)
+    )
+
+
+def _current(video_filter):
+    return select(Video.id, Video.votes_count, Video.owner_id).where(video_filter)
+
+
+def cast_vote(db: Session, video_id: int, user_id: int, increment: bool = True):
+    """
+    Registra el voto e incrementa votes_count, el bucket de la hora (rankings por ventana)
+    y la versión de los datos públicos de forma atómica, sin leer antes el video.
+    Con increment=False solo inserta el voto (los incrementos los aplica el buffer de
+    escritura diferida) y retorna el votes_count persistido.
+    Retorna la fila (id, votes_count, owner_id) del video, o None si el voto no se
+    registró (el video no es público o el usuario ya había votado). No hace commit.
+    """
+    then = _increment if increment else _current
+    if db.get_bind().dialect.name == "postgresql":
+        # Un solo viaje a la BD: el UPDATE solo ocurre si el INSERT insertó la fila
+        inserted = _insert_vote(pg_insert, video_id, user_id).cte("inserted_vote")
+        stmt = then(Video.id == inserted.c.video_id)
+        if increment:
+            voted = exists().where(inserted.c.video_id == video_id)
+            stmt = stmt.add_cte(
+                record_votes_statement(pg_insert, {video_id: 1}, when=voted).cte("vote_bucket"),
+                bump_statement(pg_insert, video_id, when=voted).cte("bumped_version"),
+            )
+        return db.execute(stmt).first()
+
+    # SQLite no admite DML dentro de un CTE; la escritura igual es atómica en la transacción
+    if db.execute(_insert_vote(sqlite_insert, video_id, user_id)).first() is None:
+        return None
+    if increment:
+        record_votes(db, {video_id: 1})
+        bump_data_version(db, video_id)
+    return db.execute(then(Video.id == video_id)).first()
+
+
+def vote_rejection_reason(db: Session, video_id: int) -> str:
+    """Solo se consulta cuando cast_vote no registró el voto: 'not_found' o 'already_voted'."""
+    is_public = db.query(
+        exists().where(Video.id == video_id, Video.status == "processed")
+    ).scalar()
+    return "already_voted" if is_public else "not_found"
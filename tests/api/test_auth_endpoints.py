@@ -1,8 +1,11 @@
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
 from jose import jwt
 from src.main import app
 from src.routers import auth_router
+from tests.fakes import FakeAsyncSession
 
 client = TestClient(app)
 SECRET_KEY = auth_router.SECRET_KEY
@@ -43,7 +46,7 @@ def test_signup_duplicate_email():
         def first(self): return FakeUser()
 
     # override dependency properly
-    app.dependency_overrides[auth_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[auth_router.get_db] = lambda: FakeAsyncSession(FakeDB())
 
     data = {
         "first_name": "Leo",
@@ -74,7 +77,7 @@ def test_login_user_not_found():
         def filter(self, *args, **kwargs): return self
         def first(self): return None
 
-    app.dependency_overrides[auth_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[auth_router.get_db] = lambda: FakeAsyncSession(FakeDB())
 
     data = {"email": "no@existe.com", "password": "1234"}
     r = client.post("/api/auth/login", json=data)
@@ -100,7 +103,7 @@ def test_login_wrong_password():
         def filter(self, *args, **kwargs): return self
         def first(self): return FakeUser()
 
-    app.dependency_overrides[auth_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[auth_router.get_db] = lambda: FakeAsyncSession(FakeDB())
 
     data = {"email": "user@correo.com", "password": "zzz999"}
     r = client.post("/api/auth/login", json=data)
@@ -118,15 +121,19 @@ def test_login_success():
     """Debe devolver un token si las credenciales son correctas"""
 
     class FakeUser:
+        id = 1
         email = "user@correo.com"
         password = "abc123"
 
+    user = FakeUser()
+
     class FakeDB:
         def query(self, model): return self
         def filter(self, *args, **kwargs): return self
-        def first(self): return FakeUser()
+        def first(self): return user
+        def commit(self): ...
 
-    app.dependency_overrides[auth_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[auth_router.get_db] = lambda: FakeAsyncSession(FakeDB())
 
     data = {"email": "user@correo.com", "password": "abc123"}
     r = client.post("/api/auth/login", json=data)
@@ -138,6 +145,9 @@ def test_login_success():
     assert "access_token" in body
     payload = jwt.decode(body["access_token"], SECRET_KEY, algorithms=[ALGORITHM])
     assert payload["sub"] == "user@correo.com"
+    assert payload["uid"] == 1
+    # La contraseña legada en texto plano se reemplaza por su hash bcrypt
+    assert user.password.startswith("$2b$")
 
 
 # ---------------------------------------------------------------------
@@ -170,7 +180,7 @@ def test_get_current_user_not_found(monkeypatch):
 
     from fastapi import HTTPException
     with pytest.raises(HTTPException) as excinfo:
-        get_current_user(fake_token, FakeDB())
+        asyncio.run(get_current_user(fake_token, FakeAsyncSession(FakeDB())))
     assert excinfo.value.status_code == 401
     
     # ---------------------------------------------------------------------
@@ -195,7 +205,7 @@ def test_signup_success(monkeypatch):
         def refresh(self, obj): pass
 
     db = FakeDB()
-    app.dependency_overrides[auth_router.get_db] = lambda: db
+    app.dependency_overrides[auth_router.get_db] = lambda: FakeAsyncSession(db)
 
     data = {
         "first_name": "Leo",
@@ -217,6 +227,7 @@ def test_signup_success(monkeypatch):
     assert body["id"] == 1
     assert db.committed is True
     assert db.user_created.email == "nuevo@uniandes.edu.co"
+    assert db.user_created.password != "abc123"
 
 # ---------------------------------------------------------------------
 # 9️⃣ verify_token – Token válido
@@ -230,4 +241,82 @@ def test_verify_token_valid(monkeypatch):
     token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
     username = verify_token(token)
-    assert username == "user@correo.com"
\ No newline at end of file
+    assert username == "user@correo.com"
+
+
+# ---------------------------------------------------------------------
+# 🔟 get_current_user – Caché de usuarios autenticados
+# ---------------------------------------------------------------------
+def _counting_db():
+    class FakeUser:
+        id = 7
+        first_name = "Leo"
+        last_name = "Rangel"
+        email = "cache@correo.com"
+        city = "Bogotá"
+        country = "Colombia"
+
+    class FakeDB:
+        queries = 0
+        def query(self, model):
+            FakeDB.queries += 1
+            return self
+        def filter(self, *args, **kwargs): return self
+        def first(self): return FakeUser()
+
+    return FakeDB()
+
+
+def test_get_current_user_uses_cache():
+    """La segunda petición con el mismo token no consulta la BD"""
+    from src.utils.user_cache import user_cache, invalidate_user
+
+    user_cache.clear()
+    token = jwt.encode({"sub": "cache@correo.com"}, SECRET_KEY, algorithm=ALGORITHM)
+    db = _counting_db()
+
+    first = asyncio.run(auth_router.get_current_user(token, FakeAsyncSession(db)))
+    second = asyncio.run(auth_router.get_current_user(token, FakeAsyncSession(db)))
+    assert first.id == second.id == 7
+    assert type(db).queries == 1
+
+    invalidate_user("cache@correo.com")
+    asyncio.run(auth_router.get_current_user(token, FakeAsyncSession(db)))
+    assert type(db).queries == 2
+    user_cache.clear()
+
+
+def test_get_current_user_trusted_claims(monkeypatch):
+    """Con AUTH_TRUST_TOKEN_CLAIMS el uid del token evita la consulta"""
+    from src.utils.user_cache import user_cache
+
+    user_cache.clear()
+    monkeypatch.setattr(auth_router, "AUTH_TRUST_TOKEN_CLAIMS", True)
+    token = jwt.encode({"sub": "claims@correo.com", "uid": 42}, SECRET_KEY, algorithm=ALGORITHM)
+    db = _counting_db()
+
+    user = asyncio.run(auth_router.get_current_user(token, FakeAsyncSession(db)))
+    assert user.id == 42
+    assert type(db).queries == 0
+
+
+def test_user_change_from_other_instance_invalidates_cache(monkeypatch):
+    """Un cambio difundido por otra instancia saca al usuario de la caché y anula los claims"""
+    from src.utils import user_cache as user_cache_module
+    from src.utils.events import USER_CHANGED
+
+    user_cache_module.user_cache.clear()
+    monkeypatch.setattr(user_cache_module, "_changed_users", {})
+    monkeypatch.setattr(auth_router, "AUTH_TRUST_TOKEN_CLAIMS", True)
+    token = jwt.encode({"sub": "otra@correo.com", "uid": 42}, SECRET_KEY, algorithm=ALGORITHM)
+    db = _counting_db()
+    user_cache_module.user_cache.set("otra@correo.com", user_cache_module.CachedUser(id=42, email="otra@correo.com"))
+
+    # Evento recibido por el canal de Redis, no publicado en este proceso
+    user_cache_module._on_user_event({"type": USER_CHANGED, "origin": "otra", "email": "otra@correo.com"})
+    assert user_cache_module.user_cache.get("otra@correo.com") is None
+
+    user = asyncio.run(auth_router.get_current_user(token, FakeAsyncSession(db)))
+    assert user.id == 7
+    assert type(db).queries == 1
+    user_cache_module.user_cache.clear()
@@ -0,0 +1,191 @@
+import boto3
+import pytest
+from fastapi.testclient import TestClient
+from moto import mock_aws
+from src.main import app
+from src.routers import videos_router
+from src.utils import s3_utils
+from tests.fakes import FakeAsyncSession
+
+
+client = TestClient(app)
+
+PART_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """Bucket S3 local (moto) con el cliente de s3_utils apuntando a él"""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        s3_client = boto3.client("s3", region_name="us-east-1")
+        s3_client.create_bucket(Bucket=s3_utils.BUCKET_NAME)
+        monkeypatch.setattr(s3_utils, "s3_client", s3_client)
+        yield s3_client
+
+
+@pytest.fixture
+def fake_env(monkeypatch):
+    """Usuario autenticado y BD simulada; retorna los videos registrados"""
+    sent = []
+
+    class FakeDB:
+        def add(self, x): sent.append(x)
+        def commit(self): ...
+        def refresh(self, x): setattr(x, "id", 7)
+
+    monkeypatch.setattr(videos_router, "MULTIPART_PART_SIZE", PART_SIZE)
+    app.dependency_overrides[videos_router.get_current_user] = lambda: type("U", (), {"id": 1})()
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(FakeDB())
+    yield sent
+    app.dependency_overrides.clear()
+
+
+def _upload_parts(s3, session, data):
+    """Simula al cliente subiendo cada parte directamente a S3"""
+    parts = []
+    for part in session["parts"]:
+        n = part["part_number"]
+        body = data[(n - 1) * session["part_size"]:n * session["part_size"]]
+        r = s3.upload_part(
+            Bucket=s3_utils.BUCKET_NAME,
+            Key=session["key"],
+            UploadId=session["upload_id"],
+            PartNumber=n,
+            Body=body,
+        )
+        parts.append({"part_number": n, "etag": r["ETag"]})
+    return parts
+
+
+def test_create_multipart_session_returns_presigned_parts(s3, fake_env):
+    r = client.post(
+        "/api/videos/multipart-uploads",
+        json={"title": "Directo", "filename": "clip.mp4", "size": 2 * PART_SIZE + 1},
+        headers={"Authorization": "Bearer token"},
+    )
+    assert r.status_code == 201
+    body = r.json()
+    assert body["key"].startswith("unprocessed-videos/")
+    assert [p["part_number"] for p in body["parts"]] == [1, 2, 3]
+    assert all("uploadId=" in p["url"] and "partNumber=" in p["url"] for p in body["parts"])
+
+
+@pytest.mark.parametrize("filename,size", [("clip.mov", 10), ("clip.mp4", 101 * 1024 * 1024)])
+def test_create_multipart_session_rejects_invalid_files(s3, fake_env, filename, size):
+    r = client.post(
+        "/api/videos/multipart-uploads",
+        json={"title": "Inválido", "filename": filename, "size": size},
+        headers={"Authorization": "Bearer token"},
+    )
+    assert r.status_code == 400
+
+
+def test_complete_multipart_registers_and_enqueues(s3, fake_env, monkeypatch):
+    monkeypatch.setattr(videos_router, "_video_info", lambda path: (30.0, 1920, 1080))
+    data = b"x" * (PART_SIZE + 10)
+    session = client.post(
+        "/api/videos/multipart-uploads",
+        json={"title": "Directo", "filename": "clip.mp4", "size": len(data)},
+        headers={"Authorization": "Bearer token"},
+    ).json()
+    parts = _upload_parts(s3, session, data)
+
+    r = client.post(
+        "/api/videos/multipart-uploads/complete",
+        json={"upload_id": session["upload_id"], "key": session["key"], "title": "Directo", "parts": parts},
+        headers={"Authorization": "Bearer token"},
+    )
+    assert r.status_code == 201
+    assert r.json()["task_id"] == 7
+    assert fake_env[0].filename == session["key"]
+    # El encolado queda pendiente en el outbox, en la misma transacción
+    assert len(fake_env[0].outbox_messages) == 1
+    head = s3.head_object(Bucket=s3_utils.BUCKET_NAME, Key=session["key"])
+    assert head["ContentLength"] == len(data)
+
+
+def test_complete_multipart_invalid_video_deletes_object(s3, fake_env, monkeypatch):
+    monkeypatch.setattr(videos_router, "_video_info", lambda path: (90.0, 1920, 1080))
+    data = b"x" * 1024
+    session = client.post(
+        "/api/videos/multipart-uploads",
+        json={"title": "Largo", "filename": "clip.mp4", "size": len(data)},
+        headers={"Authorization": "Bearer token"},
+    ).json()
+    parts = _upload_parts(s3, session, data)
+
+    r = client.post(
+        "/api/videos/multipart-uploads/complete",
+        json={"upload_id": session["upload_id"], "key": session["key"], "title": "Largo", "parts": parts},
+        headers={"Authorization": "Bearer token"},
+    )
+    assert r.status_code == 400
+    assert "Duración inválida" in r.json()["detail"]
+    assert fake_env == []
+    assert s3.list_objects_v2(Bucket=s3_utils.BUCKET_NAME).get("KeyCount") == 0
+
+
+def test_complete_multipart_other_owner_forbidden(s3, fake_env):
+    data = b"x" * 1024
+    session = client.post(
+        "/api/videos/multipart-uploads",
+        json={"title": "Ajeno", "filename": "clip.mp4", "size": len(data)},
+        headers={"Authorization": "Bearer token"},
+    ).json()
+    parts = _upload_parts(s3, session, data)
+
+    app.dependency_overrides[videos_router.get_current_user] = lambda: type("U", (), {"id": 2})()
+    r = client.post(
+        "/api/videos/multipart-uploads/complete",
+        json={"upload_id": session["upload_id"], "key": session["key"], "title": "Ajeno", "parts": parts},
+        headers={"Authorization": "Bearer token"},
+    )
+    assert r.status_code == 403
+    assert fake_env == []
+    # Se rechaza antes de completar: la carga sigue abierta y no hay objeto
+    assert s3.list_objects_v2(Bucket=s3_utils.BUCKET_NAME).get("KeyCount") == 0
+    assert len(s3.list_multipart_uploads(Bucket=s3_utils.BUCKET_NAME)["Uploads"]) == 1
+
+
+def _open_uploads(s3):
+    return s3.list_multipart_uploads(Bucket=s3_utils.BUCKET_NAME).get("Uploads", [])
+
+
+def test_abort_multipart_releases_parts(s3, fake_env):
+    session = client.post(
+        "/api/videos/multipart-uploads",
+        json={"title": "Cancelada", "filename": "clip.mp4", "size": 1024},
+        headers={"Authorization": "Bearer token"},
+    ).json()
+    _upload_parts(s3, session, b"x" * 1024)
+    url = f"/api/videos/multipart-uploads/{session['upload_id']}"
+
+    app.dependency_overrides[videos_router.get_current_user] = lambda: type("U", (), {"id": 2})()
+    assert client.delete(url, params={"key": session["key"]}, headers={"Authorization": "Bearer token"}).status_code == 403
+    assert len(_open_uploads(s3)) == 1
+
+    app.dependency_overrides[videos_router.get_current_user] = lambda: type("U", (), {"id": 1})()
+    r = client.delete(url, params={"key": session["key"]}, headers={"Authorization": "Bearer token"})
+    assert r.status_code == 200
+    assert _open_uploads(s3) == []
+
+
+def test_failed_complete_aborts_upload(s3, fake_env):
+    session = client.post(
+        "/api/videos/multipart-uploads",
+        json={"title": "Rota", "filename": "clip.mp4", "size": 1024},
+        headers={"Authorization": "Bearer token"},
+    ).json()
+    _upload_parts(s3, session, b"x" * 1024)
+
+    r = client.post(
+        "/api/videos/multipart-uploads/complete",
+        json={"upload_id": session["upload_id"], "key": session["key"], "title": "Rota",
+              "parts": [{"part_number": 1, "etag": '"no-coincide"'}]},
+        headers={"Authorization": "Bearer token"},
+    )
+    assert r.status_code == 400
+    assert _open_uploads(s3) == []
+    assert fake_env == []
@@ -2,6 +2,7 @@ import pytest
 from fastapi.testclient import TestClient
 from src.main import app
 from src.routers import public_router
+from tests.fakes import FakeAsyncSession
 
 
 client = TestClient(app)
@@ -24,9 +25,12 @@ def test_list_public_videos_success():
         def query(self, model): return self
         def filter(self, *a, **k): return self
         def order_by(self, *a, **k): return self
+        def execute(self, *a, **k): return self
+        def scalar(self): return None
+        def limit(self, *a, **k): return self
         def all(self): return [FakeVideo()]
 
-    app.dependency_overrides[public_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[public_router.get_db] = lambda: FakeAsyncSession(FakeDB())
 
     r = client.get("/api/public/videos")
     assert r.status_code == 200
@@ -45,9 +49,12 @@ def test_list_public_videos_empty():
         def query(self, model): return self
         def filter(self, *a, **k): return self
         def order_by(self, *a, **k): return self
+        def execute(self, *a, **k): return self
+        def scalar(self): return None
+        def limit(self, *a, **k): return self
         def all(self): return []
 
-    app.dependency_overrides[public_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[public_router.get_db] = lambda: FakeAsyncSession(FakeDB())
 
     r = client.get("/api/public/videos")
     assert r.status_code == 404
@@ -59,35 +66,18 @@ def test_list_public_videos_empty():
 # ---------------------------------------------------------
 # 2️⃣ POST /api/public/videos/{video_id}/vote
 # ---------------------------------------------------------
-def test_vote_public_video_success():
-    """Debe registrar voto exitosamente y aumentar contador"""
+def _seed_vote_data(db, status="processed", votes_count=2):
+    db.add(public_router.Usuario(id=1, first_name="Leo", last_name="B", email="l@b.co", password="x", city="C", country="D"))
+    db.add(public_router.Video(id=1, title="Video 1", filename="v1.mp4", status=status, owner_id=1, votes_count=votes_count))
+    db.commit()
 
-    class FakeVideo:
-        id = 1
-        status = "processed"
-        votes_count = 2
-        owner_id = 1
 
-    class FakeDB:
-        def query(self, model):
-            self.model = model
-            return self
-        def filter(self, *a, **k): return self
-        def first(self):
-            # Si estamos buscando un voto, retornamos None (no ha votado)
-            if self.model == public_router.Vote:
-                return None
-            # Si estamos buscando un video, retornamos el FakeVideo
-            return FakeVideo()
-        def add(self, obj): setattr(obj, "added", True)
-        def commit(self): self.committed = True
-        def refresh(self, obj): pass
-
-    class FakeUser:
-        id = 99
-
-    app.dependency_overrides[public_router.get_db] = lambda: FakeDB()
-    app.dependency_overrides[public_router.get_current_user] = lambda: FakeUser()
+def test_vote_public_video_success(db_session):
+    """Debe registrar voto exitosamente y aumentar contador"""
+    _seed_vote_data(db_session)
+
+    app.dependency_overrides[public_router.get_db] = lambda: FakeAsyncSession(db_session)
+    app.dependency_overrides[public_router.get_current_user] = lambda: type("U", (), {"id": 99})()
 
     r = client.post("/api/public/videos/1/vote", headers={"Authorization": "Bearer token"})
     assert r.status_code == 200
@@ -99,54 +89,35 @@ def test_vote_public_video_success():
     app.dependency_overrides.clear()
 
 
-def test_vote_public_video_not_found():
+def test_vote_public_video_not_found(db_session):
     """Debe retornar 404 si el video no existe o no está procesado"""
+    _seed_vote_data(db_session, status="uploaded")
 
-    class FakeDB:
-        def query(self, model): return self
-        def filter(self, *a, **k): return self
-        def first(self): return None
-
-    app.dependency_overrides[public_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[public_router.get_db] = lambda: FakeAsyncSession(db_session)
     app.dependency_overrides[public_router.get_current_user] = lambda: type("U", (), {"id": 1})()
 
     r = client.post("/api/public/videos/999/vote", headers={"Authorization": "Bearer token"})
     assert r.status_code == 404
     assert "no existe" in r.json()["detail"].lower()
 
+    r = client.post("/api/public/videos/1/vote", headers={"Authorization": "Bearer token"})
+    assert r.status_code == 404
+
     app.dependency_overrides.clear()
 
 
-def test_vote_public_video_already_voted():
+def test_vote_public_video_already_voted(db_session):
     """Debe retornar 400 si el usuario ya votó por el video"""
+    _seed_vote_data(db_session, votes_count=10)
 
-    class FakeVideo:
-        id = 1
-        status = "processed"
-        votes_count = 10
-        owner_id = 1
-
-    class FakeVote:
-        video_id = 1
-        user_id = 1
-
-    class FakeDB:
-        def __init__(self): self.query_called = 0
-        def query(self, model):
-            self.query_called += 1
-            self.model = model
-            return self
-        def filter(self, *a, **k): return self
-        def first(self):
-            # 1ra llamada -> video, 2da llamada -> voto existente
-            return FakeVideo() if self.query_called == 1 else FakeVote()
-
-    app.dependency_overrides[public_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[public_router.get_db] = lambda: FakeAsyncSession(db_session)
     app.dependency_overrides[public_router.get_current_user] = lambda: type("U", (), {"id": 1})()
 
+    assert client.post("/api/public/videos/1/vote", headers={"Authorization": "Bearer token"}).status_code == 200
     r = client.post("/api/public/videos/1/vote", headers={"Authorization": "Bearer token"})
     assert r.status_code == 400
     assert "ya has votado" in r.json()["detail"].lower()
+    assert db_session.get(public_router.Video, 1).votes_count == 11
 
     app.dependency_overrides.clear()
 
@@ -166,11 +137,14 @@ def test_get_rankings_success():
         def filter(self, *a, **k): return self
         def group_by(self, *a, **k): return self
         def order_by(self, *a, **k): return self
+        def execute(self, *a, **k): return self
+        def scalar(self): return None
+        def limit(self, *a, **k): return self
         def offset(self, *a, **k): return self
         def limit(self, *a, **k): return self
         def all(self): return [FakeRow()]
 
-    app.dependency_overrides[public_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[public_router.get_db] = lambda: FakeAsyncSession(FakeDB())
 
     r = client.get("/api/public/rankings")
     assert r.status_code == 200
@@ -188,11 +162,14 @@ def test_get_rankings_empty():
         def filter(self, *a, **k): return self
         def group_by(self, *a, **k): return self
         def order_by(self, *a, **k): return self
+        def execute(self, *a, **k): return self
+        def scalar(self): return None
+        def limit(self, *a, **k): return self
         def offset(self, *a, **k): return self
         def limit(self, *a, **k): return self
         def all(self): return []
 
-    app.dependency_overrides[public_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[public_router.get_db] = lambda: FakeAsyncSession(FakeDB())
 
     r = client.get("/api/public/rankings")
     assert r.status_code == 404
@@ -0,0 +1,208 @@
+import base64
+import hashlib
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from src.main import app
+from src.routers import videos_router
+from src.utils import upload_sessions
+from tests.unit.test_mp4_utils import mp4
+from tests.fakes import FakeAsyncSession
+
+
+client = TestClient(app)
+AUTH = {"Authorization": "Bearer token"}
+
+
+@pytest.fixture
+def env(monkeypatch, tmp_path):
+    """Sesiones en un directorio temporal; S3 y BD simulados"""
+    uploaded, sent = [], []
+
+    class FakeDB:
+        def query(self, model): return self
+        def filter(self, *a, **k): return self
+        def first(self): return None
+        def add(self, x): sent.append(x)
+        def commit(self): ...
+        def refresh(self, x): setattr(x, "id", 11)
+
+    monkeypatch.setattr(upload_sessions, "UPLOAD_SESSIONS_DIR", tmp_path)
+    monkeypatch.setattr(videos_router, "upload_to_s3", lambda path, key: uploaded.append((path.read_bytes(), key)) or True)
+    app.dependency_overrides[videos_router.get_current_user] = lambda: type("U", (), {"id": 1})()
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(FakeDB())
+    yield uploaded, sent
+    app.dependency_overrides.clear()
+
+
+def checksum(data: bytes) -> str:
+    return "sha256 " + base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+
+def create(size, title="Reanudable"):
+    r = client.post("/api/videos/uploads", json={"title": title, "filename": "clip.mp4", "size": size}, headers=AUTH)
+    assert r.status_code == 201
+    return r.json()["upload_id"]
+
+
+def patch(upload_id, offset, data, check=None):
+    return client.patch(
+        f"/api/videos/uploads/{upload_id}",
+        content=data,
+        headers={**AUTH, "Upload-Offset": str(offset), "Upload-Checksum": check or checksum(data)},
+    )
+
+
+def test_resumable_upload_full_flow(env):
+    uploaded, sent = env
+    data = mp4(duration_s=30.0) + b"\x01" * 5000
+    upload_id = create(len(data))
+
+    half = len(data) // 2
+    r = patch(upload_id, 0, data[:half])
+    assert r.status_code == 204
+    assert r.headers["Upload-Offset"] == str(half)
+
+    # Consulta del offset tras una desconexión
+    r = client.head(f"/api/videos/uploads/{upload_id}", headers=AUTH)
+    assert r.headers["Upload-Offset"] == str(half)
+
+    assert patch(upload_id, half, data[half:]).status_code == 204
+
+    r = client.post(f"/api/videos/uploads/{upload_id}/commit", headers=AUTH)
+    assert r.status_code == 201
+    assert r.json()["task_id"] == 11
+    assert uploaded[0][0] == data
+    assert sent[0].filename == f"unprocessed-videos/{upload_id}.mp4"
+    assert sent[0].content_sha256 == hashlib.sha256(data).hexdigest()
+    assert len(sent[0].outbox_messages) == 1
+    assert upload_sessions.load_session(upload_id) is None
+
+
+def test_resending_same_chunk_is_idempotent(env):
+    data = mp4() + b"\x01" * 100
+    upload_id = create(len(data))
+    assert patch(upload_id, 0, data[:100]).status_code == 204
+    r = patch(upload_id, 0, data[:100])
+    assert r.status_code == 204
+    assert r.headers["Upload-Offset"] == "100"
+
+    # Un bloque distinto en un offset ya recibido es un conflicto
+    r = patch(upload_id, 0, b"y" * 100)
+    assert r.status_code == 409
+    # Un offset por delante del actual también
+    assert patch(upload_id, 500, b"z").status_code == 409
+
+
+def test_checksum_mismatch_discards_chunk(env):
+    upload_id = create(1000)
+    r = patch(upload_id, 0, b"a" * 100, check=checksum(b"b" * 100))
+    assert r.status_code == 400
+    assert upload_sessions.load_session(upload_id)["offset"] == 0
+    assert upload_sessions.data_path(upload_id).stat().st_size == 0
+
+
+def test_invalid_header_rejects_session_early(env):
+    data = mp4(duration_s=90.0) + b"\x01" * 5000
+    upload_id = create(len(data))
+    r = patch(upload_id, 0, data[:1024])
+    assert r.status_code == 400
+    assert "Duración inválida" in r.json()["detail"]
+    assert upload_sessions.load_session(upload_id) is None
+
+
+def test_commit_incomplete_upload_conflict(env):
+    upload_id = create(1000)
+    patch(upload_id, 0, b"a" * 10)
+    r = client.post(f"/api/videos/uploads/{upload_id}/commit", headers=AUTH)
+    assert r.status_code == 409
+    assert r.headers["Upload-Offset"] == "10"
+
+
+def test_expired_sessions_are_purged(env, monkeypatch):
+    upload_id = create(1000)
+    assert upload_sessions.purge_expired_sessions(now=time.time() + upload_sessions.UPLOAD_SESSION_TTL + 1) == 1
+    assert upload_sessions.load_session(upload_id) is None
+    assert client.head(f"/api/videos/uploads/{upload_id}", headers=AUTH).status_code == 404
+
+
+def test_other_user_cannot_patch(env):
+    upload_id = create(1000)
+    app.dependency_overrides[videos_router.get_current_user] = lambda: type("U", (), {"id": 2})()
+    assert patch(upload_id, 0, b"a").status_code == 403
+
+
+def test_chunk_is_rejected_while_another_write_holds_the_lock(env):
+    upload_id = create(1000)
+    lock = upload_sessions.acquire_write(upload_id)
+    try:
+        r = patch(upload_id, 0, b"a" * 10)
+        assert r.status_code == 409
+        assert r.headers["Upload-Offset"] == "0"
+    finally:
+        upload_sessions.release_write(lock)
+    assert patch(upload_id, 0, b"a" * 10).status_code == 204
+
+
+def test_offset_is_checked_again_after_taking_the_lock(env, monkeypatch):
+    """Un bloque confirmado por otro worker antes del lock no se trunca ni se sobrescribe"""
+    upload_id = create(1000)
+    acquire = upload_sessions.acquire_write
+
+    def acquire_after_other_worker(upload_id):
+        upload_sessions.data_path(upload_id).write_bytes(b"a" * 100)
+        session = upload_sessions.load_session(upload_id)
+        session["offset"] = 100
+        session["chunks"]["0"] = checksum(b"a" * 100).split(" ")[1]
+        upload_sessions.save_session(session)
+        return acquire(upload_id)
+
+    monkeypatch.setattr(upload_sessions, "acquire_write", acquire_after_other_worker)
+    r = patch(upload_id, 0, b"b" * 50)
+
+    assert r.status_code == 409
+    assert r.headers["Upload-Offset"] == "100"
+    assert upload_sessions.data_path(upload_id).read_bytes() == b"a" * 100
+
+
+def test_commit_and_cancel_wait_for_the_session_lock(env):
+    """Un commit concurrente no registra el video dos veces y un cancel no pisa un bloque en curso"""
+    uploaded, sent = env
+    data = mp4(duration_s=30.0) + b"\x01" * 5000
+    upload_id = create(len(data))
+    assert patch(upload_id, 0, data).status_code == 204
+
+    lock = upload_sessions.acquire_write(upload_id)
+    try:
+        assert client.post(f"/api/videos/uploads/{upload_id}/commit", headers=AUTH).status_code == 409
+        assert client.delete(f"/api/videos/uploads/{upload_id}", headers=AUTH).status_code == 409
+    finally:
+        upload_sessions.release_write(lock)
+    assert sent == []
+    assert upload_sessions.load_session(upload_id) is not None
+
+    assert client.post(f"/api/videos/uploads/{upload_id}/commit", headers=AUTH).status_code == 201
+    assert len(sent) == 1
+    # La sesión ya se confirmó: un segundo commit no encuentra nada que registrar
+    assert client.post(f"/api/videos/uploads/{upload_id}/commit", headers=AUTH).status_code == 404
+    assert len(sent) == 1
+
+
+def test_session_is_read_again_after_taking_the_lock(env, monkeypatch):
+    """Una sesión cancelada entre la primera lectura y el lock no se confirma"""
+    uploaded, sent = env
+    data = mp4(duration_s=30.0) + b"\x01" * 5000
+    upload_id = create(len(data))
+    assert patch(upload_id, 0, data).status_code == 204
+    acquire = upload_sessions.acquire_write
+
+    def acquire_after_cancel(upload_id):
+        upload_sessions.delete_session(upload_id)
+        return acquire(upload_id)
+
+    monkeypatch.setattr(upload_sessions, "acquire_write", acquire_after_cancel)
+    assert client.post(f"/api/videos/uploads/{upload_id}/commit", headers=AUTH).status_code == 404
+    assert sent == []
+    assert uploaded == []
+    assert list(upload_sessions.UPLOAD_SESSIONS_DIR.iterdir()) == []
@@ -9,6 +9,7 @@ from unittest.mock import MagicMock, patch
 from fastapi import HTTPException, status
 from unittest.mock import patch
 from pathlib import Path
+from tests.fakes import FakeAsyncSession
 
 client = TestClient(app)
 
@@ -32,11 +33,12 @@ def test_get_videos_authorized():
         def query(self, model): return self
         def filter(self, *args, **kwargs): return self
         def order_by(self, *args, **kwargs): return self
+        def limit(self, *args, **kwargs): return self
         def all(self): return []
 
     # ✅ aquí usamos las referencias reales
     app.dependency_overrides[videos_router.get_current_user] = fake_get_current_user
-    app.dependency_overrides[videos_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(FakeDB())
 
     response = client.get(
         "/api/videos/",
@@ -73,7 +75,7 @@ def test_video_delete_behavior(video_status, expected):
 
     def fake_user(): return type("U", (), {"id": 1})()
 
-    app.dependency_overrides[videos_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(FakeDB())
     app.dependency_overrides[videos_router.get_current_user] = fake_user
 
     response = client.delete(
@@ -101,7 +103,7 @@ def test_video_delete_forbidden():
 
     def fake_user(): return type("U", (), {"id": 1})()
 
-    app.dependency_overrides[videos_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(FakeDB())
     app.dependency_overrides[videos_router.get_current_user] = fake_user
 
     response = client.delete(
@@ -132,7 +134,7 @@ def test_get_video_by_id_success():
 
     def fake_user(): return type("U", (), {"id": 1})()
 
-    app.dependency_overrides[videos_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(FakeDB())
     app.dependency_overrides[videos_router.get_current_user] = fake_user
 
     client = TestClient(app)
@@ -153,7 +155,7 @@ def test_get_video_by_id_not_found():
 
     def fake_user(): return type("U", (), {"id": 1})()
 
-    app.dependency_overrides[videos_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(FakeDB())
     app.dependency_overrides[videos_router.get_current_user] = fake_user
 
     r = client.get("/api/videos/999", headers={"Authorization": "Bearer token"})
@@ -181,7 +183,7 @@ def test_get_video_by_id_forbidden():
 
     def fake_user(): return type("U", (), {"id": 1})()
 
-    app.dependency_overrides[videos_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(FakeDB())
     app.dependency_overrides[videos_router.get_current_user] = fake_user
 
     r = client.get("/api/videos/1", headers={"Authorization": "Bearer token"})
@@ -201,7 +203,7 @@ def test_upload_video_invalid_format(monkeypatch):
         def add(self, x): ...
         def commit(self): ...
         def refresh(self, x): ...
-    app.dependency_overrides[videos_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(FakeDB())
 
     video = UploadFile(filename="test.txt", file=io.BytesIO(b"1234"))
     data = {"title": "Test Video"}
@@ -226,7 +228,7 @@ def test_upload_video_too_large(monkeypatch):
         def add(self, x): ...
         def commit(self): ...
         def refresh(self, x): ...
-    app.dependency_overrides[videos_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(FakeDB())
 
     # Archivo de 101 MB simulado
     fake_file = io.BytesIO(b"x" * (101 * 1024 * 1024))
@@ -243,7 +245,7 @@ def test_upload_video_invalid_duration(monkeypatch):
     from src.routers import videos_router
 
     app.dependency_overrides[videos_router.get_current_user] = lambda: type("U", (), {"id": 1})()
-    app.dependency_overrides[videos_router.get_db] = lambda: type("FakeDB", (), {"add": lambda self, x: None, "commit": lambda self: None, "refresh": lambda self, x: None})()
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(type("FakeDB", (), {"add": lambda self, x: None, "commit": lambda self: None, "refresh": lambda self, x: None})())
 
     # Monkeypatch para forzar duración = 0
     monkeypatch.setattr(videos_router, "_video_info", lambda path: (0.0, 0, 0))
@@ -258,6 +260,25 @@ def test_upload_video_invalid_duration(monkeypatch):
     app.dependency_overrides.clear()
     
     
+def test_process_probe_pool_survives_rejected_videos(monkeypatch, tmp_path):
+    """Con un pool de procesos, un video rechazado no debe romper el pool para los siguientes"""
+    import asyncio
+    from src.utils.executors import BoundedExecutor
+
+    pool = BoundedExecutor("test-probe-process", max_workers=1, kind="process")
+    monkeypatch.setattr(videos_router, "probe_pool", pool)
+    not_a_video = tmp_path / "a.mp4"
+    not_a_video.write_bytes(b"1234567890")
+
+    try:
+        for _ in range(2):
+            with pytest.raises(HTTPException) as e:
+                asyncio.run(videos_router._probe_video_file(not_a_video))
+            assert e.value.status_code == 400
+    finally:
+        pool.shutdown()
+
+
 def test_upload_video_worker_exception(monkeypatch, tmp_path):
     """Debe capturar error si falla el encolado del worker"""
     from src.routers import videos_router
@@ -269,7 +290,7 @@ def test_upload_video_worker_exception(monkeypatch, tmp_path):
         def add(self, x): ...
         def commit(self): ...
         def refresh(self, x): setattr(x, "id", 99)
-    app.dependency_overrides[videos_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(FakeDB())
 
     # Forzar que pase todas las validaciones de duración y resolución
     monkeypatch.setattr(videos_router, "_video_info", lambda path: (30.0, 1920, 1080))
@@ -300,7 +321,7 @@ def test_upload_video_write_error(monkeypatch):
         def commit(self): ...
         def refresh(self, x): ...
 
-    app.dependency_overrides[videos_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(FakeDB())
 
     # Mock aiofiles.open para que lance cuando se intente abrir/escribir
     def bad_open(path, mode):
@@ -331,7 +352,7 @@ def test_upload_video_duration_out_of_range(monkeypatch):
         def commit(self): ...
         def refresh(self, x): ...
 
-    app.dependency_overrides[videos_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(FakeDB())
 
     # Forzar duración demasiado corta (ej. 10s)
     monkeypatch.setattr(videos_router, '_video_info', lambda path: (10.0, 1920, 1080))
@@ -358,7 +379,7 @@ def test_upload_video_low_resolution(monkeypatch):
         def commit(self): ...
         def refresh(self, x): ...
 
-    app.dependency_overrides[videos_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(FakeDB())
 
     # Forzar resolución baja
     monkeypatch.setattr(videos_router, '_video_info', lambda path: (30.0, 1000, 800))
@@ -394,7 +415,7 @@ def test_get_video_by_id_processed_shows_url():
 
     def fake_user(): return type("U", (), {"id": 1})()
 
-    app.dependency_overrides[videos_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(FakeDB())
     app.dependency_overrides[videos_router.get_current_user] = fake_user
 
     r = client.get("/api/videos/1", headers={"Authorization": "Bearer token"})
@@ -430,7 +451,7 @@ def test_delete_video_unlink_exception(monkeypatch, tmp_path):
 
     def fake_user(): return type("U", (), {"id": 1})()
 
-    app.dependency_overrides[videos_router.get_db] = lambda: FakeDB()
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(FakeDB())
     app.dependency_overrides[videos_router.get_current_user] = fake_user
 
     # Monkeypatch unlink para que lance excepción
@@ -482,4 +503,37 @@ def test_delete_file_raises_exception(tmp_path):
                 )
 
     assert excinfo.value.status_code == 400
-    assert "duración" in excinfo.value.detail
\ No newline at end of file
+    assert "duración" in excinfo.value.detail
+
+def test_upload_duplicate_content_reuses_processed_video(monkeypatch, db_session):
+    """Un archivo ya procesado no se sube a S3 ni se encola de nuevo"""
+    import hashlib
+    from src.models.db_models import Usuario, Video, OutboxMessage
+    from src.utils.dedup_utils import register_processed_artifact
+
+    user = Usuario(first_name="Ana", last_name="D", email="ana@test.co", password="x", city="Cali", country="Colombia")
+    db_session.add(user)
+    content = b"x" * 2048
+    register_processed_artifact(db_session, hashlib.sha256(content).hexdigest(), "processed-videos/orig_processed.mp4")
+    db_session.commit()
+
+    uploads = []
+    monkeypatch.setattr(videos_router, "_video_info", lambda path: (30.0, 1920, 1080))
+    monkeypatch.setattr(videos_router, "upload_to_s3", lambda *a: uploads.append(a) or True)
+    app.dependency_overrides[videos_router.get_current_user] = lambda: user
+    app.dependency_overrides[videos_router.get_db] = lambda: FakeAsyncSession(db_session)
+
+    r = client.post(
+        "/api/videos/upload",
+        files={"video_file": ("dup.mp4", io.BytesIO(content), "video/mp4")},
+        data={"title": "Repetido"},
+        headers={"Authorization": "Bearer token"},
+    )
+    app.dependency_overrides.clear()
+
+    assert r.status_code == 201
+    video = db_session.get(Video, r.json()["task_id"])
+    assert video.status == "processed"
+    assert video.filename == "processed-videos/orig_processed.mp4"
+    assert uploads == []
+    assert db_session.query(OutboxMessage).count() == 0
@@ -21,4 +21,36 @@ def mock_video_data():
         "uploaded_at": "2025-10-19T12:00:00",
         "processed_at": None,
         "processed_url": None,
-    }
\ No newline at end of file
+    }
+
+@pytest.fixture
+def db_session():
+    """Sesión sobre una base SQLite en memoria con el esquema completo"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from src.db.database import Base
+
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def _reset_data_version():
+    """La versión de los datos y las respuestas se cachean entre peticiones; cada prueba parte de cero"""
+    from src.utils.response_cache import response_cache
+    from src.utils.versioning import data_version
+
+    data_version.invalidate()
+    response_cache.clear()
+    yield
+    data_version.invalidate()
+    response_cache.clear()
@@ -0,0 +1,14 @@
+class FakeAsyncSession:
+    """
+    Expone una sesión síncrona (la de SQLite de db_session o un FakeDB) con la parte de la
+    interfaz de AsyncSession que usan las rutas: run_sync y commit.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return fn(self.sync_session, *args, **kwargs)
+
+    async def commit(self):
+        self.sync_session.commit()
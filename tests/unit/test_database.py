@@ -0,0 +1,71 @@
+import asyncio
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.db import database
+from src.db.database import Base, async_url
+from src.models.db_models import Video
+
+
+def test_async_url_maps_drivers():
+    assert async_url("postgresql://u:p@db:5432/ANB") == "postgresql+asyncpg://u:p@db:5432/ANB"
+    assert async_url("postgresql+psycopg2://u:p@db/ANB") == "postgresql+asyncpg://u:p@db/ANB"
+    assert async_url("sqlite:////tmp/anb.db") == "sqlite+aiosqlite:////tmp/anb.db"
+    assert async_url("postgresql+asyncpg://u:p@db/ANB") == "postgresql+asyncpg://u:p@db/ANB"
+
+
+def test_routes_end_to_end_with_async_session(tmp_path):
+    """Registro, login, voto y ranking sobre una AsyncSession real (aiosqlite)"""
+    from src.main import app
+    from src.utils.user_cache import user_cache
+
+    path = tmp_path / "anb.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(sync_engine)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_test_db():
+        async with sessions() as db:
+            yield db
+
+    signup = {
+        "first_name": "Leo", "last_name": "B", "email": "leo@anb.co",
+        "password1": "secreta", "password2": "secreta", "city": "Bogotá", "country": "Colombia",
+    }
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            user = (await client.post("/api/auth/signup", json=signup)).json()
+            with sessionmaker(bind=sync_engine)() as db:
+                db.add(Video(id=1, title="a", filename="a", status="processed", owner_id=user["id"], votes_count=0))
+                db.commit()
+            token = (await client.post("/api/auth/login", json={"email": "leo@anb.co", "password": "secreta"})).json()
+            auth = {"Authorization": f"Bearer {token['access_token']}"}
+
+            # Peticiones concurrentes sobre el mismo event loop
+            vote, mine = await asyncio.gather(
+                client.post("/api/public/videos/1/vote", headers=auth),
+                client.get("/api/videos/", headers=auth),
+            )
+            rankings = await client.get("/api/public/rankings")
+            me = await client.get("/api/public/rankings/me", headers=auth)
+        await async_engine.dispose()
+        return vote, mine, rankings, me
+
+    user_cache.clear()
+    app.dependency_overrides[database.get_db] = get_test_db
+    try:
+        vote, mine, rankings, me = asyncio.run(main())
+    finally:
+        app.dependency_overrides.clear()
+        user_cache.clear()
+        sync_engine.dispose()
+
+    assert vote.json()["total_votos"] == 1
+    assert [v["id"] for v in mine.json()] == [1]
+    assert rankings.json() == [{"jugador": "Leo", "votos_acumulados": 1}]
+    assert me.json() == {"jugador": "Leo", "votos_acumulados": 1, "posicion": 1}
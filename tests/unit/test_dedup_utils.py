@@ -0,0 +1,32 @@
+from src.models.db_models import ProcessedArtifact
+from src.utils import dedup_utils
+
+
+def test_register_and_find_processed_artifact(db_session):
+    assert dedup_utils.find_processed_artifact(db_session, "a" * 64) is None
+    assert dedup_utils.register_processed_artifact(db_session, "a" * 64, "processed-videos/x.mp4")
+    db_session.commit()
+    assert dedup_utils.find_processed_artifact(db_session, "a" * 64) == "processed-videos/x.mp4"
+
+
+def test_duplicate_registration_keeps_first_artifact(db_session):
+    dedup_utils.register_processed_artifact(db_session, "b" * 64, "processed-videos/first.mp4")
+    assert not dedup_utils.register_processed_artifact(db_session, "b" * 64, "processed-videos/second.mp4")
+    db_session.commit()
+    assert db_session.query(ProcessedArtifact).count() == 1
+    assert dedup_utils.find_processed_artifact(db_session, "b" * 64) == "processed-videos/first.mp4"
+
+
+def test_other_pipeline_parameters_do_not_match(db_session, monkeypatch):
+    dedup_utils.register_processed_artifact(db_session, "c" * 64, "processed-videos/old.mp4")
+    db_session.commit()
+    monkeypatch.setattr(dedup_utils, "PIPELINE_FINGERPRINT", "otra-version")
+    assert dedup_utils.find_processed_artifact(db_session, "c" * 64) is None
+
+
+def test_file_sha256(tmp_path):
+    import hashlib
+
+    f = tmp_path / "v.mp4"
+    f.write_bytes(b"contenido" * 1000)
+    assert dedup_utils.file_sha256(f, chunk_size=7) == hashlib.sha256(b"contenido" * 1000).hexdigest()
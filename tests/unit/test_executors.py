@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.utils.executors import BoundedExecutor, PoolSaturatedError
+
+
+def test_run_does_not_block_event_loop():
+    """Una llamada bloqueante en el pool no debe detener otras corrutinas"""
+    pool = BoundedExecutor("test-loop", max_workers=1)
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(pool.run(time.sleep, 0.2), ticker())
+
+    asyncio.run(main())
+    pool.shutdown()
+    # Los ticks ocurren mientras el sleep bloqueante sigue en curso
+    assert ticks[-1] - ticks[0] < 0.15
+
+
+def test_run_rejects_when_pool_is_saturated():
+    pool = BoundedExecutor("test-saturated", max_workers=1, max_pending=1)
+    release = threading.Event()
+
+    async def main():
+        first = asyncio.ensure_future(pool.run(release.wait))
+        second = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        assert pool.pending == 2
+        assert REGISTRY.get_sample_value("executor_queued_tasks", {"pool": "test-saturated"}) == 1
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(main())
+    pool.shutdown()
+    assert pool.pending == 0
+    assert REGISTRY.get_sample_value("executor_rejected_tasks_total", {"pool": "test-saturated"}) == 1
+
+
+def test_run_propagates_exceptions():
+    pool = BoundedExecutor("test-errors", max_workers=1)
+
+    def boom():
+        raise ValueError("falla")
+
+    with pytest.raises(ValueError):
+        asyncio.run(pool.run(boom))
+    pool.shutdown()
+    assert pool.pending == 0
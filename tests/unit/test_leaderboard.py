@@ -0,0 +1,239 @@
+import bisect
+import random
+from datetime import datetime
+
+import pytest
+
+from src.models.db_models import Usuario, Video, Vote
+from src.routers import public_router
+from src.utils import leaderboard as lb_module
+from src.utils.events import VOTE
+from src.utils.leaderboard import (
+    IndexableSkipList,
+    Leaderboard,
+    RegionalLeaderboards,
+    on_vote_event,
+    rebuild_from_db,
+    sync_processed_since,
+)
+from tests.fakes import FakeAsyncSession
+
+
+def test_skiplist_matches_sorted_list():
+    """Inserciones y borrados aleatorios: rank y slice coinciden con una lista ordenada"""
+    rng = random.Random(7)
+    skiplist = IndexableSkipList(seed=1)
+    reference = []
+    for _ in range(2000):
+        if reference and rng.random() < 0.4:
+            key = reference[rng.randrange(len(reference))]
+            skiplist.remove(key)
+            reference.remove(key)
+        else:
+            key = (rng.randint(-50, 0), rng.randint(1, 10_000))
+            if key in reference:
+                continue
+            skiplist.insert(key)
+            bisect.insort(reference, key)
+
+    assert len(skiplist) == len(reference)
+    assert skiplist.slice(0, len(reference)) == reference
+    assert skiplist.slice(17, 5) == reference[17:22]
+    for i in range(0, len(reference), 37):
+        assert skiplist.rank(reference[i]) == i
+    with pytest.raises(KeyError):
+        skiplist.remove((1, 1))
+
+
+def test_leaderboard_incremental_updates():
+    board = Leaderboard()
+    board.rebuild([(1, "Ana", 5), (2, "Leo", 3), (3, "Eva", 3)])
+
+    board.add_votes(3, 1)
+    board.add_votes(4, 1, "Sol")
+
+    assert board.top(0, 10) == [
+        {"jugador": "Ana", "votos_acumulados": 5},
+        {"jugador": "Eva", "votos_acumulados": 4},
+        {"jugador": "Leo", "votos_acumulados": 3},
+        {"jugador": "Sol", "votos_acumulados": 1},
+    ]
+    assert board.top(1, 2)[0]["jugador"] == "Eva"
+    assert board.rank(2) == {"jugador": "Leo", "votos_acumulados": 3, "posicion": 3}
+    assert board.rank(99) is None
+
+
+def _seed(db):
+    db.add_all([
+        Usuario(id=1, first_name="Ana", last_name="B", email="a@b.co", password="x", city="Bogotá", country="Colombia"),
+        Usuario(id=2, first_name="Leo", last_name="B", email="l@b.co", password="x", city="Medellín", country="Colombia"),
+        Usuario(id=3, first_name="Eva", last_name="B", email="e@b.co", password="x", city="Lima", country="Perú"),
+    ])
+    db.add_all([
+        Video(id=1, title="a", filename="a", status="processed", owner_id=1, votes_count=2,
+              processed_at=datetime(2025, 10, 1, 10)),
+        Video(id=2, title="b", filename="b", status="processed", owner_id=2, votes_count=7,
+              processed_at=datetime(2025, 10, 1, 11)),
+        Video(id=3, title="c", filename="c", status="processed", owner_id=1, votes_count=4,
+              processed_at=datetime(2025, 10, 1, 12)),
+        Video(id=4, title="d", filename="d", status="uploaded", owner_id=3, votes_count=0),
+    ])
+    # La reconstrucción cuenta desde la tabla votes; coincide con votes_count
+    db.add_all(
+        Vote(video_id=video_id, user_id=100 + i)
+        for video_id, count in ((1, 2), (2, 7), (3, 4))
+        for i in range(count)
+    )
+    db.commit()
+
+
+def test_rebuild_and_sync_from_db(db_session, monkeypatch):
+    board = RegionalLeaderboards()
+    monkeypatch.setattr(lb_module, "leaderboard", board)
+    _seed(db_session)
+
+    rebuild_from_db(db_session)
+    watermark = sync_processed_since(db_session, None)
+    assert board.top() == [
+        {"jugador": "Leo", "votos_acumulados": 7},
+        {"jugador": "Ana", "votos_acumulados": 6},
+    ]
+    assert watermark == datetime(2025, 10, 1, 12)
+
+    # El worker procesa el primer video de Eva
+    db_session.get(Video, 4).status = "processed"
+    db_session.get(Video, 4).processed_at = datetime(2025, 10, 1, 13)
+    db_session.commit()
+    sync_processed_since(db_session, watermark)
+
+    assert board.rank(3) == {"jugador": "Eva", "votos_acumulados": 0, "posicion": 3}
+
+
+def test_first_sync_seeds_watermark_without_scanning_videos(db_session, monkeypatch):
+    board = RegionalLeaderboards()
+    monkeypatch.setattr(lb_module, "leaderboard", board)
+    monkeypatch.setattr(lb_module, "SessionLocal", lambda: db_session)
+    _seed(db_session)
+    scans = []
+    monkeypatch.setattr(lb_module, "sync_processed_since", lambda db, since: scans.append(since) or since)
+
+    watermark = lb_module._sync_step(None, rebuild=True)
+
+    assert watermark == datetime(2025, 10, 1, 12)
+    assert scans == []
+    assert board.rank(1) == {"jugador": "Ana", "votos_acumulados": 6, "posicion": 2}
+
+
+def test_votes_during_rebuild_are_replayed(db_session, monkeypatch):
+    board = RegionalLeaderboards()
+    monkeypatch.setattr(lb_module, "leaderboard", board)
+    _seed(db_session)
+    totals_query = lb_module.region_totals_query
+
+    def query_while_voting(db):
+        # Votos confirmados después de que el agregado tomó su snapshot
+        rows = totals_query(db).all()
+        on_vote_event({"type": VOTE, "video_id": 1, "owner_id": 1})
+        on_vote_event({"type": VOTE, "video_id": 9, "owner_id": 4,
+                       "owner": {"name": "Sol", "country": "Perú", "city": "Lima"}})
+        return type("Q", (), {"all": lambda self: rows})()
+
+    monkeypatch.setattr(lb_module, "region_totals_query", query_while_voting)
+    rebuild_from_db(db_session)
+
+    assert board.rank(1) == {"jugador": "Ana", "votos_acumulados": 7, "posicion": 1}
+    assert board.top(0, 10, "Perú") == [{"jugador": "Sol", "votos_acumulados": 1}]
+    # Terminada la reconstrucción los votos se aplican directamente, sin acumularse
+    on_vote_event({"type": VOTE, "video_id": 1, "owner_id": 1})
+    assert board.rank(1)["votos_acumulados"] == 8
+    assert board._replay is None
+
+
+@pytest.mark.parametrize("ready", [False, True])
+def test_my_ranking_endpoint(db_session, monkeypatch, ready):
+    """El endpoint responde igual con el leaderboard en memoria o con el agregado SQL"""
+    from fastapi.testclient import TestClient
+    from src.main import app
+
+    board = RegionalLeaderboards()
+    monkeypatch.setattr(public_router, "leaderboard", board)
+    _seed(db_session)
+    if ready:
+        monkeypatch.setattr(lb_module, "leaderboard", board)
+        rebuild_from_db(db_session)
+
+    app.dependency_overrides[public_router.get_db] = lambda: FakeAsyncSession(db_session)
+    app.dependency_overrides[public_router.get_current_user] = lambda: type("U", (), {"id": 1})()
+    client = TestClient(app)
+    try:
+        me = client.get("/api/public/rankings/me")
+        top = client.get("/api/public/rankings", params={"limit": 1})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert me.json() == {"jugador": "Ana", "votos_acumulados": 6, "posicion": 2}
+    assert top.json() == [{"jugador": "Leo", "votos_acumulados": 7}]
+
+
+def test_regional_boards_follow_votes(monkeypatch):
+    board = RegionalLeaderboards()
+    monkeypatch.setattr(lb_module, "leaderboard", board)
+    board.rebuild([
+        (1, "Ana", "Colombia", "Bogotá", 6),
+        (2, "Leo", "Colombia", "Medellín", 7),
+        (3, "Eva", "Perú", "Lima", 0),
+    ])
+
+    # Votos locales o de otra instancia; el dueño nuevo llega con su región en el evento
+    on_vote_event({"type": VOTE, "video_id": 1, "owner_id": 1})
+    on_vote_event({"type": VOTE, "video_id": 1, "owner_id": 1})
+    on_vote_event({"type": VOTE, "video_id": 9, "owner_id": 4,
+                   "owner": {"name": "Sol", "country": " colombia", "city": "BOGOTÁ"}})
+    # Los eventos del flush de escritura diferida no son votos nuevos
+    on_vote_event({"type": VOTE, "video_ids": [1, 2]})
+
+    assert board.top(0, 10, "Colombia") == [
+        {"jugador": "Ana", "votos_acumulados": 8},
+        {"jugador": "Leo", "votos_acumulados": 7},
+        {"jugador": "Sol", "votos_acumulados": 1},
+    ]
+    assert board.top(0, 10, "colombia", "Bogotá") == [
+        {"jugador": "Ana", "votos_acumulados": 8},
+        {"jugador": "Sol", "votos_acumulados": 1},
+    ]
+    assert board.top(0, 10, "Perú", "Lima") == [{"jugador": "Eva", "votos_acumulados": 0}]
+    assert board.top(0, 10, "Chile") == []
+    assert board.rank(4) == {"jugador": "Sol", "votos_acumulados": 1, "posicion": 3}
+
+
+@pytest.mark.parametrize("ready", [False, True])
+def test_regional_rankings_endpoint(db_session, monkeypatch, ready):
+    """El filtro por región da lo mismo con los agregados en memoria o con SQL"""
+    from fastapi.testclient import TestClient
+    from src.main import app
+
+    board = RegionalLeaderboards()
+    monkeypatch.setattr(public_router, "leaderboard", board)
+    _seed(db_session)
+    if ready:
+        monkeypatch.setattr(lb_module, "leaderboard", board)
+        rebuild_from_db(db_session)
+
+    app.dependency_overrides[public_router.get_db] = lambda: FakeAsyncSession(db_session)
+    client = TestClient(app)
+    try:
+        country = client.get("/api/public/rankings", params={"country": "colombia"})
+        city = client.get("/api/public/rankings", params={"country": "Colombia", "city": "Medellín"})
+        empty = client.get("/api/public/rankings", params={"country": "Chile"})
+        city_only = client.get("/api/public/rankings", params={"city": "Lima"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert country.json() == [
+        {"jugador": "Leo", "votos_acumulados": 7},
+        {"jugador": "Ana", "votos_acumulados": 6},
+    ]
+    assert city.json() == [{"jugador": "Leo", "votos_acumulados": 7}]
+    assert country.headers["etag"] != city.headers["etag"]
+    assert empty.status_code == 404
+    assert city_only.status_code == 400
@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from src.routers import public_router
+from src.utils.events import VOTE
+from src.utils.live_updates import HEARTBEAT, RESYNC, RETRY, LiveBroadcaster
+
+
+def _broadcaster(totals=None, tops=None, **kwargs):
+    totals = totals if totals is not None else {}
+    tops = list(tops) if tops is not None else []
+    return LiveBroadcaster(
+        load_totals=lambda ids: {i: totals.get(i, 0) for i in ids},
+        load_top=lambda n: tops.pop(0) if tops else None,
+        **kwargs,
+    )
+
+
+def _data(message: bytes) -> dict:
+    return json.loads(message.decode().split("data: ", 1)[1])
+
+
+def test_votes_are_coalesced_per_tick():
+    broadcaster = _broadcaster(totals={1: 9000, 2: 1000, 3: 1})
+    for i in range(10_000):
+        broadcaster.on_event({"type": VOTE, "video_id": 1 if i < 9000 else 2, "owner_id": 5})
+    broadcaster.on_event({"type": VOTE, "video_ids": [3]})
+
+    assert json.loads(broadcaster.build_payload()) == {"videos": {"1": 9000, "2": 1000}}
+    assert broadcaster.build_payload() is None
+
+
+def test_only_changed_ranking_positions_are_sent():
+    ana, leo, eva = ({"jugador": n, "votos_acumulados": v} for n, v in (("Ana", 5), ("Leo", 4), ("Eva", 1)))
+    leo_up = {"jugador": "Leo", "votos_acumulados": 6}
+    broadcaster = _broadcaster(tops=[[ana, leo, eva], [leo_up, ana, eva]])
+
+    broadcaster.mark(1)
+    assert len(json.loads(broadcaster.build_payload())["ranking"]) == 3
+    broadcaster.mark(1)
+    assert json.loads(broadcaster.build_payload())["ranking"] == [
+        {"posicion": 1, **leo_up},
+        {"posicion": 2, **ana},
+    ]
+
+
+def test_fan_out_shares_one_message_and_resyncs_laggards():
+    async def main():
+        broadcaster = _broadcaster(totals={7: 3}, backlog=2, heartbeat=0.05)
+        fast = [broadcaster.stream() for _ in range(3)]
+        slow = broadcaster.stream()
+        for stream in fast + [slow]:
+            assert await anext(stream) == RETRY
+        assert broadcaster.subscribers == 4
+
+        waiting = [asyncio.ensure_future(anext(stream)) for stream in fast]
+        await asyncio.sleep(0)
+        broadcaster.mark(7)
+        await broadcaster.tick()
+        received = await asyncio.gather(*waiting)
+        # Un solo mensaje serializado, compartido por todos los suscriptores
+        assert all(message is received[0] for message in received)
+        assert _data(received[0]) == {"videos": {"7": 3}}
+
+        # El lento se pierde más mensajes de los que guarda el backlog
+        for _ in range(2):
+            broadcaster.mark(7)
+            await broadcaster.tick()
+        assert await anext(slow) == RESYNC
+        # Sin votos nuevos solo recibe el latido
+        assert await anext(slow) == HEARTBEAT
+
+        # Al reconectar con Last-Event-ID recibe lo que sigue en el backlog
+        resumed = broadcaster.stream(last_event_id="2")
+        assert await anext(resumed) == RETRY
+        assert (await anext(resumed)).startswith(b"id: 3\n")
+
+        for stream in fast + [slow, resumed]:
+            await stream.aclose()
+        assert broadcaster.subscribers == 0
+
+    asyncio.run(main())
+
+
+def test_live_endpoint_rejects_when_full(monkeypatch):
+    from src.main import app
+
+    monkeypatch.setattr(public_router, "live_broadcaster", _broadcaster(max_subscribers=0))
+    r = TestClient(app).get("/api/public/live")
+
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "5"
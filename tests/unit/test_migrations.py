@@ -0,0 +1,209 @@
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.orm import sessionmaker
+
+from src.db.database import Base
+from src.models.db_models import Usuario, Video, Vote, VoteBucket
+from src.routers.public_router import _public_videos_page
+from src.routers.videos_router import _my_videos_page
+from src.utils.leaderboard import latest_processed_at, region_totals_query, sync_processed_since
+from src.utils.pagination import NEXT_CURSOR_HEADER, encode_cursor
+from src.utils.trending import HOUR, hour_start, trending_page
+from src.utils.vote_utils import cast_vote
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def _alembic(url: str) -> Config:
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("sqlalchemy.url", url)
+    # fileConfig desactivaría los loggers ya creados (y caplog en otras pruebas)
+    config.attributes["configure_logger"] = False
+    return config
+
+
+@pytest.fixture
+def migrated(tmp_path):
+    url = f"sqlite:///{tmp_path / 'anb.db'}"
+    command.upgrade(_alembic(url), "head")
+    engine = create_engine(url)
+    yield engine
+    engine.dispose()
+
+
+def test_head_matches_models(migrated):
+    with migrated.connect() as conn:
+        assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+
+
+def test_upgrade_over_existing_create_all_schema(tmp_path):
+    """Bases creadas por el antiguo create_all al arrancar: la migración no falla ni duplica"""
+    url = f"sqlite:///{tmp_path / 'anb.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        # Índice que create_all creaba antes de ix_videos_status_processed
+        conn.execute(text("CREATE INDEX ix_videos_processed_at ON videos (processed_at)"))
+    command.upgrade(_alembic(url), "head")
+    with engine.connect() as conn:
+        assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+    engine.dispose()
+
+
+def test_unique_vote_migration_removes_duplicates(tmp_path):
+    url = f"sqlite:///{tmp_path / 'anb.db'}"
+    config = _alembic(url)
+    command.upgrade(config, "0002_pipeline_tables")
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO usuarios VALUES (1, 'Leo', 'B', 'leo@anb.co', 'x', 'C', 'D')"))
+        conn.execute(text("INSERT INTO videos (id, title, filename, status, owner_id, votes_count) VALUES (1, 'a', 'a', 'processed', 1, 3)"))
+        # Voto doble de la carrera check-then-insert anterior a la restricción
+        conn.execute(text("INSERT INTO votes (video_id, user_id) VALUES (1, 1), (1, 1), (1, 1)"))
+
+    command.upgrade(config, "head")
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM votes")).scalar() == 1
+        assert conn.execute(text("SELECT votes_count FROM videos WHERE id = 1")).scalar() == 1
+
+    command.downgrade(config, "base")
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT name FROM sqlite_master WHERE name = 'videos'")).first() is None
+    engine.dispose()
+
+
+def test_null_vote_counts_stay_in_the_public_listing(tmp_path):
+    """Con votes_count NULL la fila no cumplía el cursor (votes_count, id) y salía del listado"""
+    url = f"sqlite:///{tmp_path / 'anb.db'}"
+    config = _alembic(url)
+    command.upgrade(config, "0004_data_versions")
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO usuarios VALUES (1, 'Leo', 'B', 'leo@anb.co', 'x', 'C', 'D')"))
+        conn.execute(text(
+            "INSERT INTO videos (id, title, filename, status, owner_id, votes_count) VALUES "
+            "(1, 'a', 'a', 'processed', 1, 2), (2, 'b', 'b', 'processed', 1, NULL), (3, 'c', 'c', 'processed', 1, NULL)"
+        ))
+
+    command.upgrade(config, "head")
+    seen, cursor = [], None
+    with sessionmaker(bind=engine)() as db:
+        while True:
+            body, headers = _public_videos_page(db, cursor, 1)
+            seen += [(v["id"], v["votes_count"]) for v in json.loads(body)]
+            cursor = headers.get(NEXT_CURSOR_HEADER)
+            if cursor is None:
+                break
+    engine.dispose()
+
+    assert seen == [(1, 2), (3, 0), (2, 0)]
+
+
+def _seed(db):
+    now = datetime.now(timezone.utc)
+    db.add_all(
+        Usuario(id=u, first_name=f"J{u}", last_name="B", email=f"j{u}@anb.co", password="x", city="C", country="D")
+        for u in (1, 2)
+    )
+    db.add_all(
+        Video(id=i, title=f"v{i}", filename=f"v{i}", status="processed" if i % 2 else "uploaded",
+              owner_id=1 + i % 2, votes_count=i, uploaded_at=now - timedelta(minutes=i), processed_at=now)
+        for i in range(1, 21)
+    )
+    db.add(VoteBucket(granularity=HOUR, bucket_start=hour_start(now), video_id=1, owner_id=2, votes=1))
+    db.commit()
+
+
+def _plans(engine, run) -> list[str]:
+    """Ejecuta `run(db)` y retorna el EXPLAIN QUERY PLAN de cada SELECT que emitió."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with sessionmaker(bind=engine)() as db:
+            run(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    with engine.connect() as conn:
+        return [
+            " | ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params))
+            for sql, params in statements
+        ]
+
+
+def _sqlite_index(engine, table: str, columns: list[str]) -> str:
+    """Nombre del índice de SQLite sobre esas columnas (las restricciones UNIQUE son sqlite_autoindex_*)."""
+    with engine.connect() as conn:
+        for index in conn.exec_driver_sql(f"PRAGMA index_list({table})"):
+            name = index[1]
+            if [c[2] for c in conn.exec_driver_sql(f"PRAGMA index_info({name})")] == columns:
+                return name
+    raise AssertionError(f"Sin índice {columns} en {table}")
+
+
+@pytest.mark.parametrize("cursor", [None, encode_cursor(11, 11)])
+def test_public_listing_uses_status_votes_index(migrated, cursor):
+    with sessionmaker(bind=migrated)() as db:
+        _seed(db)
+    [plan] = _plans(migrated, lambda db: _public_videos_page(db, cursor, 5))
+    assert "SEARCH videos USING INDEX ix_videos_status_votes" in plan
+    # El orden lo da el índice: sin ordenar en memoria
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.parametrize("cursor", [None, encode_cursor(datetime(2025, 1, 1, tzinfo=timezone.utc), 3)])
+def test_my_videos_uses_owner_uploaded_index(migrated, cursor):
+    with sessionmaker(bind=migrated)() as db:
+        _seed(db)
+    [plan] = _plans(migrated, lambda db: _my_videos_page(db, 2, cursor, 5))
+    assert "SEARCH videos USING INDEX ix_videos_owner_uploaded" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_leaderboard_sync_uses_status_processed_index(migrated):
+    with sessionmaker(bind=migrated)() as db:
+        _seed(db)
+    # SQLite devuelve las fechas sin zona horaria
+    since = datetime.now() - timedelta(days=1)
+    [plan] = _plans(migrated, lambda db: sync_processed_since(db, since))
+    assert "SEARCH videos USING INDEX ix_videos_status_processed (status=? AND processed_at>?)" in plan
+    [plan] = _plans(migrated, latest_processed_at)
+    assert "USING COVERING INDEX ix_videos_status_processed (status=?)" in plan
+
+
+def test_vote_lookups_use_unique_vote_index(migrated):
+    with sessionmaker(bind=migrated)() as db:
+        _seed(db)
+        # El upsert del voto requiere la restricción única (ON CONFLICT)
+        assert cast_vote(db, 1, 2) is not None
+        assert cast_vote(db, 1, 2) is None
+        db.commit()
+
+    votes_index = _sqlite_index(migrated, "votes", ["video_id", "user_id"])
+    [plan] = _plans(migrated, lambda db: db.execute(select(Vote.id).where(Vote.video_id == 1, Vote.user_id == 2)).all())
+    assert f"SEARCH votes USING COVERING INDEX {votes_index} (video_id=? AND user_id=?)" in plan
+    [plan] = _plans(migrated, lambda db: region_totals_query(db).all())
+    assert f"SEARCH votes USING COVERING INDEX {votes_index} (video_id=?)" in plan
+    assert "SCAN votes" not in plan
+
+
+def test_trending_reads_only_window_buckets(migrated):
+    with sessionmaker(bind=migrated)() as db:
+        _seed(db)
+    buckets_index = _sqlite_index(migrated, "vote_buckets", ["granularity", "bucket_start", "video_id"])
+    [plan] = _plans(migrated, lambda db: trending_page(db, "day", 0, 10))
+    assert f"SEARCH vote_buckets USING INDEX {buckets_index} (granularity=? AND bucket_start>?)" in plan
+    assert "SCAN vote_buckets" not in plan
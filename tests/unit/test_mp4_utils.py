@@ -0,0 +1,76 @@
+import struct
+from pathlib import Path
+
+import pytest
+
+from src.utils.mp4_utils import Mp4HeaderParser, parse_moov, probe_mp4_bytes
+
+
+def box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def mvhd(duration_s: float, timescale: int = 1000, version: int = 0) -> bytes:
+    if version == 1:
+        body = struct.pack(">B3xQQIQ", 1, 0, 0, timescale, int(duration_s * timescale))
+    else:
+        body = struct.pack(">B3xIIII", 0, 0, 0, timescale, int(duration_s * timescale))
+    return box(b"mvhd", body + b"\x00" * 80)
+
+
+def trak(width: int, height: int, handler: bytes) -> bytes:
+    tkhd = struct.pack(">B3xIIIII8x", 0, 0, 0, 1, 0, 0) + b"\x00" * 8 + b"\x00" * 36
+    tkhd += struct.pack(">II", width << 16, height << 16)
+    hdlr = box(b"hdlr", struct.pack(">B3xI4s", 0, 0, handler) + b"\x00" * 12)
+    return box(b"trak", box(b"tkhd", tkhd) + box(b"mdia", hdlr))
+
+
+def mp4(duration_s=30.0, width=1920, height=1080, moov_first=True, version=0) -> bytes:
+    ftyp = box(b"ftyp", b"isom\x00\x00\x02\x00isomiso2mp41")
+    moov = box(b"moov", mvhd(duration_s, version=version) + trak(0, 0, b"soun") + trak(width, height, b"vide"))
+    mdat = box(b"mdat", b"\x00" * 4096)
+    return ftyp + (moov + mdat if moov_first else mdat + moov)
+
+
+@pytest.mark.parametrize("version", [0, 1])
+def test_parse_moov_extracts_duration_and_resolution(version):
+    data = mp4(duration_s=42.5, version=version)
+    assert probe_mp4_bytes(data) == (pytest.approx(42.5), 1920, 1080)
+
+
+def test_parser_works_with_small_chunks():
+    data = mp4(duration_s=25.0, width=3840, height=2160)
+    parser = Mp4HeaderParser()
+    for i in range(0, len(data), 7):
+        parser.feed(data[i:i + 7])
+        if parser.done:
+            break
+    assert parser.info == (pytest.approx(25.0), 3840, 2160)
+    # La información está disponible antes de recibir mdat
+    assert i < len(data) - 4096
+
+
+def test_parser_defers_when_moov_is_at_the_end():
+    parser = Mp4HeaderParser()
+    parser.feed(mp4(moov_first=False))
+    assert parser.info is None
+    assert parser.deferred
+
+
+def test_parser_fails_on_unknown_structure():
+    parser = Mp4HeaderParser()
+    parser.feed(b"x" * 1024)
+    assert parser.info is None
+    assert parser.failed
+
+
+def test_parse_moov_without_duration_returns_none():
+    moov = box(b"moov", trak(1920, 1080, b"vide"))
+    assert parse_moov(moov) is None
+
+
+def test_parser_matches_real_file():
+    data = Path("videos/test-videos/video_test_fail.mov").read_bytes()
+    duration, width, height = probe_mp4_bytes(data)
+    assert duration == pytest.approx(11.73, abs=0.01)
+    assert (width, height) == (1280, 720)
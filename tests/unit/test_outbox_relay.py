@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+import boto3
+from moto import mock_aws
+
+from src.models.db_models import OutboxMessage, Usuario, Video
+from src.utils import outbox_relay, sqs_utils
+
+
+def _seed(db, n):
+    user = Usuario(first_name="Ana", last_name="Díaz", email="ana@test.co", password="x", city="Bogotá", country="Colombia")
+    db.add(user)
+    db.flush()
+    for i in range(n):
+        video = Video(title=f"v{i}", filename=f"unprocessed-videos/v{i}.mp4", owner_id=user.id)
+        video.outbox_messages.append(OutboxMessage())
+        db.add(video)
+    db.commit()
+
+
+def test_relay_sends_in_batches_of_ten(db_session, monkeypatch):
+    _seed(db_session, 23)
+    calls = []
+    monkeypatch.setattr(outbox_relay, "send_batch_to_sqs", lambda msgs: calls.append(msgs) or set(range(len(msgs))))
+
+    assert outbox_relay.relay_once(db_session) == (10, 0)
+    assert outbox_relay.relay_once(db_session) == (10, 0)
+    assert outbox_relay.relay_once(db_session) == (3, 0)
+    assert outbox_relay.relay_once(db_session) == (0, 0)
+
+    assert [len(c) for c in calls] == [10, 10, 3]
+    # Orden de llegada preservado
+    assert [m["title"] for m in calls[0]] == [f"v{i}" for i in range(10)]
+    assert db_session.query(OutboxMessage).count() == 0
+
+
+def test_relay_keeps_failed_messages_for_retry(db_session, monkeypatch):
+    _seed(db_session, 3)
+    monkeypatch.setattr(outbox_relay, "send_batch_to_sqs", lambda msgs: {0, 2})
+
+    assert outbox_relay.relay_once(db_session) == (2, 1)
+    pending = db_session.query(OutboxMessage).all()
+    assert len(pending) == 1
+    assert pending[0].video.title == "v1"
+    assert pending[0].attempts == 1
+
+    monkeypatch.setattr(outbox_relay, "send_batch_to_sqs", lambda msgs: set(range(len(msgs))))
+    assert outbox_relay.relay_once(db_session) == (1, 0)
+    assert db_session.query(OutboxMessage).count() == 0
+
+
+def test_relay_stops_retrying_after_max_attempts(db_session, monkeypatch):
+    _seed(db_session, 2)
+    monkeypatch.setattr(outbox_relay, "OUTBOX_MAX_ATTEMPTS", 2)
+    # SQS rechaza siempre el primer mensaje
+    monkeypatch.setattr(outbox_relay, "send_batch_to_sqs", lambda msgs: set(range(1, len(msgs))))
+
+    assert outbox_relay.relay_once(db_session) == (1, 1)
+    assert outbox_relay.relay_once(db_session) == (0, 1)
+    # Muerto: el relay ya no lo lee, pero la fila se conserva
+    assert outbox_relay.relay_once(db_session) == (0, 0)
+    [dead] = db_session.query(OutboxMessage).all()
+    assert dead.video.title == "v0"
+    assert dead.attempts == 2
+    assert dead.dead_at is not None
+
+
+def test_relay_loop_survives_errors(monkeypatch):
+    calls = []
+
+    def drain():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("BD caída")
+        return 0, 0
+
+    monkeypatch.setattr(outbox_relay, "_drain", drain)
+    monkeypatch.setattr(outbox_relay, "OUTBOX_POLL_INTERVAL", 0.001)
+
+    async def main():
+        task = asyncio.ensure_future(outbox_relay.run_outbox_relay())
+        while len(calls) < 3:
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(asyncio.wait_for(main(), 2))
+    assert len(calls) >= 3
+
+
+def test_deleting_video_removes_pending_message(db_session):
+    _seed(db_session, 1)
+    db_session.delete(db_session.query(Video).one())
+    db_session.commit()
+    assert db_session.query(OutboxMessage).count() == 0
+
+
+def test_send_batch_to_sqs_fifo_queue(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        client = boto3.client("sqs", region_name="us-east-1")
+        url = client.create_queue(QueueName="videos.fifo", Attributes={"FifoQueue": "true"})["QueueUrl"]
+        monkeypatch.setattr(sqs_utils, "sqs_client", client)
+        monkeypatch.setattr(sqs_utils, "SQS_QUEUE_URL", url)
+
+        sent = sqs_utils.send_batch_to_sqs([{"id": i, "filename": f"v{i}.mp4"} for i in range(4)])
+
+        assert sent == {0, 1, 2, 3}
+        received = client.receive_message(QueueUrl=url, MaxNumberOfMessages=10)["Messages"]
+        assert [json.loads(m["Body"])["id"] for m in received] == [0, 1, 2, 3]
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from src.models.db_models import Usuario, Video
+from src.utils import pagination
+from src.utils.pagination import clamp_page_size, decode_cursor, encode_cursor, keyset_page
+from tests.fakes import FakeAsyncSession
+
+
+def _seed(db, votes):
+    db.add(Usuario(id=1, first_name="A", last_name="B", email="a@b.co", password="x", city="C", country="D"))
+    base = datetime(2025, 10, 1, 12, 0, 0)
+    for i, v in enumerate(votes, start=1):
+        db.add(Video(
+            id=i, title=f"v{i}", filename=f"v{i}.mp4", status="processed", owner_id=1,
+            votes_count=v, uploaded_at=base + timedelta(minutes=i // 2),
+        ))
+    db.commit()
+
+
+def _walk(db, sort_column, limit):
+    ids, cursor = [], None
+    while True:
+        rows, cursor = keyset_page(db.query(Video), sort_column, Video.id, cursor, limit)
+        ids.extend(r.id for r in rows)
+        if cursor is None:
+            return ids
+
+
+def test_cursor_roundtrip():
+    ts = datetime(2025, 10, 1, 12, 30)
+    assert decode_cursor(encode_cursor(7, 42)) == (7, 42)
+    assert decode_cursor(encode_cursor(ts, 3)) == (ts, 3)
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("no-es-un-cursor")
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("sort_value", ["5", [5], True, datetime(2025, 10, 1)])
+def test_cursor_with_wrong_value_type_is_rejected(db_session, sort_value):
+    """Un cursor manipulado no debe llegar a la consulta con un tipo distinto al de la columna"""
+    with pytest.raises(HTTPException) as exc:
+        keyset_page(db_session.query(Video), Video.votes_count, Video.id, encode_cursor(sort_value, 1), 2)
+    assert exc.value.status_code == 400
+
+    with pytest.raises(HTTPException) as exc:
+        keyset_page(db_session.query(Video), Video.uploaded_at, Video.id, encode_cursor(5, 1), 2)
+    assert exc.value.status_code == 400
+
+
+def test_page_size_is_capped(monkeypatch):
+    monkeypatch.setattr(pagination, "PAGE_SIZE_MAX", 50)
+    assert clamp_page_size(1000) == 50
+    assert clamp_page_size(0) == pagination.PAGE_SIZE_DEFAULT
+
+
+def test_pages_by_votes_are_stable_with_ties(db_session):
+    """Los empates en votes_count se desempatan por id: sin duplicados ni saltos"""
+    _seed(db_session, [5, 3, 5, 5, 1, 3, 0, 5])
+
+    ids = _walk(db_session, Video.votes_count, limit=3)
+
+    assert ids == [8, 4, 3, 1, 6, 2, 5, 7]
+
+
+def test_pages_by_upload_date(db_session):
+    _seed(db_session, [0] * 7)
+
+    assert _walk(db_session, Video.uploaded_at, limit=2) == [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_public_videos_next_cursor_header(db_session):
+    from fastapi.testclient import TestClient
+    from src.main import app
+    from src.routers import public_router
+
+    _seed(db_session, [4, 3, 2])
+    app.dependency_overrides[public_router.get_db] = lambda: FakeAsyncSession(db_session)
+    client = TestClient(app)
+    try:
+        first = client.get("/api/public/videos", params={"limit": 2})
+        cursor = first.headers["X-Next-Cursor"]
+        second = client.get("/api/public/videos", params={"limit": 2, "cursor": cursor})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [v["id"] for v in first.json()] == [1, 2]
+    assert [v["id"] for v in second.json()] == [3]
+    assert "X-Next-Cursor" not in second.headers
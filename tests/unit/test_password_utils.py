@@ -0,0 +1,36 @@
+import asyncio
+
+from passlib.context import CryptContext
+
+from src.utils import password_utils
+from src.utils.password_utils import hash_password, verify_password
+
+
+def test_hash_and_verify_roundtrip():
+    hashed = asyncio.run(hash_password("secreto123"))
+    assert hashed != "secreto123"
+    assert asyncio.run(verify_password("secreto123", hashed)) == (True, None)
+    assert asyncio.run(verify_password("otra", hashed)) == (False, None)
+
+
+def test_verify_plaintext_legacy_returns_new_hash():
+    valid, new_hash = asyncio.run(verify_password("abc123", "abc123"))
+    assert valid
+    assert password_utils.pwd_context.identify(new_hash) == "bcrypt"
+
+    assert asyncio.run(verify_password("xyz", "abc123")) == (False, None)
+
+
+def test_verify_rehashes_when_cost_changes(monkeypatch):
+    old_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    stored = old_context.hash("secreto123")
+    monkeypatch.setattr(
+        password_utils,
+        "pwd_context",
+        CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=5),
+    )
+
+    valid, new_hash = asyncio.run(verify_password("secreto123", stored))
+    assert valid
+    assert new_hash and new_hash != stored
+    assert "$05$" in new_hash
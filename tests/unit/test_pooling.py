@@ -0,0 +1,126 @@
+import asyncio
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from src.db import database, pooling
+from src.db.database import Base
+from src.db.pooling import ReadReplica, observe_pool, pool_options
+from src.models.db_models import Usuario, Video
+
+
+def test_pool_options_from_env(monkeypatch):
+    monkeypatch.setattr(pooling, "DB_POOL_SIZE", 3)
+    monkeypatch.setattr(pooling, "DB_MAX_OVERFLOW", 2)
+    monkeypatch.setattr(pooling, "DB_POOL_RECYCLE", 60)
+    monkeypatch.setattr(pooling, "DB_POOL_TIMEOUT", 1.5)
+
+    options = pool_options("postgresql://u:p@db/ANB", "sync")
+    assert issubclass(options["poolclass"], QueuePool)
+    assert not issubclass(options["poolclass"], AsyncAdaptedQueuePool)
+    assert (options["pool_size"], options["max_overflow"], options["pool_recycle"], options["pool_timeout"]) == (
+        3, 2, 60, 1.5,
+    )
+    assert issubclass(pool_options("postgresql+asyncpg://u:p@db/ANB", "primary")["poolclass"], AsyncAdaptedQueuePool)
+    # SQLite en memoria conserva su pool de una conexión
+    assert pool_options("sqlite://", "sync") == {"pool_pre_ping": True}
+
+
+def test_pool_metrics_track_checkouts_and_timeouts(tmp_path, monkeypatch):
+    monkeypatch.setattr(pooling, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(pooling, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(pooling, "DB_POOL_TIMEOUT", 0.05)
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, **pool_options(url, "test-pool"))
+    observe_pool(engine, "test-pool")
+    labels = {"engine": "test-pool"}
+    waits = REGISTRY.get_sample_value("db_pool_checkout_seconds_count", labels) or 0
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert REGISTRY.get_sample_value("db_pool_in_use_connections", labels) == 1
+        # Pool agotado: la segunda conexión espera DB_POOL_TIMEOUT y falla
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    assert REGISTRY.get_sample_value("db_pool_in_use_connections", labels) == 0
+    assert REGISTRY.get_sample_value("db_pool_idle_connections", labels) == 1
+    assert REGISTRY.get_sample_value("db_pool_timeouts_total", labels) == 1
+    assert REGISTRY.get_sample_value("db_pool_checkout_seconds_count", labels) == waits + 2
+
+    # dispose() recrea el pool con la misma clase instrumentada
+    engine.dispose()
+    with engine.connect():
+        assert REGISTRY.get_sample_value("db_pool_in_use_connections", labels) == 1
+    engine.dispose()
+
+
+def _seed(path, title: str):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        db.add(Usuario(id=1, first_name="Leo", last_name="B", email="leo@anb.co", password="x", city="C", country="D"))
+        db.add(Video(id=1, title=title, filename="a.mp4", status="processed", owner_id=1, votes_count=0))
+        db.commit()
+    engine.dispose()
+
+
+def test_read_endpoints_use_replica_and_fall_back_to_primary(tmp_path, monkeypatch):
+    """Dos bases SQLite con datos distintos: los listados leen de la réplica mientras responde"""
+    from src.main import app
+    from src.utils.response_cache import response_cache
+    from src.utils.versioning import data_version
+
+    _seed(tmp_path / "primary.db", "primario")
+    _seed(tmp_path / "replica.db", "réplica")
+    primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}")
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    # Directorio inexistente: la conexión falla como una réplica caída
+    broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'no-existe' / 'replica.db'}")
+    primary_sessions = async_sessionmaker(primary, expire_on_commit=False)
+
+    async def get_primary_db():
+        async with primary_sessions() as db:
+            yield db
+
+    async def titles(client):
+        # Ambas bases tienen la misma versión de datos: sin esto responderían desde la caché
+        data_version.invalidate()
+        response_cache.clear()
+        return [v["title"] for v in (await client.get("/api/public/videos")).json()]
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            monkeypatch.setattr(database, "read_replica", ReadReplica(async_sessionmaker(replica)))
+            from_replica = await titles(client)
+
+            down = ReadReplica(async_sessionmaker(broken), retry_interval=60)
+            monkeypatch.setattr(database, "read_replica", down)
+            fallbacks = REGISTRY.get_sample_value("db_replica_fallbacks_total")
+            from_primary = await titles(client)
+            # No se reintenta la réplica hasta que pase retry_interval
+            assert not down.available
+            await titles(client)
+            assert REGISTRY.get_sample_value("db_replica_fallbacks_total") == fallbacks + 2
+
+            # Sin réplica configurada todo va al primario
+            monkeypatch.setattr(database, "read_replica", ReadReplica())
+            without_replica = await titles(client)
+        for engine in (primary, replica, broken):
+            await engine.dispose()
+        return from_replica, from_primary, without_replica
+
+    app.dependency_overrides[database.get_db] = get_primary_db
+    try:
+        from_replica, from_primary, without_replica = asyncio.run(main())
+    finally:
+        app.dependency_overrides.clear()
+
+    assert from_replica == ["réplica"]
+    assert from_primary == ["primario"]
+    assert without_replica == ["primario"]
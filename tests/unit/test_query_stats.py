@@ -0,0 +1,110 @@
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+
+from src.db import query_stats
+from src.db.query_stats import QueryStatsMiddleware, current_stats, statement_shape
+from src.utils.executors import io_pool
+from tests.fakes import FakeAsyncSession
+
+
+def test_statement_shape_ignores_parameter_lists_and_whitespace():
+    assert statement_shape("SELECT id FROM videos\n  WHERE id IN (?, ?, ?)") == "SELECT id FROM videos WHERE id IN (?)"
+    assert statement_shape("SELECT 1 WHERE id IN (%(id_1)s, %(id_2)s)") == statement_shape("SELECT 1 WHERE id IN (%(id_1)s)")
+    assert statement_shape("SELECT 1 WHERE id IN ($1, $2)") == "SELECT 1 WHERE id IN (?)"
+
+
+def _app(db_session):
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    @app.get("/items/{n}")
+    def repeat(n: int):
+        # Un N+1 clásico: la misma consulta una vez por elemento
+        for i in range(n):
+            db_session.execute(text("SELECT :i"), {"i": i}).all()
+        return {"queries": current_stats().count}
+
+    @app.get("/threaded")
+    async def threaded():
+        # La consulta corre en un hilo del io_pool y se cuenta igual
+        await io_pool.run(lambda: db_session.execute(text("SELECT 1")).all())
+        return {"queries": current_stats().count}
+
+    return app
+
+
+def test_counts_queries_per_request_and_route(db_session, monkeypatch):
+    monkeypatch.setattr(query_stats, "SQL_DEBUG_HEADERS", True)
+    client = TestClient(_app(db_session))
+    labels = {"route": "/items/{n}"}
+    before = REGISTRY.get_sample_value("db_queries_per_request_count", labels) or 0
+    total_before = REGISTRY.get_sample_value("db_queries_per_request_sum", labels) or 0
+
+    r = client.get("/items/2")
+
+    assert r.json() == {"queries": 2}
+    assert r.headers["X-DB-Queries"] == "2"
+    assert float(r.headers["X-DB-Time-Ms"]) >= 0
+    assert "X-DB-N-Plus-One" not in r.headers
+    assert REGISTRY.get_sample_value("db_queries_per_request_count", labels) == before + 1
+    assert REGISTRY.get_sample_value("db_queries_per_request_sum", labels) == total_before + 2
+
+    r = client.get("/threaded")
+    assert r.json() == {"queries": 1}
+    assert r.headers["X-DB-Queries"] == "1"
+
+
+def test_debug_headers_are_off_by_default(db_session):
+    r = TestClient(_app(db_session)).get("/items/1")
+    assert "X-DB-Queries" not in r.headers
+
+
+def test_flags_repeated_statements_as_n_plus_one(db_session, monkeypatch, caplog):
+    monkeypatch.setattr(query_stats, "SQL_DEBUG_HEADERS", True)
+    monkeypatch.setattr(query_stats, "SQL_N_PLUS_ONE_THRESHOLD", 5)
+    labels = {"route": "/items/{n}"}
+    flagged = REGISTRY.get_sample_value("db_n_plus_one_requests_total", labels) or 0
+
+    with caplog.at_level(logging.WARNING, logger="src.db.query_stats"):
+        r = TestClient(_app(db_session)).get("/items/6")
+
+    assert r.headers["X-DB-N-Plus-One"] == "6"
+    assert REGISTRY.get_sample_value("db_n_plus_one_requests_total", labels) == flagged + 1
+    assert "Posible N+1 en GET /items/{n}: 6 veces SELECT ?" in caplog.text
+
+
+def test_logs_slow_statements_with_parameters(db_session, monkeypatch, caplog):
+    monkeypatch.setattr(query_stats, "SQL_SLOW_QUERY_SECONDS", 0)
+    slow = REGISTRY.get_sample_value("db_slow_queries_total")
+
+    with caplog.at_level(logging.WARNING, logger="src.db.query_stats"):
+        db_session.execute(text("SELECT :nombre"), {"nombre": "lenta"}).all()
+
+    assert REGISTRY.get_sample_value("db_slow_queries_total") == slow + 1
+    assert "Sentencia lenta" in caplog.text
+    assert "'lenta'" in caplog.text
+
+
+def test_api_routes_report_their_queries(db_session, monkeypatch):
+    """El middleware de la API cuenta las consultas de las rutas con sesión async"""
+    from src.db import database
+    from src.main import app
+    from src.models.db_models import Usuario, Video
+
+    db_session.add(Usuario(id=1, first_name="Leo", last_name="B", email="leo@anb.co", password="x", city="C", country="D"))
+    db_session.add(Video(id=1, title="a", filename="a", status="processed", owner_id=1, votes_count=3))
+    db_session.commit()
+    monkeypatch.setattr(query_stats, "SQL_DEBUG_HEADERS", True)
+    app.dependency_overrides[database.get_db] = lambda: FakeAsyncSession(db_session)
+    try:
+        r = TestClient(app).get("/api/public/videos")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert r.status_code == 200
+    # Versión de los datos + página del listado
+    assert int(r.headers["X-DB-Queries"]) >= 2
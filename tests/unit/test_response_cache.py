@@ -0,0 +1,213 @@
+import json
+from datetime import datetime
+
+import pytest
+import redis
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.main import app
+from src.models.db_models import Usuario, Video
+from src.routers import public_router
+from src.utils import response_cache as rc
+from src.utils.events import PROCESSED, VOTE, RedisEventBus
+from src.utils.response_cache import MemoryResponseCache, RedisResponseCache, on_data_event
+from tests.fakes import FakeAsyncSession
+
+
+class FakeRedis:
+    """Cliente mínimo: clave-valor y un canal pub/sub compartido entre 'instancias'."""
+
+    def __init__(self, broker=None, fail=False):
+        self.store = {}
+        self.broker = broker if broker is not None else []
+        self.fail = fail
+
+    def get(self, key):
+        if self.fail:
+            raise redis.ConnectionError("sin conexión")
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        if self.fail:
+            raise redis.ConnectionError("sin conexión")
+        self.store[key] = value
+
+    def publish(self, channel, data):
+        if self.fail:
+            raise redis.ConnectionError("sin conexión")
+        self.broker.append({"type": "message", "channel": channel, "data": data})
+
+    def sadd(self, key, member):
+        self.store.setdefault(key, set()).add(member)
+
+    def smembers(self, key):
+        return set(self.store.get(key, ()))
+
+    def expire(self, key, seconds):
+        pass
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+    def unlink(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Encola las llamadas y las ejecuta juntas en execute()."""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        if self.client.fail:
+            raise redis.ConnectionError("sin conexión")
+        return [getattr(self.client, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+def test_memory_cache_lru_and_invalidation():
+    cache = MemoryResponseCache(max_entries=2, ttl=60)
+    cache.set("public_videos", "a", b"1")
+    cache.set("rankings", "b", b"2")
+    cache.get("public_videos", "a")
+    cache.set("rankings", "c", b"3")
+
+    assert cache.get("rankings", "b") is None
+    assert cache.get("public_videos", "a") == b"1"
+
+    cache.invalidate("public_videos")
+    assert cache.get("public_videos", "a") is None
+    assert cache.get("rankings", "c") == b"3"
+
+
+def test_redis_cache_errors_are_misses():
+    cache = RedisResponseCache(FakeRedis(), ttl=60)
+    cache.set("rankings", '"abc"', b"x")
+    assert cache.get("rankings", '"abc"') == b"x"
+
+    broken = RedisResponseCache(FakeRedis(fail=True))
+    broken.set("rankings", "k", b"x")
+    assert broken.get("rankings", "k") is None
+
+
+def test_event_reaches_other_instances_only_once():
+    broker = []
+    bus_a, bus_b = RedisEventBus(FakeRedis(broker)), RedisEventBus(FakeRedis(broker))
+    seen_a, seen_b = [], []
+    bus_a.subscribe(seen_a.append)
+    bus_b.subscribe(seen_b.append)
+
+    bus_a.publish(VOTE, video_id=1, owner_id=2)
+    for message in broker:
+        bus_a.handle_message(message)
+        bus_b.handle_message(message)
+
+    assert [e["video_id"] for e in seen_a] == [1]
+    assert [e["video_id"] for e in seen_b] == [1]
+    assert json.loads(broker[0]["data"])["type"] == VOTE
+
+
+def test_publish_without_redis_still_applies_locally():
+    bus = RedisEventBus(FakeRedis(fail=True))
+    seen = []
+    bus.subscribe(seen.append)
+
+    bus.publish(PROCESSED, video_id=3)
+
+    assert seen[0]["video_id"] == 3
+
+
+def test_data_event_invalidates_public_namespaces(monkeypatch):
+    cache = MemoryResponseCache()
+    monkeypatch.setattr(rc, "response_cache", cache)
+    cache.set("public_videos", "e1", b"[]")
+    cache.set("rankings", "e2", b"[]")
+
+    on_data_event({"type": PROCESSED, "video_id": 1})
+
+    assert len(cache) == 0
+
+
+def test_redis_cache_invalidation_deletes_namespace_keys():
+    client = FakeRedis()
+    cache = RedisResponseCache(client, ttl=60)
+    cache.set("rankings", '"a"', b"1")
+    cache.set("rankings", '"b"', b"2")
+    cache.set("trending", '"c"', b"3")
+
+    cache.invalidate("rankings")
+
+    assert cache.get("rankings", '"a"') is None
+    assert cache.get("rankings", '"b"') is None
+    assert cache.get("trending", '"c"') == b"3"
+    # Sin Redis la invalidación no falla
+    RedisResponseCache(FakeRedis(fail=True)).invalidate("rankings")
+
+
+def test_shared_cache_is_invalidated_by_the_origin_instance_only(monkeypatch):
+    cache = RedisResponseCache(FakeRedis(), ttl=60)
+    monkeypatch.setattr(rc, "response_cache", cache)
+    cache.set("rankings", '"a"', b"1")
+
+    on_data_event({"type": VOTE, "origin": "otra-instancia", "video_id": 1})
+    assert cache.get("rankings", '"a"') == b"1"
+
+    on_data_event({"type": VOTE, "origin": rc.event_bus.instance_id, "video_id": 1})
+    assert cache.get("rankings", '"a"') is None
+
+
+@pytest.fixture
+def api(db_session):
+    db_session.add(Usuario(id=1, first_name="Leo", last_name="B", email="l@b.co", password="x", city="C", country="D"))
+    for i in (1, 2, 3):
+        db_session.add(Video(id=i, title=f"v{i}", filename=f"v{i}.mp4", status="processed", owner_id=1,
+                             votes_count=10 - i, processed_at=datetime(2025, 10, 1, 10)))
+    db_session.commit()
+    app.dependency_overrides[public_router.get_db] = lambda: FakeAsyncSession(db_session)
+    app.dependency_overrides[public_router.get_current_user] = lambda: type("U", (), {"id": 1})()
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_cached_page_is_served_without_queries(api, db_session):
+    first = api.get("/api/public/videos", params={"limit": 2})
+
+    statements = []
+    event.listen(db_session.get_bind(), "before_cursor_execute", lambda *a, **k: statements.append(a[2]))
+    second = api.get("/api/public/videos", params={"limit": 2})
+
+    assert statements == []
+    assert second.content == first.content
+    assert second.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+
+def test_vote_invalidates_cached_listing(api):
+    assert api.get("/api/public/videos").json()[2]["votes_count"] == 7
+
+    api.post("/api/public/videos/3/vote")
+
+    assert api.get("/api/public/videos").json()[2]["votes_count"] == 8
+
+
+def test_worker_publishes_processed_event(db_session, monkeypatch):
+    from worker import video_processor_task as task
+
+    db_session.add(Usuario(id=1, first_name="Leo", last_name="B", email="l@b.co", password="x", city="C", country="D"))
+    db_session.add(Video(id=5, title="v", filename="v.mp4", owner_id=1))
+    db_session.commit()
+    published = []
+    monkeypatch.setattr(task, "publish_event", lambda event_type, **data: published.append((event_type, data)))
+
+    task._mark_processed(db_session, 5, "processed-videos/v_processed.mp4", "ab" * 32)
+
+    assert published == [(PROCESSED, {"video_id": 5})]
@@ -0,0 +1,116 @@
+import asyncio
+
+import httpx
+from sqlalchemy import event
+
+from src.utils.singleflight import SingleFlight, SingleFlightTimeoutError
+from tests.fakes import FakeAsyncSession
+
+
+def test_async_callers_share_one_execution():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def slow_query():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return [1, 2, 3]
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("rankings", slow_query) for _ in range(20)))
+
+    assert asyncio.run(main()) == [[1, 2, 3]] * 20
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+def test_async_errors_and_timeouts():
+    flight = SingleFlight("test", timeout=0.05)
+    calls = []
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("BD caída")
+
+    async def stuck():
+        calls.append(1)
+        await asyncio.sleep(1)
+
+    async def main():
+        errors = await asyncio.gather(*(flight.do_async("k", failing) for _ in range(3)), return_exceptions=True)
+        # La ejecución colgada se corta para quien la ejecuta y para quienes la esperaban
+        timeouts = await asyncio.gather(*(flight.do_async("s", stuck) for _ in range(3)), return_exceptions=True)
+        return errors, timeouts
+
+    errors, timeouts = asyncio.run(main())
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert all(isinstance(e, SingleFlightTimeoutError) for e in timeouts)
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+def test_async_follower_retries_after_leader_cancelled():
+    """Si el cliente que ejecutaba la consulta se desconecta, los demás no heredan la cancelación"""
+    flight = SingleFlight("test")
+    calls = []
+
+    async def query():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do_async("k", query))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do_async("k", query))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == "ok"
+    assert len(calls) == 2
+
+
+def test_cold_rankings_run_one_group_by(db_session, monkeypatch):
+    """N peticiones simultáneas a /rankings con la caché fría ejecutan un solo GROUP BY"""
+    from src.main import app
+    from src.models.db_models import Usuario, Video
+    from src.routers import public_router
+
+    db_session.add(Usuario(id=1, first_name="Leo", last_name="B", email="l@b.co", password="x", city="C", country="D"))
+    db_session.add(Video(id=1, title="a", filename="a", status="processed", owner_id=1, votes_count=4))
+    db_session.commit()
+
+    real_cached_json = public_router.cached_json
+
+    async def slow_cached_json(namespace, etag, headers, build):
+        async def slow_build():
+            await asyncio.sleep(0.2)
+            return await build()
+        return await real_cached_json(namespace, etag, headers, slow_build)
+
+    monkeypatch.setattr(public_router, "cached_json", slow_cached_json)
+    group_bys = []
+    event.listen(
+        db_session.get_bind(), "before_cursor_execute",
+        lambda conn, cursor, statement, *a: "GROUP BY" in statement and group_bys.append(statement),
+    )
+    app.dependency_overrides[public_router.get_db] = lambda: FakeAsyncSession(db_session)
+
+    async def main():
+        from src.utils.response_cache import response_cache
+
+        # Un solo event loop, como un worker de uvicorn
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            await client.get("/api/public/rankings", params={"limit": 99})  # calienta la versión de los datos
+            response_cache.clear()
+            group_bys.clear()
+            return await asyncio.gather(*(client.get("/api/public/rankings") for _ in range(10)))
+
+    try:
+        results = asyncio.run(main())
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [r.status_code for r in results] == [200] * 10
+    assert len(group_bys) == 1
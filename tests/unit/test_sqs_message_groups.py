@@ -0,0 +1,54 @@
+import pytest
+
+from benchmarks.sqs_message_groups import InMemoryFifoQueue, generate_uploads, simulate
+from src.utils.sqs_utils import message_group_id
+
+
+@pytest.mark.parametrize(
+    "strategy,expected",
+    [
+        ("global", "video-processing"),
+        ("owner", "owner-7"),
+        ("video", "video-3"),
+    ],
+)
+def test_message_group_id_strategies(strategy, expected):
+    assert message_group_id({"id": 3, "owner_id": 7}, strategy=strategy) == expected
+
+
+def test_sharded_groups_are_stable_and_bounded():
+    groups = {message_group_id({"id": i, "owner_id": i}, strategy="sharded", shards=4) for i in range(100)}
+    assert groups == {f"shard-{n}" for n in range(4)}
+    assert message_group_id({"owner_id": 5}, strategy="sharded", shards=4) == message_group_id(
+        {"owner_id": 5}, strategy="sharded", shards=4
+    )
+
+
+def test_fifo_queue_blocks_group_until_delete():
+    queue = InMemoryFifoQueue()
+    queue.send({"id": 1}, "a")
+    queue.send({"id": 2}, "a")
+    queue.send({"id": 3}, "b")
+    assert queue.receive() == ("a", {"id": 1})
+    assert queue.receive() == ("b", {"id": 3})
+    assert queue.receive() is None
+    queue.delete("a")
+    assert queue.receive() == ("a", {"id": 2})
+
+
+def test_global_group_does_not_scale_with_workers():
+    uploads = generate_uploads(owners=20, videos=100)
+    assert simulate(uploads, 1, "global")["throughput"] == simulate(uploads, 10, "global")["throughput"]
+
+
+def test_owner_groups_scale_and_preserve_per_owner_order():
+    uploads = generate_uploads(owners=50, videos=200, heavy_share=0.0)
+    single = simulate(uploads, 1, "owner")
+    parallel = simulate(uploads, 8, "owner")
+    assert parallel["throughput"] > 6 * single["throughput"]
+    assert parallel["order_violations"] == 0
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        message_group_id({"id": 1, "owner_id": 1}, strategy="onwer")
@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, text
+
+from benchmarks.synthetic_data import run
+
+NOW = datetime(2025, 11, 1, tzinfo=timezone.utc)
+
+
+def _load(path, seed=7):
+    url = f"sqlite:///{path}"
+    result = run(url, users=300, videos_per_user=2, votes=3000, seed=seed, now=NOW, password_hash="x", batch_size=100)
+    return url, result
+
+
+def _dump(url):
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        rows = {
+            table: conn.execute(text(f"SELECT * FROM {table} ORDER BY id")).all()
+            for table in ("usuarios", "videos", "votes")
+        }
+    engine.dispose()
+    return rows
+
+
+def test_generated_data_is_consistent(tmp_path):
+    url, result = _load(tmp_path / "a.db")
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        counts = {t: conn.execute(text(f"SELECT count(*) FROM {t}")).scalar() for t in ("usuarios", "videos", "votes")}
+        # votes_count coincide con la tabla votes y solo se vota por videos procesados
+        mismatched = conn.execute(text(
+            "SELECT count(*) FROM videos WHERE votes_count != "
+            "(SELECT count(*) FROM votes WHERE votes.video_id = videos.id)"
+        )).scalar()
+        unprocessed_votes = conn.execute(text(
+            "SELECT count(*) FROM votes JOIN videos ON videos.id = votes.video_id "
+            "WHERE videos.status != 'processed' OR votes.created_at < videos.processed_at"
+        )).scalar()
+        top = conn.execute(text("SELECT votes_count FROM videos ORDER BY votes_count DESC LIMIT 10")).scalars().all()
+        by_country = dict(conn.execute(text("SELECT country, count(*) FROM usuarios GROUP BY country")).all())
+    engine.dispose()
+
+    assert counts == result["rows"]
+    assert counts["usuarios"] == 300
+    assert 2000 < counts["votes"] < 4000
+    assert mismatched == 0
+    assert unprocessed_votes == 0
+    # Popularidad tipo Zipf: el video más votado supera con creces al décimo
+    assert top[0] > 3 * top[-1]
+    assert by_country["Colombia"] == max(by_country.values())
+
+
+def test_same_seed_generates_same_rows(tmp_path):
+    url_a, _ = _load(tmp_path / "a.db")
+    url_b, _ = _load(tmp_path / "b.db")
+    url_c, _ = _load(tmp_path / "c.db", seed=8)
+
+    assert _dump(url_a) == _dump(url_b)
+    assert _dump(url_a)["votes"] != _dump(url_c)["votes"]
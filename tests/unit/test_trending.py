@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from src.models.db_models import Usuario, Video, VoteBucket
+from src.routers import public_router
+from src.utils.trending import DAY, HOUR, compact_vote_buckets, record_votes, trending_page
+from tests.fakes import FakeAsyncSession
+
+NOW = datetime(2025, 10, 20, 15, 30, tzinfo=timezone.utc)
+
+
+def _seed(db):
+    db.add_all([
+        Usuario(id=1, first_name="Ana", last_name="B", email="a@b.co", password="x", city="C", country="D"),
+        Usuario(id=2, first_name="Leo", last_name="B", email="l@b.co", password="x", city="C", country="D"),
+    ])
+    db.add_all([
+        Video(id=1, title="a", filename="a", status="processed", owner_id=1, votes_count=0),
+        Video(id=2, title="b", filename="b", status="processed", owner_id=2, votes_count=0),
+        Video(id=3, title="c", filename="c", status="processed", owner_id=1, votes_count=0),
+    ])
+    db.commit()
+
+
+def _buckets(db):
+    return db.query(VoteBucket.granularity, VoteBucket.video_id, VoteBucket.votes).order_by(
+        VoteBucket.granularity, VoteBucket.bucket_start, VoteBucket.video_id
+    ).all()
+
+
+def test_record_votes_accumulates_per_hour(db_session):
+    _seed(db_session)
+
+    record_votes(db_session, {1: 1}, at=NOW)
+    record_votes(db_session, {1: 2, 2: 1}, at=NOW + timedelta(minutes=20))
+    record_votes(db_session, {1: 1}, at=NOW + timedelta(hours=1))
+    db_session.commit()
+
+    assert _buckets(db_session) == [(HOUR, 1, 3), (HOUR, 2, 1), (HOUR, 1, 1)]
+    assert db_session.query(VoteBucket.owner_id).filter(VoteBucket.video_id == 2).scalar() == 2
+
+
+def test_trending_windows(db_session):
+    _seed(db_session)
+    record_votes(db_session, {1: 5, 3: 1}, at=NOW - timedelta(hours=30))
+    record_votes(db_session, {2: 4}, at=NOW - timedelta(hours=2))
+    record_votes(db_session, {1: 1}, at=NOW)
+    record_votes(db_session, {2: 50}, at=NOW - timedelta(days=8))
+    db_session.commit()
+
+    assert trending_page(db_session, "day", 0, 10, NOW) == [
+        {"jugador": "Leo", "votos_periodo": 4},
+        {"jugador": "Ana", "votos_periodo": 1},
+    ]
+    assert trending_page(db_session, "week", 0, 10, NOW) == [
+        {"jugador": "Ana", "votos_periodo": 7},
+        {"jugador": "Leo", "votos_periodo": 4},
+    ]
+
+
+def test_compaction_preserves_weekly_totals(db_session):
+    _seed(db_session)
+    for hours_ago in (50, 52, 54):
+        record_votes(db_session, {1: 1, 2: 2}, at=NOW - timedelta(hours=hours_ago))
+    record_votes(db_session, {2: 3}, at=NOW - timedelta(hours=1))
+    record_votes(db_session, {1: 9}, at=NOW - timedelta(days=40))
+    db_session.commit()
+    before = trending_page(db_session, "week", 0, 10, NOW)
+
+    assert compact_vote_buckets(db_session, NOW) == 7
+    # Las horas antiguas quedan en un bucket diario por video; el diario vencido se borra
+    assert sorted(_buckets(db_session)) == sorted([(DAY, 1, 3), (DAY, 2, 6), (HOUR, 2, 3)])
+    assert trending_page(db_session, "week", 0, 10, NOW) == before
+    assert trending_page(db_session, "day", 0, 10, NOW) == [{"jugador": "Leo", "votos_periodo": 3}]
+
+    # Compactar de nuevo no cambia nada
+    assert compact_vote_buckets(db_session, NOW) == 0
+    assert trending_page(db_session, "week", 0, 10, NOW) == before
+
+
+def test_trending_endpoint_reads_votes(db_session):
+    from src.main import app
+
+    _seed(db_session)
+    app.dependency_overrides[public_router.get_db] = lambda: FakeAsyncSession(db_session)
+    app.dependency_overrides[public_router.get_current_user] = lambda: type("U", (), {"id": 9})()
+    client = TestClient(app)
+    try:
+        assert client.post("/api/public/videos/2/vote").status_code == 200
+        trending = client.get("/api/public/rankings/trending", params={"window": "week"})
+        invalid = client.get("/api/public/rankings/trending", params={"window": "year"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert trending.status_code == 200
+    assert trending.json() == [{"jugador": "Leo", "votos_periodo": 1}]
+    assert "etag" in trending.headers
+    assert invalid.status_code == 422
@@ -0,0 +1,37 @@
+import time
+
+from prometheus_client import REGISTRY
+
+from src.utils.user_cache import TTLCache
+
+
+def test_lru_eviction_respects_max_size():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" pasa a ser el más reciente
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(max_size=10, ttl=0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_hit_and_miss_counters():
+    hits = REGISTRY.get_sample_value("user_cache_hits_total")
+    misses = REGISTRY.get_sample_value("user_cache_misses_total")
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.get("x")
+    cache.set("x", 1)
+    cache.get("x")
+    assert REGISTRY.get_sample_value("user_cache_hits_total") == hits + 1
+    assert REGISTRY.get_sample_value("user_cache_misses_total") == misses + 1
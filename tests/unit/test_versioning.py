@@ -0,0 +1,125 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.main import app
+from src.models.db_models import Usuario, Video
+from src.routers import public_router, videos_router
+from src.utils.events import event_bus
+from src.utils.leaderboard import RegionalLeaderboards
+from src.utils.versioning import DataVersion, bump_data_version
+from tests.fakes import FakeAsyncSession
+
+
+@pytest.fixture
+def api(db_session):
+    db_session.add(Usuario(id=1, first_name="Leo", last_name="B", email="l@b.co", password="x", city="C", country="D"))
+    db_session.add(Video(id=1, title="a", filename="a.mp4", status="processed", owner_id=1, votes_count=2,
+                         uploaded_at=datetime(2025, 10, 1, 9), processed_at=datetime(2025, 10, 1, 10)))
+    db_session.commit()
+
+    user = type("U", (), {"id": 1})()
+    for router in (public_router, videos_router):
+        app.dependency_overrides[router.get_db] = lambda: FakeAsyncSession(db_session)
+        app.dependency_overrides[router.get_current_user] = lambda: user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def _count_queries(db_session):
+    statements = []
+    event.listen(db_session.get_bind(), "before_cursor_execute", lambda *a, **k: statements.append(a[2]))
+    return statements
+
+
+@pytest.mark.parametrize("path", ["/api/public/videos", "/api/public/rankings"])
+def test_public_endpoint_returns_304_without_querying(api, db_session, path):
+    first = api.get(path)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"].startswith("public, max-age=")
+
+    statements = _count_queries(db_session)
+    second = api.get(path, headers={"If-None-Match": etag})
+
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert second.content == b""
+    assert statements == []
+
+
+def test_vote_changes_public_etag(api):
+    etag = api.get("/api/public/videos").headers["ETag"]
+
+    assert api.post("/api/public/videos/1/vote").status_code == 200
+
+    r = api.get("/api/public/videos", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    assert r.json()[0]["votes_count"] == 3
+
+
+def test_etag_depends_on_page_parameters(api):
+    assert api.get("/api/public/videos").headers["ETag"] != api.get("/api/public/videos?limit=5").headers["ETag"]
+
+
+def test_video_detail_conditional_get(api, db_session):
+    first = api.get("/api/videos/1")
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    assert first.headers["Last-Modified"] == "Wed, 01 Oct 2025 10:00:00 GMT"
+
+    assert api.get("/api/videos/1", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+    assert api.get("/api/videos/1", headers={"If-Modified-Since": first.headers["Last-Modified"]}).status_code == 304
+
+    db_session.get(Video, 1).title = "nuevo título"
+    db_session.commit()
+    assert api.get("/api/videos/1", headers={"If-None-Match": first.headers["ETag"]}).status_code == 200
+
+
+def test_remote_changes_are_seen_after_poll_interval(db_session):
+    """Cambios de otras instancias o del worker se detectan al vencer el intervalo"""
+    version = DataVersion(poll_interval=3600)
+    before = version.current(db_session)
+
+    # Otra transacción (p. ej. el worker al marcar un video como procesado)
+    bump_data_version(db_session, 9)
+    db_session.commit()
+    assert version.current(db_session) == before
+
+    version.poll_interval = 0
+    assert version.current(db_session) != before
+
+
+def test_version_counts_changes_not_ids(db_session):
+    """Dos cambios en slots distintos, confirmados en cualquier orden, dan la misma versión"""
+    version = DataVersion(poll_interval=0)
+    assert version.current(db_session) == "0"
+    for key in (3, 1, 3):
+        bump_data_version(db_session, key)
+    db_session.rollback()
+    assert version.current(db_session) == "0"
+
+    for key in (3, 1, 3):
+        bump_data_version(db_session, key)
+    db_session.commit()
+    assert version.current(db_session) == "3"
+
+
+def test_rankings_etag_follows_the_instance_leaderboard(api, monkeypatch):
+    """Servido desde el leaderboard en memoria, el ETag cambia con cada voto aplicado a esa copia"""
+    board = RegionalLeaderboards()
+    board.rebuild([(1, "Leo", "D", "C", 2)])
+    monkeypatch.setattr(public_router, "leaderboard", board)
+    first = api.get("/api/public/rankings")
+    assert first.headers["ETag"] == api.get("/api/public/rankings").headers["ETag"]
+
+    board.add_votes(1, 1)
+    r = api.get("/api/public/rankings", headers={"If-None-Match": first.headers["ETag"]})
+    assert r.status_code == 200
+    assert r.json()[0]["votos_acumulados"] == 3
+
+    # Otra instancia con la misma cantidad de cambios no comparte el ETag
+    monkeypatch.setattr(event_bus, "instance_id", "otra-instancia")
+    assert api.get("/api/public/rankings").headers["ETag"] != r.headers["ETag"]
@@ -36,3 +36,68 @@ def test__video_info_no_video_track(monkeypatch, tmp_path):
     assert duration == pytest.approx(0.0)
     assert w == 0
     assert h == 0
+
+
+class FakeUpload:
+    """Simula un UploadFile que entrega el contenido por bloques."""
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+        self.reads = []
+
+    async def read(self, size=-1):
+        chunk = self.data[self.pos:self.pos + size]
+        self.pos += len(chunk)
+        self.reads.append(size)
+        return chunk
+
+
+def test__stream_to_disk_writes_by_chunks(monkeypatch, tmp_path):
+    import asyncio
+    import hashlib
+
+    monkeypatch.setattr(vr, 'UPLOAD_CHUNK_SIZE', 4)
+    data = b"0123456789"
+    upload = FakeUpload(data)
+    dest = tmp_path / "out.mp4"
+
+    size, checksum = asyncio.run(vr._stream_to_disk(upload, dest))
+
+    assert size == len(data)
+    assert checksum == hashlib.sha256(data).hexdigest()
+    assert dest.read_bytes() == data
+    assert all(r == 4 for r in upload.reads)
+
+
+def test__stream_to_disk_aborts_when_limit_is_crossed(monkeypatch, tmp_path):
+    import asyncio
+    from fastapi import HTTPException
+
+    monkeypatch.setattr(vr, 'UPLOAD_CHUNK_SIZE', 4)
+    monkeypatch.setattr(vr, 'MAX_BYTES', 6)
+    upload = FakeUpload(b"x" * 100)
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(vr._stream_to_disk(upload, tmp_path / "big.mp4"))
+
+    assert excinfo.value.status_code == 400
+    # Se detiene en el bloque que supera el límite, sin leer el resto
+    assert upload.pos == 8
+
+
+def test__stream_to_disk_rejects_invalid_header_early(monkeypatch, tmp_path):
+    import asyncio
+    from fastapi import HTTPException
+    from src.utils.mp4_utils import Mp4HeaderParser
+    from tests.unit.test_mp4_utils import mp4
+
+    monkeypatch.setattr(vr, 'UPLOAD_CHUNK_SIZE', 64)
+    data = mp4(duration_s=90.0) + b"\x00" * 10_000
+    upload = FakeUpload(data)
+
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(vr._stream_to_disk(upload, tmp_path / "long.mp4", Mp4HeaderParser()))
+
+    assert "Duración inválida" in excinfo.value.detail
+    # Se rechaza tras leer la cabecera, sin recibir el resto del archivo
+    assert upload.pos < 1024
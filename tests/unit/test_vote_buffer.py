@@ -0,0 +1,167 @@
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+
+from src.models.db_models import Usuario, Video, Vote, VoteBucket
+from src.routers import public_router
+from src.utils import vote_buffer as vb
+from src.utils.versioning import DataVersion
+from src.utils.vote_buffer import VoteBuffer, apply_increments, flush_votes, reconcile_vote_counts
+from tests.fakes import FakeAsyncSession
+
+
+def _seed(db):
+    db.add(Usuario(id=1, first_name="Leo", last_name="B", email="l@b.co", password="x", city="C", country="D"))
+    db.add(Video(id=1, title="a", filename="a", status="processed", owner_id=1, votes_count=2))
+    db.add(Video(id=2, title="b", filename="b", status="processed", owner_id=1, votes_count=0))
+    db.commit()
+
+
+def test_buffer_aggregates_per_video():
+    buffer = VoteBuffer()
+    assert buffer.add(1) == 1
+    assert buffer.add(1) == 2
+    buffer.add(2, 5)
+
+    assert len(buffer) == 7
+    assert buffer.drain() == {1: 2, 2: 5}
+    assert len(buffer) == 0 and buffer.pending(1) == 0
+
+    buffer.restore({1: 2})
+    assert buffer.pending(1) == 2
+
+
+def test_apply_increments_single_update(db_session):
+    _seed(db_session)
+    version = DataVersion(poll_interval=0)
+    before = version.current(db_session)
+
+    apply_increments(db_session, {1: 3, 2: 10})
+    db_session.commit()
+    db_session.expire_all()
+
+    assert db_session.get(Video, 1).votes_count == 5
+    assert db_session.get(Video, 2).votes_count == 10
+    # Los listados públicos cambiaron: ETags y caché de respuestas deben renovarse
+    assert version.current(db_session) != before
+
+
+def test_flush_failure_keeps_increments(monkeypatch):
+    class BrokenDB:
+        def execute(self, *a, **k): raise RuntimeError("BD caída")
+        def rollback(self): ...
+        def close(self): ...
+
+    monkeypatch.setattr(vb, "SessionLocal", BrokenDB)
+    buffer = VoteBuffer()
+    buffer.add(1, 4)
+
+    assert flush_votes(buffer) == 0
+    assert buffer.pending(1) == 4
+
+
+def test_vote_endpoint_write_behind(db_session, monkeypatch):
+    """El voto se inserta de inmediato; el contador reportado incluye lo pendiente"""
+    from src.main import app
+
+    _seed(db_session)
+    buffer = VoteBuffer()
+    monkeypatch.setattr(public_router, "VOTE_WRITE_BEHIND", True)
+    monkeypatch.setattr(public_router, "vote_buffer", buffer)
+    monkeypatch.setattr(vb, "SessionLocal", lambda: db_session)
+
+    app.dependency_overrides[public_router.get_db] = lambda: FakeAsyncSession(db_session)
+    app.dependency_overrides[public_router.get_current_user] = lambda: type("U", (), {"id": 1})()
+    try:
+        r = TestClient(app).post("/api/public/videos/1/vote")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert r.status_code == 200
+    assert r.json()["total_votos"] == 3
+    assert r.json()["votos_pendientes"] == 1
+    assert db_session.query(Vote).count() == 1
+    assert db_session.get(Video, 1).votes_count == 2
+
+    assert db_session.query(VoteBucket).count() == 0
+
+    assert flush_votes(buffer) == 1
+    assert db_session.get(Video, 1).votes_count == 3
+    # El flush también lleva el incremento al bucket de la hora
+    assert db_session.query(VoteBucket.video_id, VoteBucket.votes).all() == [(1, 1)]
+
+
+def test_threshold_triggers_early_flush(monkeypatch):
+    flushed = []
+    monkeypatch.setattr(vb, "VOTE_FLUSH_INTERVAL", 30)
+    monkeypatch.setattr(vb, "flush_votes", lambda buffer: flushed.append(buffer.drain()))
+    buffer = VoteBuffer(threshold=3)
+
+    async def main():
+        task = asyncio.create_task(vb.run_vote_flusher(buffer))
+        await asyncio.sleep(0.05)
+        adder = threading.Thread(target=lambda: [buffer.add(7) for _ in range(3)])
+        adder.start()
+        adder.join()
+        for _ in range(50):
+            if flushed:
+                break
+            await asyncio.sleep(0.02)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+    assert flushed[0] == {7: 3}
+
+
+def test_flusher_survives_saturated_pool(monkeypatch):
+    from src.utils import executors
+    from src.utils.executors import PoolSaturatedError
+
+    class FlakyPool:
+        calls = 0
+
+        async def run(self, fn, *args):
+            self.calls += 1
+            if self.calls == 1:
+                raise PoolSaturatedError("io")
+            return fn(*args)
+
+    flushed = []
+    monkeypatch.setattr(executors, "io_pool", FlakyPool())
+    monkeypatch.setattr(vb, "VOTE_FLUSH_INTERVAL", 0.01)
+    monkeypatch.setattr(vb, "flush_votes", lambda buffer: flushed.append(buffer.drain()))
+    buffer = VoteBuffer()
+    buffer.add(7, 2)
+
+    async def main():
+        task = asyncio.create_task(vb.run_vote_flusher(buffer))
+        for _ in range(50):
+            if flushed:
+                break
+            await asyncio.sleep(0.02)
+        alive = not task.done()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return alive
+
+    assert asyncio.run(main())
+    # El primer ciclo falló sin perder los incrementos; el siguiente los aplicó
+    assert flushed[0] == {7: 2}
+
+
+def test_reconcile_vote_counts(db_session):
+    _seed(db_session)
+    db_session.add_all([Vote(video_id=2, user_id=1)])
+    db_session.commit()
+
+    version = DataVersion(poll_interval=0)
+    before = version.current(db_session)
+
+    # Video 1 dice 2 votos pero no tiene filas; video 2 tiene 1 voto sin contar
+    assert reconcile_vote_counts(db_session) == 2
+    assert version.current(db_session) != before
+    db_session.expire_all()
+    assert db_session.get(Video, 1).votes_count == 0
+    assert db_session.get(Video, 2).votes_count == 1
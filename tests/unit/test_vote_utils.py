@@ -0,0 +1,107 @@
+import threading
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+
+from src.db.database import Base
+from src.models.db_models import Usuario, Video, Vote, VoteBucket
+from src.utils.vote_utils import cast_vote, vote_rejection_reason
+
+
+def _seed(db, users=1):
+    db.add_all([
+        Usuario(id=i, first_name=f"u{i}", last_name="x", email=f"u{i}@anb.co", password="x", city="C", country="D")
+        for i in range(1, users + 1)
+    ])
+    db.add(Video(id=1, title="v", filename="v.mp4", status="processed", owner_id=1, votes_count=0))
+    db.add(Video(id=2, title="w", filename="w.mp4", status="uploaded", owner_id=1, votes_count=0))
+    db.commit()
+
+
+def test_cast_vote_once_per_user(db_session):
+    _seed(db_session)
+
+    row = cast_vote(db_session, 1, 1)
+    db_session.commit()
+    assert (row.id, row.votes_count, row.owner_id) == (1, 1, 1)
+
+    assert cast_vote(db_session, 1, 1) is None
+    assert vote_rejection_reason(db_session, 1) == "already_voted"
+    assert cast_vote(db_session, 2, 1) is None
+    assert vote_rejection_reason(db_session, 2) == "not_found"
+    assert cast_vote(db_session, 999, 1) is None
+    assert vote_rejection_reason(db_session, 999) == "not_found"
+
+
+def test_concurrent_votes_are_not_lost(tmp_path):
+    """Muchos hilos votando el mismo video (y repitiendo votos): ningún incremento se pierde"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'votes.db'}", connect_args={"timeout": 30, "check_same_thread": False}
+    )
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    users, threads = 200, 8
+    db = Session()
+    _seed(db, users=users)
+    db.close()
+
+    def voter(worker):
+        session = Session()
+        for user_id in range(worker + 1, users + 1, threads):
+            for _ in range(2):
+                cast_vote(session, 1, user_id)
+                session.commit()
+        session.close()
+
+    pool = [threading.Thread(target=voter, args=(w,)) for w in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+
+    db = Session()
+    assert db.get(Video, 1).votes_count == users
+    assert db.query(func.count(Vote.id)).scalar() == users
+    db.close()
+    engine.dispose()
+
+
+def test_postgres_vote_is_a_single_statement():
+    """En PostgreSQL el voto, sus incrementos y la versión de los datos viajan juntos en un CTE"""
+    captured = []
+
+    class FakeBind:
+        dialect = postgresql.dialect()
+
+    class FakeSession:
+        def get_bind(self): return FakeBind()
+        def execute(self, stmt):
+            captured.append(str(stmt.compile(dialect=postgresql.dialect())))
+            return type("R", (), {"first": lambda self: None})()
+
+    cast_vote(FakeSession(), 1, 2)
+
+    assert len(captured) == 1
+    sql = captured[0]
+    assert sql.startswith("WITH inserted_vote AS")
+    assert "ON CONFLICT (video_id, user_id) DO NOTHING" in sql
+    assert "UPDATE videos SET votes_count" in sql
+    assert "vote_bucket AS \n(INSERT INTO vote_buckets" in sql
+    assert "bumped_version AS \n(INSERT INTO data_versions" in sql
+
+    # Con escritura diferida solo viaja el voto: los incrementos los aplica el flush
+    captured.clear()
+    cast_vote(FakeSession(), 1, 2, increment=False)
+    assert "vote_buckets" not in captured[0] and "data_versions" not in captured[0]
+
+
+def test_cast_vote_records_hourly_bucket(db_session):
+    _seed(db_session, users=2)
+
+    cast_vote(db_session, 1, 1)
+    cast_vote(db_session, 1, 2)
+    cast_vote(db_session, 1, 2)
+    db_session.commit()
+
+    assert db_session.query(VoteBucket.video_id, VoteBucket.owner_id, VoteBucket.votes).all() == [(1, 1, 2)]
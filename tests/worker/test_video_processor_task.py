@@ -38,7 +38,7 @@ def test_process_video_success(monkeypatch, tmp_path):
     fake_db.filter = lambda *a, **k: fake_db
     fake_db.update = lambda *a, **k: None
     fake_db.commit = lambda: None
-    monkeypatch.setattr(task, "get_db", lambda: iter([fake_db]))
+    monkeypatch.setattr(task, "get_sync_db", lambda: iter([fake_db]))
 
     video_data = {"id": 1, "filename": fake_file.name}
     result = task.process_video(video_data)
@@ -92,7 +92,7 @@ def test_process_video_ffmpeg_error(monkeypatch, tmp_path):
     fake_db.filter = lambda *a, **k: fake_db
     fake_db.update = lambda *a, **k: None
     fake_db.commit = lambda: None
-    monkeypatch.setattr(task, "get_db", lambda: iter([fake_db]))
+    monkeypatch.setattr(task, "get_sync_db", lambda: iter([fake_db]))
 
     result = task.process_video({"id": 10, "filename": fake_file.name})
 
@@ -124,10 +124,69 @@ def test_process_video_generic_error(monkeypatch, tmp_path):
     fake_db.filter = lambda *a, **k: fake_db
     fake_db.update = lambda *a, **k: None
     fake_db.commit = lambda: None
-    monkeypatch.setattr(task, "get_db", lambda: iter([fake_db]))
+    monkeypatch.setattr(task, "get_sync_db", lambda: iter([fake_db]))
 
     result = task.process_video({"id": 99, "filename": fake_file.name})
 
     assert result["success"] is False
     assert isinstance(result["error"], str)
-    assert "Error" in result["error"]
\ No newline at end of file
+    assert "Error" in result["error"]
+
+# ---------------------------------------------------------
+# 6️⃣ Contenido duplicado: se reutiliza el resultado sin ffmpeg
+# ---------------------------------------------------------
+def test_process_video_reuses_processed_artifact(monkeypatch, tmp_path, db_session):
+    """Si el contenido ya se procesó, el worker no ejecuta ffmpeg"""
+    from src.models.db_models import Usuario, Video
+    from src.utils.dedup_utils import file_sha256, register_processed_artifact
+
+    source = tmp_path / "src.mp4"
+    source.write_bytes(b"mismo contenido")
+    db_session.add(Usuario(id=1, first_name="A", last_name="B", email="a@b.co", password="x", city="C", country="D"))
+    db_session.add(Video(id=5, title="dup", filename="unprocessed-videos/dup.mp4", owner_id=1))
+    register_processed_artifact(db_session, file_sha256(source), "processed-videos/prev_processed.mp4")
+    db_session.commit()
+
+    def fake_download(key, local_path):
+        local_path.write_bytes(source.read_bytes())
+        return True
+
+    def fail_run(*a, **k):
+        raise AssertionError("ffmpeg no debe ejecutarse")
+
+    monkeypatch.setattr(task, "TMP_DIR", tmp_path)
+    monkeypatch.setattr(task, "download_from_s3", fake_download)
+    monkeypatch.setattr(task.subprocess, "run", fail_run)
+    monkeypatch.setattr(task, "get_sync_db", lambda: iter([db_session]))
+
+    result = task.process_video({"id": 5, "filename": "unprocessed-videos/dup.mp4"})
+
+    assert result["success"] is True
+    assert result["deduplicated"] is True
+    video = db_session.get(Video, 5)
+    assert video.status == "processed"
+    assert video.filename == "processed-videos/prev_processed.mp4"
+
+
+def test_process_video_known_hash_skips_download(monkeypatch, tmp_path, db_session):
+    """Con content_sha256 en el mensaje, un duplicado se resuelve sin descargar el original"""
+    from src.models.db_models import Usuario, Video
+    from src.utils.dedup_utils import register_processed_artifact
+
+    db_session.add(Usuario(id=1, first_name="A", last_name="B", email="a@b.co", password="x", city="C", country="D"))
+    db_session.add(Video(id=6, title="dup", filename="unprocessed-videos/dup.mp4", owner_id=1))
+    register_processed_artifact(db_session, "ab" * 32, "processed-videos/prev_processed.mp4")
+    db_session.commit()
+
+    def fail_download(key, local_path):
+        raise AssertionError("no debe descargarse el original")
+
+    monkeypatch.setattr(task, "TMP_DIR", tmp_path)
+    monkeypatch.setattr(task, "download_from_s3", fail_download)
+    monkeypatch.setattr(task, "get_sync_db", lambda: iter([db_session]))
+
+    result = task.process_video({"id": 6, "filename": "unprocessed-videos/dup.mp4", "content_sha256": "ab" * 32})
+
+    assert result["success"] is True
+    assert result["deduplicated"] is True
+    assert db_session.get(Video, 6).filename == "processed-videos/prev_processed.mp4"
@@ -4,25 +4,50 @@ from datetime import datetime
 import logging
 from sqlalchemy.orm import Session
 from src.models.db_models import Video
-from src.db.database import get_db
+from src.db.database import get_sync_db
 from src.utils.s3_utils import upload_to_s3, download_from_s3
 import os
 from src.utils.sqs_utils import receive_from_sqs, delete_from_sqs
+from src.utils.events import PROCESSED, publish_event
+from src.utils.versioning import bump_data_version
+from src.utils.dedup_utils import (
+    PIPELINE_PARAMS,
+    file_sha256,
+    find_processed_artifact,
+    register_processed_artifact,
+)
 
 
 BASE_DIR = Path(__file__).parent.parent
 TMP_DIR = Path("videos/unprocessed-videos/")
 
-WATERMARK_PATH = BASE_DIR / "videos" / "nba-rs-normalized.mp4"
+WATERMARK_PATH = BASE_DIR / "videos" / PIPELINE_PARAMS["watermark"]
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _mark_processed(db: Session, video_id: int, processed_key: str, content_sha256: str):
+    """Marca el video como procesado apuntando al archivo final en S3."""
+    db.query(Video).filter(Video.id == video_id).update(
+        {
+            "status": "processed",
+            "processed_at": datetime.now(),
+            "filename": processed_key,
+            "content_sha256": content_sha256,
+        }
+    )
+    bump_data_version(db, video_id)
+    db.commit()
+    # Las instancias de la API invalidan sus listados públicos al recibirlo
+    publish_event(PROCESSED, video_id=video_id)
+
+
 def process_video(video: dict):
     """
     Descarga un video desde S3, lo procesa (trim + watermark),
     sube la versión final a S3 y actualiza el estado en la BD.
+    Si el mismo contenido ya fue procesado, reutiliza el resultado sin ejecutar ffmpeg.
     """
     start_time = datetime.now()
     db: Session = None
@@ -36,36 +61,64 @@ def process_video(video: dict):
         local_tmp = TMP_DIR / f"{name}.tmp.mp4"
         local_output = TMP_DIR / f"{name}_processed.mp4"
 
-        logger.info(f"Descargando {s3_key_input} desde S3...")
-        if not download_from_s3(s3_key_input, local_source):
-            raise Exception(f"No se pudo descargar el archivo desde S3: {s3_key_input}")
+        # Si el mismo contenido ya se procesó con estos parámetros, se reutiliza el resultado.
+        # Con el hash en el mensaje se consulta el índice sin descargar el original
+        content_sha256 = video.get("content_sha256")
+        db = next(get_sync_db())
+        existing_key = find_processed_artifact(db, content_sha256) if content_sha256 else None
+        if not existing_key:
+            # Liberar la conexión durante la descarga
+            db.rollback()
+            logger.info(f"Descargando {s3_key_input} desde S3...")
+            if not download_from_s3(s3_key_input, local_source):
+                raise Exception(f"No se pudo descargar el archivo desde S3: {s3_key_input}")
+            if not content_sha256:
+                content_sha256 = file_sha256(local_source)
+                existing_key = find_processed_artifact(db, content_sha256)
+        if existing_key:
+            logger.info(f"Contenido duplicado ({content_sha256[:12]}); se reutiliza {existing_key}.")
+            _mark_processed(db, video.get("id"), existing_key, content_sha256)
+            return {
+                "success": True,
+                "file": filename,
+                "processed_key": existing_key,
+                "deduplicated": True,
+                "timestamp": datetime.now().isoformat(),
+                "processing_time_seconds": round(
+                    (datetime.now() - start_time).total_seconds(), 2
+                ),
+            }
+        # Liberar la conexión mientras corre ffmpeg
+        db.rollback()
 
         logger.info(f"Procesando video {filename}...")
 
+        p = PIPELINE_PARAMS
+        w, h = p["width"], p["height"]
         subprocess.run(
             [
                 "ffmpeg",
                 "-i",
                 str(local_source),
                 "-t",
-                "30",
+                str(p["max_seconds"]),
                 "-vf",
-                "fps=30,scale=1920:1080:force_original_aspect_ratio=decrease,"
-                "pad=1920:1080:(ow-iw)/2:(oh-ih)/2",
+                f"fps={p['fps']},scale={w}:{h}:force_original_aspect_ratio=decrease,"
+                f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2",
                 "-c:v",
-                "libx264",
+                p["video_codec"],
                 "-preset",
-                "medium",
+                p["preset"],
                 "-crf",
-                "23",
+                str(p["crf"]),
                 "-c:a",
-                "aac",
+                p["audio_codec"],
                 "-ar",
-                "44100",
+                str(p["audio_rate"]),
                 "-ac",
-                "2",
+                str(p["audio_channels"]),
                 "-b:a",
-                "128k",
+                p["audio_bitrate"],
                 "-y",
                 "-loglevel",
                 "error",
@@ -92,15 +145,15 @@ def process_video(video: dict):
                 "-map",
                 "[a]",
                 "-c:v",
-                "libx264",
+                p["video_codec"],
                 "-preset",
-                "medium",
+                p["preset"],
                 "-crf",
-                "23",
+                str(p["crf"]),
                 "-c:a",
-                "aac",
+                p["audio_codec"],
                 "-b:a",
-                "128k",
+                p["audio_bitrate"],
                 "-y",
                 "-loglevel",
                 "error",
@@ -116,15 +169,8 @@ def process_video(video: dict):
             raise Exception("Error subiendo el video procesado a S3.")
 
         logger.info("Actualizando base de datos...")
-        db = next(get_db())
-        db.query(Video).filter(Video.id == video.get("id")).update(
-            {
-                "status": "processed",
-                "processed_at": datetime.now(),
-                "filename": processed_key,
-            }
-        )
-        db.commit()
+        register_processed_artifact(db, content_sha256, processed_key)
+        _mark_processed(db, video.get("id"), processed_key, content_sha256)
 
         logger.info("Video procesado y actualizado correctamente.")
 
@@ -190,18 +236,11 @@ def run_sqs_worker(poll_interval=10):
                 continue
 
             for msg in messages:
-                body = msg.get("Body")
-                if not body:
+                # receive_from_sqs ya entrega el cuerpo parseado en "body"
+                video_data = msg.get("body")
+                if not video_data:
                     logger.warning("Mensaje vacío, se elimina.")
-                    delete_from_sqs(msg["ReceiptHandle"])
-                    continue
-
-                import json
-                try:
-                    video_data = json.loads(body)
-                except Exception as e:
-                    logger.error(f"Error parseando JSON del mensaje: {e}")
-                    delete_from_sqs(msg["ReceiptHandle"])
+                    delete_from_sqs(msg["receipt"])
                     continue
 
                 logger.info(f"Procesando video ID={video_data.get('id')}, archivo={video_data.get('filename')}")
@@ -213,7 +252,7 @@ def run_sqs_worker(poll_interval=10):
                     logger.error(f"❌ Falló procesamiento: {result.get('error')}")
 
                 # Eliminar mensaje de la cola (importante para no reprocesar)
-                delete_from_sqs(msg["ReceiptHandle"])
+                delete_from_sqs(msg["receipt"])
 
         except KeyboardInterrupt:
             logger.info("Worker detenido manualmente.")